@@ -9,10 +9,32 @@ Deploy: Streamlit Cloud  →  https://share.streamlit.io
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-from pathlib import Path
-from typing import Optional
+import functools
+import os
+import time
+from typing import TYPE_CHECKING, Optional
+
+import cube as cb
+import memory
+import perf
+from data_core import (
+    CUBE_FILE, DISC_VN, FUNNEL_VN, INTENT_VN, LEVEL_VN, SEARCH_FILE, SIMILAR_FILE, STAGE_VN,
+    TEXT_STORE, find_export, generate_synthetic_data, read_data, read_export,
+)
+from downsample import lttb
+from indexes import BitmapIndex, DateStoreIndex
+from memo import Memo, fingerprint
+from search import SearchIndex, tokenize
+from similar import VectorIndex
+from textstore import TextStore
+
+if TYPE_CHECKING:                      # plotly chỉ được import khi thật sự vẽ chart
+    import plotly.graph_objects as go
+
+if int(pd.__version__.split(".")[0]) < 3:
+    # pandas 2.x: bật Copy-on-Write như pandas 3 cho process của app — dataset dùng
+    # chung (data_core.FrozenFrame) không bị ghi qua df[c].iloc[i] = … / to_numpy()
+    pd.set_option("mode.copy_on_write", True)
 
 # ─── PAGE CONFIG ──────────────────────────────────────────────────────────────
 st.set_page_config(
@@ -69,6 +91,9 @@ st.markdown("""
     margin-bottom: 4px;
 }
 
+/* View nav (radio ngang thay cho st.tabs) */
+div[data-testid="stRadio"]:has(input[name="view"]) label { padding-right: 18px; }
+
 /* Demo badge */
 .demo-badge {
     background: rgba(245,166,35,0.15);
@@ -104,263 +129,133 @@ _INFO      = "#4cc9f0"
 _TEMPLATE = "plotly_dark"
 _CFG      = {"displayModeBar": False}
 
-INTENT_VN = {
-    "hoi_gia":               "Hỏi giá",
-    "tu_van_do_mat":         "Tư vấn đo mắt",
-    "dat_lich_do":           "Đặt lịch khám",
-    "hoi_san_pham":          "Hỏi sản phẩm",
-    "mua_hang":              "Mua hàng",
-    "khieu_nai":             "Khiếu nại",
-    "hoi_bao_hanh":          "Hỏi bảo hành",
-    "tu_van_kinh_ap_trong":  "Tư vấn áp tròng",
-}
-STAGE_VN = {
-    "awareness": "Nhận thức", "consideration": "Cân nhắc",
-    "intent": "Có ý định", "evaluation": "Đánh giá",
-    "purchase": "Mua hàng", "loyalty": "Trung thành",
-}
-DISC_VN   = {"D": "Quyết đoán (D)", "I": "Ảnh hưởng (I)", "S": "Ổn định (S)", "C": "Cẩn thận (C)"}
-LEVEL_VN  = {"high": "Cao", "medium": "Trung bình", "low": "Thấp"}
-FUNNEL_VN = {
-    "warm_lead": "Warm Lead", "cold_lead": "Cold Lead",
-    "hot_lead": "Hot Lead", "existing_customer": "KH cũ",
-}
-
 SENT_COLOR = {"positive": _SUCCESS, "neutral": _WARNING, "negative": _DANGER}
 DISC_COLOR = {"D": _DANGER, "I": _WARNING, "S": _SUCCESS, "C": _INFO}
 URG_COLOR  = {"high": _DANGER, "medium": _WARNING, "low": _SUCCESS}
 TRUST_COLOR= {"high": _SUCCESS, "medium": _WARNING, "low": _DANGER}
 
-# ─── CONVERSATION SNIPPETS ────────────────────────────────────────────────────
-_SNIPPETS = {
-"hoi_gia": """\
-[CUSTOMER] Chào shop! Gọng kính titanium bên mình giá khoảng bao nhiêu ạ?
-[ADMIN] Dạ chào bạn! Gọng titanium nhẹ và siêu bền, từ 850k-2tr tùy dòng ạ. Bạn đang tìm gọng dáng nào?
-[CUSTOMER] Mình hay đeo kiểu rimless, có không ạ?
-[ADMIN] Dạ có! Rimless titanium đang hot lắm ạ, nhẹ như không đeo. Giá từ 1.1tr, kết hợp tròng Zeiss sẽ rất tốt.
-[CUSTOMER] Tròng thêm bao nhiêu nữa?
-[ADMIN] Tròng đơn focal cơ bản 350k, anti-blue light thêm 150k, loại Zeiss premium từ 850k ạ.
-[CUSTOMER] Ok tổng khoảng 1.5tr cho bộ rimless + tròng Zeiss cơ bản?
-[ADMIN] Đúng rồi ạ! Kèm thêm case cứng và dây đeo miễn phí. Bạn có muốn ghé thử mẫu không?
-[CUSTOMER] Thứ 7 mình ghé được không?
-[ADMIN] Dạ được! Shop mở 8h-21h. Hẹn gặp bạn thứ 7 nhé!""",
-
-"tu_van_do_mat": """\
-[CUSTOMER] Em muốn hỏi về dịch vụ đo mắt bên mình ạ, có chính xác không?
-[ADMIN] Dạ chào em! Bên mình dùng máy đo tự động kết hợp bác sĩ nhãn khoa kiểm tra thủ công. Độ chính xác rất cao ạ.
-[CUSTOMER] Em bị cận khá nặng, 7 độ, đo được không?
-[ADMIN] Dạ đo được hoàn toàn! Máy của mình xử lý tới -20.00. Cận 7 độ bình thường ạ.
-[CUSTOMER] Ngoài đo cận có check thêm gì không?
-[ADMIN] Có ạ! Đo thêm loạn thị, lão thị, áp lực nhãn cầu (phòng ngừa glaucoma), và field of vision ạ. Phí tổng cộng 150k.
-[CUSTOMER] Oke, vậy có cần đặt lịch trước không ạ?
-[ADMIN] Nên đặt trước để không chờ ạ. Em inbox số điện thoại mình book lịch cho nhé!
-[CUSTOMER] Ok để em nhắn SĐT sau. Cảm ơn!""",
-
-"dat_lich_do": """\
-[CUSTOMER] Mình muốn đặt lịch khám mắt cho bé nhà mình, 9 tuổi
-[ADMIN] Dạ chào bạn! Bé có hay nheo mắt hay ngồi gần tivi/điện thoại không ạ?
-[CUSTOMER] Hay nheo mắt và hay phàn nàn nhìn bảng lớp không rõ
-[ADMIN] Dấu hiệu cận thị rồi ạ! Cần khám sớm. Bên mình có bác sĩ chuyên trẻ em vào thứ 3, 5, 7 ạ.
-[CUSTOMER] Thứ 7 tuần này còn lịch không?
-[ADMIN] Thứ 7 còn 9h00 và 14h30 ạ. Bạn chọn giờ nào?
-[CUSTOMER] 9h nhé. Tên bé là Bảo Nam
-[ADMIN] Đã đặt 9h thứ 7 cho bé Bảo Nam! Nhớ cho bé tránh đọc sách 30' trước khi khám nhé ạ.
-[CUSTOMER] Ok, cảm ơn nhiều!
-[ADMIN] Dạ hẹn gặp bé Bảo Nam thứ 7 nhé!""",
-
-"hoi_san_pham": """\
-[CUSTOMER] Bên mình có kính áp tròng màu không? Mình bị cận 3.5 độ
-[ADMIN] Dạ có ạ! Lens màu có độ từ 0 đến -8.00, cận 3.5 dùng được hoàn toàn.
-[CUSTOMER] Có màu grey tự nhiên không? Không muốn quá lòe loẹt
-[ADMIN] Dạ có! Freshlook Dimensions Grey và Acuvue Define Fresh Gray trông rất tự nhiên ạ, hợp với người Á Đông.
-[CUSTOMER] Lens dùng được bao lâu? Và giá?
-[ADMIN] Loại tháng dùng 30 ngày, từ 280k/hộp 2 đôi. Loại ngày dùng 1 lần, 350k/hộp 10 đôi ạ.
-[CUSTOMER] Mình hay dùng máy tính 8h/ngày, loại nào phù hợp?
-[ADMIN] Bạn nên dùng loại ngày (daily) ạ — thoáng khí hơn, không lo nguy cơ nhiễm khuẩn do dùng nhiều ngày.
-[CUSTOMER] Vậy cho mình order 2 hộp Freshlook Grey ngày nhé!""",
-
-"mua_hang": """\
-[CUSTOMER] Shop có Ray-Ban Clubmaster không? Muốn mua làm quà
-[ADMIN] Dạ có ạ! RB3016 Clubmaster đang có đủ màu: gold/tortoise, black/gold, all-black ạ.
-[CUSTOMER] Giá bao nhiêu vậy?
-[ADMIN] Chính hãng từ Mỹ: 3.2tr, kèm case da và certificate ạ. Đang có free gift wrap dịp này.
-[CUSTOMER] Tặng cho bố, bố mình 55 tuổi, màu nào phù hợp?
-[ADMIN] Gold/Tortoise rất classic và phù hợp bậc trung niên ạ! Vừa lịch sự vừa có điểm nhấn.
-[CUSTOMER] Ok mình đặt 1 cái gold/tortoise. Ship được không?
-[ADMIN] Dạ ship toàn quốc, COD hoặc banking. 2-3 ngày ạ. Bạn để lại địa chỉ nhé!
-[CUSTOMER] Địa chỉ: 45 Nguyễn Trãi, Q.1, HCM
-[ADMIN] Đã nhận! Xác nhận đơn Ray-Ban RB3016 Gold/Tortoise, giao 45 Nguyễn Trãi Q.1. Cảm ơn bạn!""",
-
-"khieu_nai": """\
-[CUSTOMER] Tôi mua kính 3 tuần trước, tròng bị bong coating rồi, không dùng sai cách gì cả!
-[ADMIN] Dạ rất xin lỗi bạn! Tình trạng này không nên xảy ra với tròng mới. Bạn có thể cho mình xem ảnh được không ạ?
-[CUSTOMER] [Ảnh tròng bị bong ở chính giữa]
-[ADMIN] Dạ đây là lỗi kỹ thuật ạ, hoàn toàn thuộc bảo hành. Bên mình sẽ thay tròng mới 100% miễn phí.
-[CUSTOMER] Mất bao lâu? Tôi đang cần dùng
-[ADMIN] 3-4 ngày làm việc ạ. Trong thời gian chờ bên mình có tròng tạm cho bạn mượn nếu bạn ghé cửa hàng.
-[CUSTOMER] Ok tôi sẽ ghé ngày mai
-[ADMIN] Dạ! Nhớ mang hóa đơn hoặc ảnh bill. Mình sẽ ưu tiên xử lý ngay cho bạn ạ. Xin lỗi vì sự bất tiện!""",
-
-"hoi_bao_hanh": """\
-[CUSTOMER] Kính mua ở đây được bảo hành bao lâu ạ?
-[ADMIN] Dạ! Gọng: 12 tháng lỗi kỹ thuật. Tròng: 6 tháng bong tráng phủ. Tất cả tính từ ngày mua ạ.
-[CUSTOMER] Nếu gọng bị cong do dùng lâu thì có được bảo hành không?
-[ADMIN] Cong vênh tự nhiên do vật liệu thì được ạ. Nhưng do va chạm hay để nơi nóng (xe hơi dưới nắng) thì ngoài bảo hành.
-[CUSTOMER] Mình muốn hỏi về trường hợp của mình: gọng bị lỏng chốt bản lề sau 8 tháng
-[ADMIN] 8 tháng, lỏng chốt tự nhiên thì trong bảo hành ạ! Bạn mang vào mình siết/thay chốt miễn phí.
-[CUSTOMER] Không cần có hóa đơn không?
-[ADMIN] Nếu còn trong 12 tháng và có thể xác định ngày mua qua SĐT là được ạ. Không cần hóa đơn cứng.
-[CUSTOMER] Tốt quá! Mình sẽ ghé cuối tuần nhé""",
-
-"tu_van_kinh_ap_trong": """\
-[CUSTOMER] Mình mới dùng lens lần đầu, có sợ không ạ?
-[ADMIN] Dạ ban đầu hơi lạ nhưng sẽ quen rất nhanh ạ! Bên mình hướng dẫn đeo/tháo trực tiếp, miễn phí.
-[CUSTOMER] Mắt mình hay bị khô, có dùng được không?
-[ADMIN] Được ạ nhưng cần chọn đúng loại. Dailies Total 1 hoặc Acuvue Oasys — thiết kế cho mắt khô, có thể đeo 12-14h thoải mái.
-[CUSTOMER] 2 loại đó giá bao nhiêu?
-[ADMIN] Dailies Total 1: 580k/hộp 30 đôi (1 tháng). Acuvue Oasys 2-tuần: 280k/hộp 6 đôi ạ.
-[CUSTOMER] Daily tiện hơn nhỉ? Không cần rửa hay ngâm
-[ADMIN] Đúng! Daily là đơn giản và vệ sinh nhất, đặc biệt cho người mới. Mình recommend luôn ạ.
-[CUSTOMER] Ok mình thử Dailies Total 1 nhé. Cận 3.25 đặt được không?
-[ADMIN] Được ạ! 3.25 có sẵn. Lần đầu nên ghé để đo độ curve giác mạc cho vừa nhé. Sau đó order online thoải mái!""",
-}
 
-# ─── SYNTHETIC DATA ───────────────────────────────────────────────────────────
-def _generate_synthetic_data(n: int = 350, seed: int = 42) -> pd.DataFrame:
-    rng = np.random.default_rng(seed)
-
-    PAGES   = ["Kính mắt Hoàng Anh - HN", "Kính mắt Minh Trí - HCM",
-               "Quang Đức Optical - ĐN",  "Hùng Optics - CT"]
-    P_PAGES = [0.35, 0.40, 0.15, 0.10]
-
-    INTENTS  = list(INTENT_VN.keys())
-    P_INT    = [0.28, 0.22, 0.18, 0.12, 0.08, 0.05, 0.04, 0.03]
-
-    STAGES   = list(STAGE_VN.keys())
-    P_STAGE  = [0.18, 0.25, 0.20, 0.15, 0.14, 0.08]
-
-    FUNNELS  = list(FUNNEL_VN.keys())
-    P_FUN    = [0.35, 0.25, 0.20, 0.20]
-
-    SENTS    = ["positive", "neutral", "negative"]
-    P_SENT   = [0.50, 0.30, 0.20]
-
-    DISCS    = list(DISC_VN.keys())
-    P_DISC   = [0.35, 0.30, 0.22, 0.13]
-
-    GENS     = ["Millennial", "Gen Z", "Gen X", "Boomer"]
-    P_GEN    = [0.40, 0.28, 0.22, 0.10]
-
-    LIFESTYLES = ["Nhân viên văn phòng", "Học sinh/Sinh viên", "Phụ huynh",
-                  "Chuyên gia", "Người trung niên"]
-    P_LIFE   = [0.34, 0.26, 0.20, 0.12, 0.08]
-
-    LEVELS   = ["high", "medium", "low"]
-
-    PRODUCTS = ["Kính cận", "Kính lão", "Kính áp tròng", "Kính râm",
-                "Gọng kính", "Tròng kính cao cấp", "Kính trẻ em"]
-
-    COMP     = [None]*6 + ["Specsavers", "Grand Vision", "Local store", "Online shop"]
-    CHURN    = [None]*7 + ["gia_cao", "khong_co_mau", "mua_cho_roi", "can_sua_lai"]
-
-    # Dates — weighted toward recent months
-    dates      = pd.date_range("2025-07-01", "2026-01-31", freq="D")
-    w_dates    = np.exp(np.linspace(-2.0, 0, len(dates))); w_dates /= w_dates.sum()
-    sampled_d  = rng.choice(dates, n, p=w_dates)
-
-    pages   = rng.choice(PAGES,      n, p=P_PAGES)
-    intents = rng.choice(INTENTS,    n, p=P_INT)
-    stages  = rng.choice(STAGES,     n, p=P_STAGE)
-    funnels = rng.choice(FUNNELS,    n, p=P_FUN)
-    sents   = rng.choice(SENTS,      n, p=P_SENT)
-    discs   = rng.choice(DISCS,      n, p=P_DISC)
-    gens    = rng.choice(GENS,       n, p=P_GEN)
-    lives   = rng.choice(LIFESTYLES, n, p=P_LIFE)
-    urgs    = rng.choice(LEVELS,     n, p=[0.20, 0.50, 0.30])
-    trusts  = rng.choice(LEVELS,     n, p=[0.40, 0.40, 0.20])
-    prices  = rng.choice(LEVELS,     n, p=[0.35, 0.40, 0.25])
-    comps   = rng.choice(COMP,       n)
-    prods   = rng.choice(PRODUCTS,   n)
-    churns  = rng.choice(CHURN,      n)
-
-    def _scores(sents_arr, mu_hi=7.6, mu_lo=4.4, sigma=1.1):
-        mu_map = {"positive": mu_hi, "neutral": 6.0, "negative": mu_lo}
-        v = np.array([rng.normal(mu_map[s], sigma) for s in sents_arr])
-        return np.clip(v, 1, 10).round(1)
-
-    agent_scores   = _scores(sents)
-    empathy_scores = _scores(sents, 7.8, 4.2)
-    closing_skills = _scores(sents, 7.0, 4.8)
-
-    # Conversion probability — intent + sentiment + stage aware
-    base_p = np.full(n, 0.35)
-    for i, (intent, sent, stage) in enumerate(zip(intents, sents, stages)):
-        if intent in ("mua_hang", "dat_lich_do"):    base_p[i] += 0.25
-        if intent == "khieu_nai":                    base_p[i] -= 0.20
-        if sent   == "positive":                     base_p[i] += 0.15
-        if sent   == "negative":                     base_p[i] -= 0.15
-        if stage  in ("purchase", "evaluation"):     base_p[i] += 0.20
-        if stage  == "awareness":                    base_p[i] -= 0.12
-    conv_probs  = np.clip(base_p, 0.02, 0.98)
-    conversions = (rng.random(n) < conv_probs).astype(float)
-
-    sent_scores = np.array([
-        rng.uniform(6, 9.5) if s == "positive" else
-        (rng.uniform(1, 4.5) if s == "negative" else rng.uniform(4, 7))
-        for s in sents
-    ]).round(2)
-
-    csats = np.array([
-        rng.uniform(3.8, 5) if s == "positive" else
-        (rng.uniform(1.5, 2.8) if s == "negative" else rng.uniform(2.5, 4))
-        for s in sents
-    ]).round(2)
-
-    msg_counts = rng.integers(4, 26, n)
-    conv_ids   = [f"{pd.Timestamp(d).strftime('%Y%m%d')}_{i:04d}" for i, d in enumerate(sampled_d)]
-    snippets   = [_SNIPPETS.get(intent, _SNIPPETS["hoi_gia"]) for intent in intents]
-
-    df = pd.DataFrame({
-        "conversation_id":       conv_ids,
-        "conversation_date":     pd.to_datetime(sampled_d),
-        "page_name":             pages,
-        "message_count":         msg_counts,
-        "intent_primary":        intents,
-        "purchase_stage":        stages,
-        "funnel_type":           funnels,
-        "funnel_is_successful":  conversions,
-        "sentiment_overall":     sents,
-        "sentiment_score":       sent_scores,
-        "disc_primary":          discs,
-        "generation_cohort":     gens,
-        "lifestyle_segment":     lives,
-        "urgency_level":         urgs,
-        "trust_level":           trusts,
-        "price_sensitivity":     prices,
-        "agent_overall_score":   agent_scores,
-        "empathy_score":         empathy_scores,
-        "agent_closing_skill":   closing_skills,
-        "predicted_csat":        csats,
-        "conversion_probability": conv_probs.round(3),
-        "competitor_brand":      comps,
-        "product_interest":      prods,
-        "churn_reason":          churns,
-        "conversation_snippet":  snippets,
-    })
-    return df.sort_values("conversation_date").reset_index(drop=True)
+# ─── DATA LOADER ──────────────────────────────────────────────────────────────
+def _tracked(fn):
+    """Ghi nhận kết quả của loader cho báo cáo bộ nhớ (memory.track)."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        return memory.track(fn.__name__, fn(*args, **kwargs))
+    return wrapper
 
 
-# ─── DATA LOADER ──────────────────────────────────────────────────────────────
-@st.cache_data(ttl=3600)
+@st.cache_resource(ttl=3600)
+@_tracked
 def load_data() -> pd.DataFrame:
-    csv_path = Path(__file__).parent / "data" / "conversations.csv"
-    if csv_path.exists():
-        df = pd.read_csv(csv_path, parse_dates=["conversation_date"])
-        st.session_state["data_source"] = f"📂 Gold export ({len(df):,} records)"
-    else:
-        df = _generate_synthetic_data()
-        st.session_state["data_source"] = f"🎲 Dữ liệu demo tổng hợp ({len(df):,} records)"
-    return df
+    """DataFrame phân tích (data_core.read_data): 1 FrozenFrame chỉ đọc cho mọi session."""
+    perf.annotate(cache="miss")
+    return read_data()
+
+
+def _data_version() -> str:
+    """Phiên bản của load_data() (data_core.data_version).
+
+    Các loader dựng từ dữ liệu nhận nó làm tham số: cache theo phiên bản nên sau
+    khi re-export, index / store được dựng lại cùng với load_data() thay vì hết
+    hạn ttl lệch nhau (index cũ trên frame mới → sai số liệu mà không báo lỗi).
+    """
+    return load_data().attrs.get("data_version")
+
+
+@st.cache_resource(ttl=3600, max_entries=1)
+@_tracked
+def load_index(version: str) -> DateStoreIndex:
+    """Index ngày × cửa hàng trên load_data() (xem indexes.py), dựng 1 lần cho mọi session."""
+    perf.annotate(index="miss")
+    return DateStoreIndex(load_data())
+
+
+@st.cache_resource(ttl=3600, max_entries=1)
+@_tracked
+def load_text_store(version: str) -> TextStore:
+    """Nội dung hội thoại, tách khỏi DataFrame phân tích (mmap nếu export có text store)."""
+    path = find_export()
+    bin_path = TEXT_STORE.with_name(TEXT_STORE.name + ".bin")
+    if path is not None and TextStore.exists(TEXT_STORE) \
+            and bin_path.stat().st_mtime >= path.stat().st_mtime:
+        return TextStore.open(TEXT_STORE)
+    if path is not None:
+        # Export cũ chưa có text store: đọc riêng 2 cột, dựng store trong RAM
+        df = read_export(path, ["conversation_id", "conversation_snippet"])
+        return TextStore.from_frame(df) if "conversation_snippet" in df.columns else TextStore.build([])
+    return TextStore.from_frame(generate_synthetic_data())
+
+
+@st.cache_resource(ttl=3600, max_entries=1)
+@_tracked
+def load_search(version: str) -> SearchIndex:
+    """Inverted index trên nội dung hội thoại (xem search.py): từ export nếu có, không thì dựng."""
+    path = find_export()
+    if path is not None and SEARCH_FILE.exists() and SEARCH_FILE.stat().st_mtime >= path.stat().st_mtime:
+        return SearchIndex.load(SEARCH_FILE)
+    return SearchIndex.from_store(load_text_store(version))
+
+
+@st.cache_resource(ttl=3600, max_entries=1)
+@_tracked
+def load_similar(version: str) -> VectorIndex:
+    """Vector index "hội thoại tương tự" (xem similar.py): từ export nếu có, không thì dựng."""
+    path = find_export()
+    if path is not None and SIMILAR_FILE.exists() and SIMILAR_FILE.stat().st_mtime >= path.stat().st_mtime:
+        return VectorIndex.load(SIMILAR_FILE)
+    return VectorIndex.from_store(load_text_store(version))
+
+
+@st.cache_resource(ttl=3600, max_entries=1)
+@_tracked
+def load_blob_rows(version: str) -> tuple[np.ndarray, np.ndarray]:
+    """blob id → các row của load_data() dùng blob đó, dạng CSR (rows, offsets)."""
+    store = load_text_store(version)
+    blob = store.blob_ids(load_data()["conversation_id"])
+    order = np.argsort(blob, kind="stable")
+    offsets = np.searchsorted(blob[order], np.arange(store.n_blobs + 1))
+    return order, offsets
+
+
+def _search_hits(query: str) -> tuple[np.ndarray, np.ndarray]:
+    """(row của load_data() tăng dần, điểm BM25) cho ``query``."""
+    version = _data_version()
+    blobs, scores = load_search(version).search(query)
+    order, offsets = load_blob_rows(version)
+    starts, lens = offsets[blobs], offsets[blobs + 1] - offsets[blobs]
+    idx = np.arange(lens.sum()) - np.repeat(np.cumsum(lens) - lens - starts, lens)
+    rows, scores = order[idx], np.repeat(scores, lens)
+    o = np.argsort(rows, kind="stable")
+    return rows[o], scores[o]
+
+
+@st.cache_resource(ttl=3600, max_entries=1)
+@_tracked
+def load_cube(version: str) -> pd.DataFrame:
+    """Cube tổng hợp (xem cube.py): từ export nếu có, không thì dựng từ load_data()."""
+    path = find_export()
+    if path is not None and CUBE_FILE.exists() and CUBE_FILE.stat().st_mtime >= path.stat().st_mtime:
+        return pd.read_parquet(CUBE_FILE)
+    return cb.build_cube(load_data())
+
+
+@st.cache_resource
+def get_memo() -> Memo:
+    """Memo LRU dùng chung (xem memo.py), giới hạn bởi CHAT_MEMO_MB và ngân sách bộ nhớ."""
+    return Memo.from_env(budget=memory.Budget.from_env())
+
+
+def _filter_fp(df: pd.DataFrame, flt: tuple) -> str:
+    """Fingerprint của (data version, d0, d1, page)."""
+    return fingerprint(df.attrs.get("data_version"), *flt)
+
+
+def _memoized(key: tuple, fn, *args):
+    """fn(*args), lưu trong memo theo ``key`` = (fingerprint bộ lọc, tên, ...)."""
+    def compute():
+        perf.annotate(memo="miss")
+        return fn(*args)
+    return get_memo().get(key, compute)
 
 
 # ─── UI HELPERS ───────────────────────────────────────────────────────────────
@@ -407,8 +302,85 @@ def _plotly_bg(fig):
     return fig
 
 
+# ─── CHARTS ───────────────────────────────────────────────────────────────────
+# Figure đã dựng được memo theo (chart id, fingerprint bộ lọc — gồm data version):
+# rerun mà bộ lọc không đổi thì không dựng lại px/go, không validate lại figure.
+# st.plotly_chart vẫn tự serialize figure mỗi lần vẽ (orjson nếu có cài) và không
+# nhận JSON dựng sẵn, nên thời gian đó chỉ đo được ở lần vẽ (render_ms).
+_WEBGL_ROWS = 5_000        # trace scatter nhiều điểm hơn → Scattergl (WebGL)
+
+
+@st.cache_resource
+def chart_stats() -> dict:
+    """chart id → số đo gần nhất (build / render ms, bytes dữ liệu, số điểm)."""
+    return {}
+
+
+_DATA_ATTRS = ("x", "y", "z", "values", "labels", "text", "customdata")
+
+
+def _fig_nbytes(fig: "go.Figure") -> int:
+    """Ước lượng bytes của figure trong memo: các mảng dữ liệu của trace (tính cả string)."""
+    total = 0
+    for t in fig.data:
+        for attr in _DATA_ATTRS:
+            v = getattr(t, attr, None)
+            if v is not None and not isinstance(v, str):
+                total += int(pd.Series(np.ravel(v)).memory_usage(index=False, deep=True))
+    return total
+
+
+def _n_points(trace) -> int:
+    for attr in ("x", "y", "values", "z"):
+        v = getattr(trace, attr, None)
+        if v is not None:
+            return int(np.size(v))
+    return 0
+
+
+def _webgl(fig: "go.Figure", threshold: int = _WEBGL_ROWS) -> "go.Figure":
+    """Trace scatter có hơn ``threshold`` điểm → Scattergl (vẽ bằng WebGL thay vì SVG)."""
+    import plotly.graph_objects as go
+
+    big = [t.type == "scatter" and _n_points(t) > threshold for t in fig.data]
+    if not any(big):
+        return fig
+    traces = [go.Scattergl(t.to_plotly_json(), skip_invalid=True) if b else t   # bỏ thuộc tính chỉ SVG có
+              for t, b in zip(fig.data, big)]
+    return go.Figure(data=traces, layout=fig.layout)
+
+
+def _build_chart(chart_id: str, build, *args) -> tuple["go.Figure", int]:
+    """(figure, bytes dữ liệu) — ghi số đo vào chart_stats()."""
+    perf.annotate(cache="miss")
+    t0 = time.perf_counter()
+    fig = _webgl(_plotly_bg(build(*args)))
+    nbytes = _fig_nbytes(fig)
+    chart_stats()[chart_id] = {
+        "build_ms":     round((time.perf_counter() - t0) * 1000, 2),
+        "bytes":        nbytes,
+        "points":       sum(_n_points(t) for t in fig.data),
+        "webgl":        any(t.type == "scattergl" for t in fig.data),
+    }
+    return fig, nbytes
+
+
+def _chart(chart_id: str, fp: str, build, *args):
+    """Vẽ ``build(*args)`` — figure được memo theo (chart id, fp), xem CHARTS."""
+    with perf.span(f"chart.build:{chart_id}", cache="hit"):
+        fig, _ = get_memo().get(("chart", chart_id, fp), lambda: _build_chart(chart_id, build, *args),
+                                sizer=lambda v: v[1])
+    with perf.span(f"plotly_chart:{chart_id}"):
+        t0 = time.perf_counter()
+        st.plotly_chart(fig, use_container_width=True, config=_CFG)    # serialize ở đây
+        stats = chart_stats().get(chart_id)
+        if stats is not None:
+            stats["render_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+
+
 # ─── SIDEBAR ──────────────────────────────────────────────────────────────────
-def render_sidebar(df: pd.DataFrame) -> pd.DataFrame:
+def render_sidebar(df: pd.DataFrame, index: DateStoreIndex) -> tuple:
+    """Bộ lọc sidebar → (d0, d1, page) — page None nghĩa là tất cả."""
     with st.sidebar:
         st.markdown(
             '<div style="text-align:center;padding:8px 0">'
@@ -420,7 +392,7 @@ def render_sidebar(df: pd.DataFrame) -> pd.DataFrame:
         )
         st.markdown(
             f'<div class="demo-badge">⚠️ Demo Mode — '
-            f'{st.session_state.get("data_source","...")}'
+            f'{df.attrs.get("data_source", "...")}'
             f'</div>',
             unsafe_allow_html=True,
         )
@@ -428,8 +400,9 @@ def render_sidebar(df: pd.DataFrame) -> pd.DataFrame:
 
         # Date filter
         st.markdown("**📅 Khoảng thời gian**")
-        min_d = df["conversation_date"].min().date()
-        max_d = df["conversation_date"].max().date()
+        lo, hi = index.date_bounds
+        min_d = (lo or pd.Timestamp.today()).date()
+        max_d = (hi or pd.Timestamp.today()).date()
         date_range = st.date_input(
             "Từ — Đến",
             value=(min_d, max_d),
@@ -439,45 +412,101 @@ def render_sidebar(df: pd.DataFrame) -> pd.DataFrame:
 
         # Page filter
         st.markdown("**🏪 Cửa hàng**")
-        pages = ["Tất cả"] + sorted(df["page_name"].dropna().unique().tolist())
+        pages = ["Tất cả"] + index.pages
         sel_page = st.selectbox("Chọn cửa hàng", pages, label_visibility="collapsed")
 
         st.divider()
-        st.caption("💡 **Hướng dẫn**\n\nMở tab **🔍 Khám phá Hội thoại** để xem tính năng drill-down chính.")
+        st.caption("💡 **Hướng dẫn**\n\nMở **🔍 Khám phá Hội thoại** để xem tính năng drill-down chính.")
 
-        # Apply filters
-        mask = pd.Series([True] * len(df), index=df.index)
+        # Apply filters — khoảng ngày tính trọn ngày cuối, khớp với cube theo ngày
+        d0 = d1 = None
         if len(date_range) == 2:
             d0 = pd.Timestamp(date_range[0])
             d1 = pd.Timestamp(date_range[1])
-            mask &= (df["conversation_date"] >= d0) & (df["conversation_date"] <= d1)
-        if sel_page != "Tất cả":
-            mask &= df["page_name"] == sel_page
+        page = None if sel_page == "Tất cả" else sel_page
 
-        filtered = df[mask]
+        flt = (d0, d1, page)
+        with perf.span("sidebar.filter"):
+            n_filtered = index.count(*flt)
         st.markdown(
             f'<div style="text-align:center;color:#667eea;font-size:22px;font-weight:700">'
-            f'{len(filtered):,}</div>'
+            f'{n_filtered:,}</div>'
             f'<div style="text-align:center;color:#888;font-size:11px">conversations trong bộ lọc</div>',
             unsafe_allow_html=True,
         )
-    return filtered
+    return flt
 
 
 # ─── TAB 1: EXECUTIVE OVERVIEW ────────────────────────────────────────────────
-def render_overview(df: pd.DataFrame):
+def _counts_from(cube: pd.DataFrame, dim: str, vn: Optional[dict] = None) -> pd.DataFrame:
+    """Bảng (giá trị, count) giảm dần từ cube — tương đương value_counts() trên rows."""
+    cnt = cb.rollup(cube, [dim])["n"]
+    cnt = cnt[cnt > 0].sort_values(ascending=False)
+    idx = cnt.index.astype(str)
+    if vn is not None:
+        idx = idx.map(lambda x: vn.get(x, x))
+    return pd.DataFrame({"value": idx, "count": cnt.to_numpy().astype(int)})
+
+
+_TREND_MAX_POINTS = 120                                 # trend gửi tối đa chừng này điểm (LTTB)
+_TREND_UNIT = {"D": "ngày", "W": "tuần", "MS": "tháng"}
+
+
+def _overview_aggs(cube: pd.DataFrame) -> dict:
+    """Mọi số liệu của tab Tổng quan từ cube đã lọc (hàm thuần, memo theo bộ lọc)."""
+    tot = cb.totals(cube)
+    n = int(tot["n"])
+    if n == 0:
+        return {"n": 0}
+    sent_n = cb.rollup(cube, ["sentiment_overall"])["n"]
+
+    series, freq = cb.trend(cube)
+    keep = lttb(series.index.to_numpy(), series.to_numpy(), _TREND_MAX_POINTS)
+    trend = series.iloc[keep].rename_axis("conversation_date").reset_index(name="count")
+
+    intent_cnt = _counts_from(cube, "intent_primary", INTENT_VN)
+    intent_cnt.columns = ["intent", "count"]
+
+    stage_order = ["awareness", "consideration", "intent", "evaluation", "purchase", "loyalty"]
+    stage_n = cb.rollup(cube, ["purchase_stage"])["n"]
+    stage_n.index = stage_n.index.astype(str)
+    stage_cnt = stage_n.reindex(stage_order, fill_value=0).astype(int).reset_index()
+    stage_cnt.columns = ["stage", "count"]
+    stage_cnt["label"] = stage_cnt["stage"].map(lambda x: STAGE_VN.get(x, x))
+
+    sent_cnt = _counts_from(cube, "sentiment_overall")
+    sent_cnt.columns = ["sent", "count"]
+
+    return {
+        "n":          n,
+        "conv_rate":  tot["conv_sum"] / tot["conv_n"] * 100 if tot["conv_n"] else 0,
+        "avg_sent":   tot["sent_sum"] / tot["sent_n"] if tot["sent_n"] else 0,
+        "avg_agent":  tot["agent_sum"] / tot["agent_n"] if tot["agent_n"] else np.nan,
+        "pct_pos":    sent_n.get("positive", 0) / n * 100,
+        "trend":      trend,
+        "trend_unit": _TREND_UNIT[freq],
+        "intent_cnt": intent_cnt,
+        "stage_cnt":  stage_cnt,
+        "sent_cnt":   sent_cnt,
+    }
+
+
+def render_overview(cube: pd.DataFrame, fp: str):
+    """Tổng quan — mọi số liệu lấy từ cube đã lọc (xem cube.py), không quét rows."""
     st.markdown("## 📊 Tổng quan")
-    n = len(df)
+    with perf.span("overview.aggs", memo="hit"):
+        agg = _memoized((fp, "overview"), _overview_aggs, cube)
+    n = agg["n"]
     if n == 0:
         st.warning("Không có dữ liệu trong bộ lọc đã chọn.")
         return
 
     # ── KPI Row ──
     c1, c2, c3, c4, c5 = st.columns(5)
-    conv_rate = df["funnel_is_successful"].mean() * 100 if "funnel_is_successful" in df.columns else 0
-    avg_sent  = df["sentiment_score"].mean() if "sentiment_score" in df.columns else 0
-    avg_agent = pd.to_numeric(df.get("agent_overall_score", pd.Series(dtype=float)), errors="coerce").mean()
-    pct_pos   = (df["sentiment_overall"].astype(str) == "positive").mean() * 100 if "sentiment_overall" in df.columns else 0
+    conv_rate = agg["conv_rate"]
+    avg_sent  = agg["avg_sent"]
+    avg_agent = agg["avg_agent"]
+    pct_pos   = agg["pct_pos"]
 
     _kpi(c1, "Tổng hội thoại",    f"{n:,}",           _PRIMARY,  "được AI xử lý tự động")
     _kpi(c2, "Tỷ lệ chuyển đổi",  f"{conv_rate:.1f}%", _SUCCESS,  "funnel thành công")
@@ -496,80 +525,132 @@ def render_overview(df: pd.DataFrame):
 
     with col_l:
         st.markdown("**📈 Lượng hội thoại theo thời gian**")
-        trend = (
-            df.set_index("conversation_date")
-            .resample("W")["conversation_id"]
-            .count()
-            .reset_index(name="count")
-        )
-        fig = px.area(
-            trend, x="conversation_date", y="count",
-            color_discrete_sequence=[_PRIMARY],
-            template=_TEMPLATE,
-            labels={"conversation_date": "", "count": "Số conversations"},
-        )
-        fig.update_traces(fill="tozeroy", fillcolor="rgba(102,126,234,0.2)")
-        st.plotly_chart(_plotly_bg(fig), use_container_width=True, config=_CFG)
+        _chart("overview.trend", fp, _fig_trend, agg["trend"], agg["trend_unit"])
 
     with col_r:
         st.markdown("**🎯 Phân bố Intent (mục đích liên hệ)**")
-        intent_cnt = (
-            df["intent_primary"].map(lambda x: INTENT_VN.get(x, x))
-            .value_counts()
-            .reset_index()
-        )
-        intent_cnt.columns = ["intent", "count"]
-        fig2 = px.bar(
-            intent_cnt, x="count", y="intent", orientation="h",
-            color="count", color_continuous_scale=["#764ba2", _PRIMARY, _INFO],
-            template=_TEMPLATE,
-            labels={"count": "Số conversations", "intent": ""},
-        )
-        fig2.update_layout(coloraxis_showscale=False, yaxis=dict(categoryorder="total ascending"))
-        st.plotly_chart(_plotly_bg(fig2), use_container_width=True, config=_CFG)
+        _chart("overview.intent", fp, _fig_intent, agg["intent_cnt"])
 
     # ── Row 2: Funnel + Sentiment ──
     col_l2, col_r2 = st.columns(2)
 
     with col_l2:
         st.markdown("**🔄 Purchase Funnel**")
-        stage_order = ["awareness", "consideration", "intent", "evaluation", "purchase", "loyalty"]
-        stage_cnt = df["purchase_stage"].value_counts().reindex(stage_order, fill_value=0).reset_index()
-        stage_cnt.columns = ["stage", "count"]
-        stage_cnt["label"] = stage_cnt["stage"].map(lambda x: STAGE_VN.get(x, x))
-        fig3 = go.Figure(go.Funnel(
-            y=stage_cnt["label"],
-            x=stage_cnt["count"],
-            textposition="inside",
-            textinfo="value+percent initial",
-            marker=dict(color=[_PRIMARY, "#5a6fd6", "#4e5fc5", "#4150b4", _SUCCESS, "#00a97a"]),
-        ))
-        fig3.update_layout(template=_TEMPLATE, showlegend=False)
-        st.plotly_chart(_plotly_bg(fig3), use_container_width=True, config=_CFG)
+        _chart("overview.funnel", fp, _fig_funnel, agg["stage_cnt"])
 
     with col_r2:
         st.markdown("**💬 Phân bố Sentiment**")
-        if "sentiment_overall" in df.columns:
-            sent_cnt = df["sentiment_overall"].value_counts().reset_index()
-            sent_cnt.columns = ["sent", "count"]
-            color_map = {"positive": _SUCCESS, "neutral": _WARNING, "negative": _DANGER}
-            fig4 = px.pie(
-                sent_cnt, names="sent", values="count",
-                color="sent", color_discrete_map=color_map,
-                template=_TEMPLATE,
-                hole=0.55,
-            )
-            fig4.update_traces(textposition="outside", textinfo="percent+label")
-            fig4.update_layout(showlegend=False, annotations=[
-                dict(text=f"{pct_pos:.0f}%<br>positive", x=0.5, y=0.5,
-                     font_size=14, showarrow=False, font_color=_SUCCESS)
-            ])
-            st.plotly_chart(_plotly_bg(fig4), use_container_width=True, config=_CFG)
+        if not agg["sent_cnt"].empty:
+            _chart("overview.sentiment", fp, _fig_sentiment, agg["sent_cnt"], pct_pos)
+
+
+def _fig_trend(trend: pd.DataFrame, unit: str) -> "go.Figure":
+    import plotly.express as px
+
+    fig = px.area(
+        trend, x="conversation_date", y="count",
+        color_discrete_sequence=[_PRIMARY],
+        template=_TEMPLATE,
+        labels={"conversation_date": "", "count": f"Số conversations / {unit}"},
+    )
+    fig.update_traces(fill="tozeroy", fillcolor="rgba(102,126,234,0.2)")
+    return fig
+
+
+def _fig_intent(intent_cnt: pd.DataFrame) -> "go.Figure":
+    import plotly.express as px
+
+    fig = px.bar(
+        intent_cnt, x="count", y="intent", orientation="h",
+        color="count", color_continuous_scale=["#764ba2", _PRIMARY, _INFO],
+        template=_TEMPLATE,
+        labels={"count": "Số conversations", "intent": ""},
+    )
+    fig.update_layout(coloraxis_showscale=False, yaxis=dict(categoryorder="total ascending"))
+    return fig
+
+
+def _fig_funnel(stage_cnt: pd.DataFrame) -> "go.Figure":
+    import plotly.graph_objects as go
+
+    fig = go.Figure(go.Funnel(
+        y=stage_cnt["label"],
+        x=stage_cnt["count"],
+        textposition="inside",
+        textinfo="value+percent initial",
+        marker=dict(color=[_PRIMARY, "#5a6fd6", "#4e5fc5", "#4150b4", _SUCCESS, "#00a97a"]),
+    ))
+    fig.update_layout(template=_TEMPLATE, showlegend=False)
+    return fig
+
+
+def _fig_sentiment(sent_cnt: pd.DataFrame, pct_pos: float) -> "go.Figure":
+    import plotly.express as px
+
+    color_map = {"positive": _SUCCESS, "neutral": _WARNING, "negative": _DANGER}
+    fig = px.pie(
+        sent_cnt, names="sent", values="count",
+        color="sent", color_discrete_map=color_map,
+        template=_TEMPLATE,
+        hole=0.55,
+    )
+    fig.update_traces(textposition="outside", textinfo="percent+label")
+    fig.update_layout(showlegend=False, annotations=[
+        dict(text=f"{pct_pos:.0f}%<br>positive", x=0.5, y=0.5,
+             font_size=14, showarrow=False, font_color=_SUCCESS)
+    ])
+    return fig
 
 
 # ─── TAB 2: CONVERSATION EXPLORER (MAIN FEATURE) ──────────────────────────────
-def render_explorer(df: pd.DataFrame):
-    n = len(df)
+_SKIP = {"unknown", "Unknown", "", "none", "None", "nan", "NaN", "True", "False"}
+
+EXPLORER_DIMS = [
+    ("intent_primary",    "Mục đích liên hệ (Intent)",   "🎯", INTENT_VN),
+    ("sentiment_overall", "Cảm xúc khách hàng",          "💬", {}),
+    ("purchase_stage",    "Giai đoạn mua hàng",          "📦", STAGE_VN),
+    ("disc_primary",      "Nhóm tính cách DISC",         "🧠", DISC_VN),
+    ("urgency_level",     "Mức độ khẩn cấp",             "⚡", LEVEL_VN),
+    ("funnel_type",       "Loại kênh (Funnel)",          "🔄", FUNNEL_VN),
+    ("generation_cohort", "Thế hệ khách hàng",           "👥", {}),
+    ("trust_level",       "Mức độ tin tưởng",            "🤝", LEVEL_VN),
+]
+
+
+@st.cache_resource(ttl=3600, max_entries=1)
+@_tracked
+def load_facets(version: str) -> BitmapIndex:
+    """Bitmap index theo EXPLORER_DIMS trên load_data() (xem indexes.py)."""
+    return BitmapIndex(load_data(), [d[0] for d in EXPLORER_DIMS], frozenset(_SKIP))
+
+
+def _segment(df: pd.DataFrame, facets: BitmapIndex, selection: dict,
+             base: np.ndarray, hits: Optional[tuple] = None) -> tuple[np.ndarray, dict]:
+    """(vị trí row của segment, chỉ số KPI chips) — hàm thuần, memo theo bộ lọc + segment.
+
+    Có ``hits`` (kết quả tìm kiếm) thì row được xếp theo điểm BM25 giảm dần.
+    """
+    rows = facets.rows(facets.match(selection, base))
+    if hits is not None:
+        hit_rows, hit_scores = hits
+        rows = rows[np.argsort(-hit_scores[np.searchsorted(hit_rows, rows)], kind="stable")]
+
+    def _col(name):
+        return df[name].take(rows) if name in df.columns else pd.Series(dtype=float)
+
+    stats = {
+        "conv":  _col("funnel_is_successful").mean() * 100 if "funnel_is_successful" in df.columns else 0,
+        "pos":   (_col("sentiment_overall").astype(str) == "positive").mean() * 100,
+        "agent": pd.to_numeric(_col("agent_overall_score"), errors="coerce").mean(),
+    }
+    return rows, stats
+
+
+def render_explorer(df: pd.DataFrame, fp: str, rows):
+    """Explorer nhiều chiều trên ``df`` (toàn bộ dữ liệu), giới hạn ở ``rows`` của bộ lọc sidebar."""
+    facets = load_facets(df.attrs.get("data_version"))
+    base = _memoized((fp, "facet_base"), facets.mask, rows)
+    n_all = facets.count(base)
 
     # ── Hero intro ──
     st.markdown(
@@ -577,76 +658,73 @@ def render_explorer(df: pd.DataFrame):
         border:1px solid rgba(102,126,234,0.3);border-radius:10px;padding:16px 20px;margin-bottom:12px">
         <h3 style="margin:0;color:#c0c0ff">🔍 Khám phá Hội thoại theo Segment</h3>
         <p style="margin:6px 0 0;color:#aaa;font-size:13px">
-        Chọn một <strong>chiều phân tích</strong> → chọn <strong>giá trị</strong>
+        Tìm theo <strong>nội dung chat</strong> và/hoặc chọn <strong>giá trị</strong> ở một hoặc
+        nhiều <strong>chiều phân tích</strong> (số trong ngoặc cập nhật theo các chiều còn lại)
         → xem danh sách conversations → click vào 1 conversation để xem
         <strong>nội dung chat thực + AI Scorecard tự động</strong>.
         </p></div>""",
         unsafe_allow_html=True,
     )
 
-    if n == 0:
+    if n_all == 0:
         st.warning("Không có dữ liệu trong bộ lọc đã chọn.")
         return
 
-    DIMS = [
-        ("intent_primary",    "Mục đích liên hệ (Intent)",   "🎯", INTENT_VN),
-        ("sentiment_overall", "Cảm xúc khách hàng",          "💬", {}),
-        ("purchase_stage",    "Giai đoạn mua hàng",          "📦", STAGE_VN),
-        ("disc_primary",      "Nhóm tính cách DISC",         "🧠", DISC_VN),
-        ("urgency_level",     "Mức độ khẩn cấp",             "⚡", LEVEL_VN),
-        ("funnel_type",       "Loại kênh (Funnel)",          "🔄", FUNNEL_VN),
-        ("generation_cohort", "Thế hệ khách hàng",           "👥", {}),
-        ("trust_level",       "Mức độ tin tưởng",            "🤝", LEVEL_VN),
-    ]
-    valid_dims = [d for d in DIMS if d[0] in df.columns and df[d[0]].notna().any()]
-
-    sel_dim = st.selectbox(
-        "① Phân tích theo chiều",
-        range(len(valid_dims)),
-        format_func=lambda i: f"{valid_dims[i][2]} {valid_dims[i][1]}",
-        key="dim_sel",
+    # ── Tìm kiếm nội dung: thu hẹp base theo kết quả, các facet đếm trên đó ──
+    query = st.text_input(
+        "🔎 Tìm trong nội dung hội thoại",
+        key="conv_query",
+        placeholder="vd. Zeiss, bảo hành, Ray-Ban — không cần gõ dấu",
     )
-    col_key, col_label, col_icon, col_map = valid_dims[sel_dim]
-
-    # Value counts (filtered)
-    _SKIP = {"unknown", "Unknown", "", "none", "None", "nan", "NaN", "True", "False"}
-    vals  = df[col_key].dropna().astype(str)
-    vals  = vals[~vals.isin(_SKIP)].pipe(lambda s: s[s.str.len() < 50])
-    if vals.empty:
-        st.info("Không có dữ liệu hợp lệ cho chiều này.")
-        return
-
-    counts = vals.value_counts()
-    opts   = ["— Chọn để xem chi tiết —"] + [
-        f"{col_map.get(v, v)}  ({c:,})" for v, c in zip(counts.index, counts.values)
-    ]
-    sel_opt = st.selectbox("② Chọn giá trị / phân khúc", opts, key="val_sel")
+    q = " ".join(tokenize(query))
+    hits = None
+    if q:
+        hits = _memoized((df.attrs.get("data_version"), "search", q), _search_hits, q)
+        base = _memoized((fp, "facet_base", q), np.bitwise_and, base, facets.mask(hits[0]))
+        st.caption(f"🔎 {facets.count(base):,} conversations khớp “{query.strip()}” trong bộ lọc")
+
+    valid_dims = [d for d in EXPLORER_DIMS if d[0] in facets.dims]
+
+    # Lựa chọn hiện tại (từ lần tương tác trước) → facet counts cho từng chiều
+    selection = {}
+    for col_key, *_ in valid_dims:
+        vals = [v for v in st.session_state.get(f"facet_{col_key}", []) if v in facets.values(col_key)]
+        if vals:
+            selection[col_key] = tuple(vals)
+    sel_key = tuple(selection.items())
+    counts = _memoized((fp, "facets", sel_key, q), facets.facet_counts, selection, base)
+
+    st.markdown("**① Lọc theo một hoặc nhiều chiều**")
+    cols = st.columns(4)
+    for i, (col_key, col_label, col_icon, col_map) in enumerate(valid_dims):
+        cnt = counts[col_key]
+        cols[i % 4].multiselect(
+            f"{col_icon} {col_label}",
+            facets.values(col_key),
+            format_func=lambda v, m=col_map, c=cnt: f"{m.get(v, v)}  ({c.get(v, 0):,})",
+            key=f"facet_{col_key}",
+            placeholder="Tất cả",
+        )
 
-    if sel_opt == "— Chọn để xem chi tiết —":
+    if not selection and not q:
         st.markdown(
             '<div style="height:120px;display:flex;align-items:center;justify-content:center;'
-            'color:#666;font-size:14px">👆 Chọn một giá trị phía trên để xem conversations</div>',
+            'color:#666;font-size:14px">👆 Tìm theo nội dung hoặc chọn ít nhất một giá trị phía trên '
+            'để xem conversations</div>',
             unsafe_allow_html=True,
         )
         return
 
-    # Reverse-map display label → raw value
-    raw_label = sel_opt.split("  (")[0]
-    raw_val   = raw_label
-    for k, v in col_map.items():
-        if v == raw_label:
-            raw_val = k
-            break
-
-    seg = df[df[col_key].astype(str) == raw_val].copy()
-    seg_n = len(seg)
+    seg_key = (fp, "segment", sel_key, q)
+    seg_rows, seg_stats = _memoized(seg_key, _segment, df, facets, selection, base, hits)
+    seg_n = len(seg_rows)
 
     st.divider()
 
     # ── KPI chips for segment ──
-    seg_conv = seg["funnel_is_successful"].mean() * 100 if "funnel_is_successful" in seg.columns else 0
-    seg_pos  = (seg["sentiment_overall"].astype(str) == "positive").mean() * 100
-    seg_agent= pd.to_numeric(seg.get("agent_overall_score", pd.Series(dtype=float)), errors="coerce").mean()
+    seg_conv  = seg_stats["conv"]
+    seg_pos   = seg_stats["pos"]
+    seg_agent = seg_stats["agent"]
 
     chips = [
         (f"{seg_n:,} conversations", _PRIMARY),
@@ -663,49 +741,177 @@ def render_explorer(df: pd.DataFrame):
         f'{t}</span>'
         for t, c in chips
     )
+    sel_html = " · ".join(
+        ([f'🔎 <strong style="color:#fff">“{query.strip()}”</strong>'] if q else []) + [
+            f'{col_icon} {col_label}: <strong style="color:#fff">'
+            f'{", ".join(col_map.get(v, v) for v in selection[col_key])}</strong>'
+            for col_key, col_label, col_icon, col_map in valid_dims if col_key in selection
+        ]
+    )
     st.markdown(
         f'<div style="display:flex;flex-wrap:wrap;gap:8px;margin:8px 0">'
-        f'<span style="color:#888;font-size:12px;align-self:center">'
-        f'{col_icon} {col_label}: <strong style="color:#fff">{raw_label}</strong></span>'
+        f'<span style="color:#888;font-size:12px;align-self:center">{sel_html}</span>'
         f' &nbsp; {html_chips}</div>',
         unsafe_allow_html=True,
     )
 
+    if seg_n == 0:
+        st.info("Không có conversation nào khớp tất cả các chiều đã chọn.")
+        return
+
     st.divider()
 
     # ── List + Detail ──
+    _conversation_browser(df, seg_rows, seg_key, ranked=bool(q))
+
+
+_PAGE_SIZE = 50
+
+# key → (nhãn, cột, tăng dần) — "relevance" chỉ có khi đang tìm kiếm
+LIST_SORTS = {
+    "relevance":  ("🔎 Liên quan nhất",          None,                     False),
+    "date_desc":  ("📅 Mới nhất",               "conversation_date",      False),
+    "date_asc":   ("📅 Cũ nhất",                "conversation_date",      True),
+    "conv_desc":  ("💰 Xác suất chuyển đổi cao", "conversion_probability", False),
+    "agent_desc": ("⭐ Agent score cao",         "agent_overall_score",    False),
+    "agent_asc":  ("⭐ Agent score thấp",        "agent_overall_score",    True),
+}
+
+
+def _sorted_rows(df: pd.DataFrame, rows: np.ndarray, col: str, ascending: bool) -> np.ndarray:
+    """``rows`` theo thứ tự ``col`` (NaN cuối). df đã sort theo ngày nên sort ngày là sort vị trí.
+
+    ``col`` None: giữ nguyên thứ tự (đã xếp theo độ liên quan).
+    """
+    if col is None or col not in df.columns:
+        return rows
+    if col == "conversation_date":
+        if len(rows) > 1 and (np.diff(rows) < 0).any():
+            rows = np.sort(rows)
+        return rows if ascending else rows[::-1]
+    vals = pd.to_numeric(df[col].take(rows), errors="coerce").to_numpy(dtype=float)
+    return rows[np.argsort(vals if ascending else -vals, kind="stable")]
+
+
+def _conv_labels(page: pd.DataFrame) -> pd.Series:
+    """Nhãn danh sách cho 1 trang, index = conversation_id (vector hoá, không iterrows)."""
+    def _str(col):
+        return page[col].astype(str) if col in page.columns else pd.Series("", index=page.index)
+
+    date   = pd.to_datetime(page.get("conversation_date"), errors="coerce").dt.strftime("%Y-%m-%d").fillna("")
+    intent = _str("intent_primary")
+    intent = intent.map(INTENT_VN).fillna(intent).str[:18]
+    sent   = _str("sentiment_overall").str.lower()
+    dot    = pd.Series(np.select([sent == "positive", sent == "negative"], ["🟢", "🔴"], "🟡"),
+                       index=page.index)
+    msgs   = pd.to_numeric(page.get("message_count"), errors="coerce").astype("Int64").astype(str) \
+               .replace("<NA>", "?")
+    labels = dot + " " + date + "  ·  " + intent + "  ·  " + msgs + " tin"
+    return pd.Series(labels.to_numpy(), index=page["conversation_id"].astype(str).to_numpy())
+
+
+def _reset_page():
+    st.session_state["conv_page"] = 1
+
+
+@st.fragment
+def _conversation_browser(df: pd.DataFrame, seg_rows: np.ndarray, seg_key: tuple, ranked: bool = False):
+    """List (phân trang, sắp xếp) + detail. Là fragment: đổi trang / conversation chỉ
+    chạy lại hàm này, không rerun cả app. Chi phí mỗi trang không phụ thuộc cỡ segment."""
+    seg_n = len(seg_rows)
+    n_pages = max(1, -(-seg_n // _PAGE_SIZE))
+    if st.session_state.get("conv_page", 1) > n_pages:
+        st.session_state["conv_page"] = 1
+
     list_col, detail_col = st.columns([2, 3], gap="large")
 
     with list_col:
-        st.markdown(f"**Chọn conversation ({min(seg_n, 120):,} / {seg_n:,})**")
-        sub = seg.head(120)
-        radio_opts = []
-        for _, row in sub.iterrows():
-            date = str(row.get("conversation_date", ""))[:10]
-            intent_raw = str(row.get("intent_primary", ""))
-            intent_lbl = INTENT_VN.get(intent_raw, intent_raw)
-            s = str(row.get("sentiment_overall", "")).lower()
-            dot = "🟢" if s == "positive" else ("🔴" if s == "negative" else "🟡")
-            msgs = row.get("message_count", "?")
-            radio_opts.append(f"{dot} {date}  ·  {intent_lbl[:18]}  ·  {msgs} tin")
-
+        c_sort, c_page = st.columns([3, 2])
+        sorts = [k for k in LIST_SORTS if ranked or LIST_SORTS[k][1] is not None]
+        sort = c_sort.selectbox("Sắp xếp", sorts, format_func=lambda k: LIST_SORTS[k][0],
+                                key="conv_sort_q" if ranked else "conv_sort", on_change=_reset_page)
+        page = c_page.number_input(f"Trang / {n_pages:,}", min_value=1, max_value=n_pages,
+                                   step=1, key="conv_page")
+
+        _, col, ascending = LIST_SORTS[sort]
+        order = _memoized(seg_key + ("sort", sort), _sorted_rows, df, seg_rows, col, ascending)
+        lo = (page - 1) * _PAGE_SIZE
+        sub = df.take(order[lo:lo + _PAGE_SIZE])
+        labels = _conv_labels(sub)
+
+        st.markdown(f"**Chọn conversation ({lo + 1:,}–{lo + len(sub):,} / {seg_n:,})**")
         chosen = st.radio(
             "Conversation",
-            radio_opts,
+            labels.index.tolist(),
             index=0,
+            format_func=labels.get,
             key="conv_radio",
             label_visibility="collapsed",
         )
-        sel_idx = radio_opts.index(chosen)
 
     with detail_col:
-        row = sub.iloc[sel_idx]
+        pos = labels.index.get_loc(chosen)
+        row = sub.iloc[pos if isinstance(pos, int) else np.flatnonzero(pos)[0]]
         _render_conversation_detail(row)
 
 
 def _render_conversation_detail(row: pd.Series):
-    """Detail view: metadata ribbon → chat | AI scorecard."""
-    # ── Badge ribbon ──
+    """Detail view: metadata ribbon → chat | AI scorecard. HTML lấy từ memo, không dựng lại."""
+    badges_html, score_html = _detail_html(row)
+    st.markdown(
+        f'<div style="display:flex;flex-wrap:wrap;gap:5px;margin-bottom:8px">'
+        f'{badges_html}</div>',
+        unsafe_allow_html=True,
+    )
+    st.markdown("<hr style='margin:6px 0;border-color:rgba(255,255,255,0.1)'>",
+                unsafe_allow_html=True)
+
+    chat_c, score_c = st.columns([3, 2], gap="medium")
+
+    with chat_c:
+        st.markdown("**💬 Nội dung hội thoại**")
+        bubbles_html = _bubbles_for(row.get("conversation_id"))
+        if bubbles_html:
+            st.markdown(bubbles_html, unsafe_allow_html=True)
+        else:
+            st.info("Không có nội dung hội thoại.")
+
+    with score_c:
+        st.markdown("**🤖 AI Scorecard**")
+        if score_html:
+            st.markdown(score_html, unsafe_allow_html=True)
+
+    _render_similar(row)
+
+
+@st.cache_resource
+def get_html_memo() -> Memo:
+    """Memo LRU riêng cho HTML chi tiết (CHAT_HTML_MEMO_MB) để lướt conversation không đẩy aggregate ra."""
+    return Memo.from_env("CHAT_HTML_MEMO_MB", 32, budget=memory.Budget.from_env())
+
+
+def _detail_html(row: pd.Series) -> tuple[str, str]:
+    """(badge ribbon, scorecard) theo (data version, conversation_id)."""
+    key = ("detail", _data_version(), str(row.get("conversation_id")))
+    return get_html_memo().get(key, lambda: (_badges_html(row), _scorecard_html(row)))
+
+
+def _bubbles_for(conversation_id) -> str:
+    """HTML bong bóng chat theo blob id — các conversation cùng nội dung dùng chung 1 entry."""
+    version = _data_version()
+    store = load_text_store(version)
+    blob = int(store.blob_ids([conversation_id])[0])
+    if blob < 0:
+        return ""
+
+    def _build():
+        text = store.text(blob)
+        return _bubbles_html(text) if text and text not in ("nan", "None") else ""
+
+    return get_html_memo().get(("bubbles", version, blob), _build)
+
+
+def _badges_html(row: pd.Series) -> str:
     badges_html = ""
     date = str(row.get("conversation_date", ""))[:10]
     if date and date != "nan":
@@ -730,31 +936,58 @@ def _render_conversation_detail(row: pd.Series):
     funnel = str(row.get("funnel_type", ""))
     if funnel and funnel not in ("nan", "unknown"):
         badges_html += _badge("🔄", FUNNEL_VN.get(funnel, funnel), "#764ba2")
+    return badges_html
 
-    st.markdown(
-        f'<div style="display:flex;flex-wrap:wrap;gap:5px;margin-bottom:8px">'
-        f'{badges_html}</div>',
-        unsafe_allow_html=True,
-    )
-    st.markdown("<hr style='margin:6px 0;border-color:rgba(255,255,255,0.1)'>",
-                unsafe_allow_html=True)
 
-    chat_c, score_c = st.columns([3, 2], gap="medium")
+_N_SIMILAR = 5
 
-    with chat_c:
-        st.markdown("**💬 Nội dung hội thoại**")
-        snippet = str(row.get("conversation_snippet", ""))
-        if snippet and snippet not in ("nan", "", "None"):
-            _render_bubbles(snippet)
-        else:
-            st.info("Không có nội dung hội thoại.")
 
-    with score_c:
-        st.markdown("**🤖 AI Scorecard**")
-        _render_scorecard(row)
+def _similar_rows(conversation_id, n: int = _N_SIMILAR) -> tuple[np.ndarray, np.ndarray]:
+    """(row của load_data(), độ giống) của ``n`` conversation có nội dung gần nhất."""
+    version = _data_version()
+    blob = int(load_text_store(version).blob_ids([conversation_id])[0])
+    blobs, sims = load_similar(version).query(blob, k=n + 1)
+    order, offsets = load_blob_rows(version)
+    rows, scores = [], []
+    for b, s in zip(blobs.tolist(), sims.tolist()):
+        r = order[offsets[b]:offsets[b + 1]][:n + 1]        # blob dùng chung: chỉ cần vài row
+        rows.append(r)
+        scores.append(np.full(len(r), s))
+        if sum(map(len, rows)) > n:
+            break
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    return np.concatenate(rows), np.concatenate(scores)
 
 
-def _render_bubbles(text: str):
+def _render_similar(row: pd.Series):
+    """Panel "hội thoại tương tự" — tra LSH trên vector TF-IDF (similar.py)."""
+    cid = row.get("conversation_id")
+    if cid is None:
+        return
+    df = load_data()
+    rows, sims = _similar_rows(cid)
+    sub = df.take(rows)
+    keep = (sub["conversation_id"].astype(str) != str(cid)).to_numpy()
+    sub, sims = sub[keep].head(_N_SIMILAR), np.minimum(sims[keep][:_N_SIMILAR], 1.0)
+    with st.expander(f"🧬 Hội thoại tương tự ({len(sub)})", expanded=False):
+        if sub.empty:
+            st.caption("Không tìm thấy hội thoại có nội dung tương tự.")
+            return
+        labels = _conv_labels(sub).to_numpy()
+        stores = sub["page_name"].astype(str).to_numpy() if "page_name" in sub.columns else [""] * len(sub)
+        st.markdown(
+            "".join(
+                f'<div style="font-size:12px;color:#ccc;padding:3px 0">{lbl}'
+                f' &nbsp;<span style="color:#888">🏪 {store}</span>'
+                f' &nbsp;<strong style="color:{_SUCCESS if s >= 0.8 else _WARNING}">{s * 100:.0f}% giống</strong></div>'
+                for lbl, store, s in zip(labels, stores, sims)
+            ),
+            unsafe_allow_html=True,
+        )
+
+
+def _bubbles_html(text: str) -> str:
     lines   = [l.strip() for l in text.strip().split("\n") if l.strip()]
     bubbles = []
     for line in lines:
@@ -778,24 +1011,22 @@ def _render_bubbles(text: str):
                 f'<div style="font-size:12px;color:#ddd">{msg}</div>'
                 f'</div></div>'
             )
-    st.markdown(
+    return (
         '<div style="max-height:380px;overflow-y:auto;padding:8px;'
         'border:1px solid rgba(255,255,255,0.07);border-radius:8px">'
-        + "".join(bubbles) + "</div>",
-        unsafe_allow_html=True,
+        + "".join(bubbles) + "</div>"
     )
 
 
-def _render_scorecard(row: pd.Series):
+def _scorecard_html(row: pd.Series) -> str:
     def _blk(title, rows_html):
         if not rows_html:
-            return
-        st.markdown(
+            return ""
+        return (
             f'<div class="score-block">'
             f'<div class="score-title">{title}</div>'
             f'<table style="width:100%;border-collapse:collapse">{rows_html}</table>'
-            f'</div>',
-            unsafe_allow_html=True,
+            f'</div>'
         )
 
     def _row(label, val, color="#c0c0ff"):
@@ -815,7 +1046,7 @@ def _render_scorecard(row: pd.Series):
         _row("Funnel",   FUNNEL_VN.get(funnel, funnel)) +
         _row("Urgency",  LEVEL_VN.get(urg, urg), URG_COLOR.get(urg, "#888"))
     )
-    _blk("🎯 Phân loại", blk1)
+    html = _blk("🎯 Phân loại", blk1)
 
     disc    = str(row.get("disc_primary", "")).upper()
     sent    = str(row.get("sentiment_overall", "")).lower()
@@ -829,7 +1060,7 @@ def _render_scorecard(row: pd.Series):
         _row("Giá nhạy",  LEVEL_VN.get(price, price)) +
         (_row("Đối thủ",  comp, _WARNING) if comp not in ("nan", "None", "") else "")
     )
-    _blk("🧠 Hồ sơ KH", blk2)
+    html += _blk("🧠 Hồ sơ KH", blk2)
 
     conv_ok = str(row.get("funnel_is_successful", "")).lower() in ("1", "1.0", "true")
     prob    = row.get("conversion_probability")
@@ -850,7 +1081,7 @@ def _render_scorecard(row: pd.Series):
         pass
     if churn not in ("nan", "None", ""):
         blk3 += _row("Lý do bỏ", churn, _WARNING)
-    _blk("💰 Chuyển đổi", blk3)
+    html += _blk("💰 Chuyển đổi", blk3)
 
     agent_sc = row.get("agent_overall_score")
     emp_sc   = row.get("empathy_score")
@@ -858,20 +1089,64 @@ def _render_scorecard(row: pd.Series):
     try:
         a, e, c = float(agent_sc), float(emp_sc), float(close_sc)
         rows_html = _score_row("Tổng",     a) + _score_row("Đồng cảm", e) + _score_row("Chốt sale", c)
-        st.markdown(
+        html += (
             f'<div class="score-block"><div class="score-title">👤 Agent</div>'
-            f'<table style="width:100%;border-collapse:collapse">{rows_html}</table></div>',
-            unsafe_allow_html=True,
+            f'<table style="width:100%;border-collapse:collapse">{rows_html}</table></div>'
         )
     except Exception:
         pass
+    return html
 
 
 # ─── TAB 3: CUSTOMER INTELLIGENCE ────────────────────────────────────────────
-def render_intelligence(df: pd.DataFrame):
-    st.markdown("## 🧠 Customer Intelligence")
-    n = len(df)
+def _conv_by(cube: pd.DataFrame, dim: str) -> pd.DataFrame:
+    """Tỷ lệ chuyển đổi theo ``dim`` — tương đương groupby(dim)[funnel].agg(["mean", "count"])."""
+    agg = cb.rollup(cube, [dim])
+    agg = agg[agg["conv_n"] > 0]
+    return pd.DataFrame({
+        dim:     agg.index.astype(str),
+        "mean":  (agg["conv_sum"] / agg["conv_n"]).to_numpy(),
+        "count": agg["conv_n"].to_numpy().astype(int),
+    })
+
+
+def _intelligence_aggs(cube: pd.DataFrame) -> dict:
+    """Mọi bảng của tab Customer Intelligence từ cube đã lọc (hàm thuần, memo theo bộ lọc)."""
+    n = int(cb.totals(cube)["n"])
     if n == 0:
+        return {"n": 0}
+
+    disc_cnt = _counts_from(cube, "disc_primary")
+    disc_cnt.columns = ["disc", "count"]
+    disc_cnt["label"] = disc_cnt["disc"].map(lambda x: DISC_VN.get(x.upper(), x))
+
+    piv = _conv_by(cube, "price_sensitivity")[["price_sensitivity", "mean"]]
+    piv.columns = ["price_sens", "conv_rate"]
+    piv["label"] = piv["price_sens"].map(lambda x: LEVEL_VN.get(x, x))
+    piv["conv_pct"] = (piv["conv_rate"] * 100).round(1)
+
+    gen_cnt = _counts_from(cube, "generation_cohort")
+    gen_cnt.columns = ["gen", "count"]
+
+    tpiv = _conv_by(cube, "trust_level")
+    tpiv["conv_pct"] = (tpiv["mean"] * 100).round(1)
+    tpiv["trust_lbl"] = tpiv["trust_level"].map(lambda x: LEVEL_VN.get(x, x))
+
+    pair = cb.rollup(cube, ["intent_primary", "sentiment_overall"])["n"]
+    matrix = pair[pair > 0].astype(int).unstack("sentiment_overall", fill_value=0)
+    matrix.index = matrix.index.astype(str).map(lambda x: INTENT_VN.get(x, x))
+    matrix.columns = matrix.columns.astype(str)
+
+    return {"n": n, "disc_cnt": disc_cnt, "price": piv, "gen_cnt": gen_cnt,
+            "trust": tpiv, "matrix": matrix}
+
+
+def render_intelligence(cube: pd.DataFrame, fp: str):
+    """Customer Intelligence — trả lời từ cube đã lọc (xem cube.py)."""
+    st.markdown("## 🧠 Customer Intelligence")
+    with perf.span("intelligence.aggs", memo="hit"):
+        agg = _memoized((fp, "intelligence"), _intelligence_aggs, cube)
+    if agg["n"] == 0:
         st.warning("Không có dữ liệu.")
         return
 
@@ -879,72 +1154,87 @@ def render_intelligence(df: pd.DataFrame):
 
     with col_l:
         st.markdown("**🎭 Phân bố DISC**")
-        disc_cnt = df["disc_primary"].value_counts().reset_index()
-        disc_cnt.columns = ["disc", "count"]
-        disc_cnt["label"] = disc_cnt["disc"].map(lambda x: DISC_VN.get(x.upper(), x))
-        fig = px.bar(
-            disc_cnt, x="disc", y="count",
-            color="disc",
-            color_discrete_map={"D": _DANGER, "I": _WARNING, "S": _SUCCESS, "C": _INFO},
-            template=_TEMPLATE,
-            text="count",
-            labels={"disc": "DISC Type", "count": ""},
-        )
-        fig.update_traces(textposition="outside")
-        st.plotly_chart(_plotly_bg(fig), use_container_width=True, config=_CFG)
+        _chart("intelligence.disc", fp, _fig_disc, agg["disc_cnt"])
 
         st.markdown("**💰 Price Sensitivity vs Conversion**")
-        piv = df.groupby("price_sensitivity")["funnel_is_successful"].mean().reset_index()
-        piv.columns = ["price_sens", "conv_rate"]
-        piv["label"] = piv["price_sens"].map(lambda x: LEVEL_VN.get(x, x))
-        piv["conv_pct"] = (piv["conv_rate"] * 100).round(1)
-        fig3 = px.bar(
-            piv, x="label", y="conv_pct",
-            color="conv_pct",
-            color_continuous_scale=[_DANGER, _WARNING, _SUCCESS],
-            template=_TEMPLATE,
-            text="conv_pct",
-            labels={"label": "Mức giá nhạy", "conv_pct": "Conversion %"},
-        )
-        fig3.update_traces(texttemplate="%{text:.1f}%", textposition="outside")
-        fig3.update_layout(coloraxis_showscale=False)
-        st.plotly_chart(_plotly_bg(fig3), use_container_width=True, config=_CFG)
+        _chart("intelligence.price", fp, _fig_price, agg["price"])
 
     with col_r:
         st.markdown("**👥 Phân bố thế hệ khách hàng**")
-        gen_cnt = df["generation_cohort"].value_counts().reset_index()
-        gen_cnt.columns = ["gen", "count"]
-        fig2 = px.pie(
-            gen_cnt, names="gen", values="count",
-            color_discrete_sequence=[_PRIMARY, _INFO, _SUCCESS, _WARNING],
-            template=_TEMPLATE, hole=0.45,
-        )
-        fig2.update_traces(textposition="outside", textinfo="percent+label")
-        st.plotly_chart(_plotly_bg(fig2), use_container_width=True, config=_CFG)
+        _chart("intelligence.generation", fp, _fig_generation, agg["gen_cnt"])
 
         st.markdown("**🤝 Trust Level vs Conversion Rate**")
-        tpiv = df.groupby("trust_level")["funnel_is_successful"].agg(["mean", "count"]).reset_index()
-        tpiv["conv_pct"] = (tpiv["mean"] * 100).round(1)
-        tpiv["trust_lbl"] = tpiv["trust_level"].map(lambda x: LEVEL_VN.get(x, x))
-        fig4 = px.scatter(
-            tpiv, x="trust_lbl", y="conv_pct", size="count",
-            color="conv_pct",
-            color_continuous_scale=[_DANGER, _WARNING, _SUCCESS],
-            template=_TEMPLATE,
-            text="conv_pct",
-            labels={"trust_lbl": "Trust Level", "conv_pct": "Conversion %", "count": "Số conv."},
-        )
-        fig4.update_traces(texttemplate="%{text:.0f}%", textposition="top center")
-        fig4.update_layout(coloraxis_showscale=False)
-        st.plotly_chart(_plotly_bg(fig4), use_container_width=True, config=_CFG)
+        _chart("intelligence.trust", fp, _fig_trust, agg["trust"])
 
     # ── Sentiment by intent heatmap ──
     st.markdown("**🔥 Sentiment × Intent Matrix**")
-    matrix = pd.crosstab(
-        df["intent_primary"].map(lambda x: INTENT_VN.get(x, x)),
-        df["sentiment_overall"],
+    _chart("intelligence.matrix", fp, _fig_matrix, agg["matrix"])
+
+
+def _fig_disc(disc_cnt: pd.DataFrame) -> "go.Figure":
+    import plotly.express as px
+
+    fig = px.bar(
+        disc_cnt, x="disc", y="count",
+        color="disc",
+        color_discrete_map={"D": _DANGER, "I": _WARNING, "S": _SUCCESS, "C": _INFO},
+        template=_TEMPLATE,
+        text="count",
+        labels={"disc": "DISC Type", "count": ""},
     )
-    fig5 = px.imshow(
+    fig.update_traces(textposition="outside")
+    return fig
+
+
+def _fig_price(price: pd.DataFrame) -> "go.Figure":
+    import plotly.express as px
+
+    fig = px.bar(
+        price, x="label", y="conv_pct",
+        color="conv_pct",
+        color_continuous_scale=[_DANGER, _WARNING, _SUCCESS],
+        template=_TEMPLATE,
+        text="conv_pct",
+        labels={"label": "Mức giá nhạy", "conv_pct": "Conversion %"},
+    )
+    fig.update_traces(texttemplate="%{text:.1f}%", textposition="outside")
+    fig.update_layout(coloraxis_showscale=False)
+    return fig
+
+
+def _fig_generation(gen_cnt: pd.DataFrame) -> "go.Figure":
+    import plotly.express as px
+
+    fig = px.pie(
+        gen_cnt, names="gen", values="count",
+        color_discrete_sequence=[_PRIMARY, _INFO, _SUCCESS, _WARNING],
+        template=_TEMPLATE, hole=0.45,
+    )
+    fig.update_traces(textposition="outside", textinfo="percent+label")
+    return fig
+
+
+def _fig_trust(trust: pd.DataFrame) -> "go.Figure":
+    import plotly.express as px
+
+    fig = px.scatter(
+        trust, x="trust_lbl", y="conv_pct", size="count",
+        color="conv_pct",
+        color_continuous_scale=[_DANGER, _WARNING, _SUCCESS],
+        template=_TEMPLATE,
+        text="conv_pct",
+        render_mode="svg",                  # WebGL do _webgl quyết định theo _WEBGL_ROWS
+        labels={"trust_lbl": "Trust Level", "conv_pct": "Conversion %", "count": "Số conv."},
+    )
+    fig.update_traces(texttemplate="%{text:.0f}%", textposition="top center")
+    fig.update_layout(coloraxis_showscale=False)
+    return fig
+
+
+def _fig_matrix(matrix: pd.DataFrame) -> "go.Figure":
+    import plotly.express as px
+
+    return px.imshow(
         matrix,
         color_continuous_scale=["#1a0a20", _WARNING, _SUCCESS],
         template=_TEMPLATE,
@@ -952,7 +1242,6 @@ def render_intelligence(df: pd.DataFrame):
         text_auto=True,
         labels={"x": "Sentiment", "y": "Intent", "color": "Số hội thoại"},
     )
-    st.plotly_chart(_plotly_bg(fig5), use_container_width=True, config=_CFG)
 
 
 # ─── TAB 4: SYSTEM OVERVIEW ───────────────────────────────────────────────────
@@ -1061,11 +1350,107 @@ border-radius:10px;padding:20px;margin-bottom:16px">
             unsafe_allow_html=True,
         )
 
+    stats = chart_stats()
+    if stats:
+        with st.expander("📦 Biểu đồ (lần dựng / vẽ gần nhất)"):
+            st.dataframe(pd.DataFrame.from_dict(stats, orient="index").sort_index(),
+                         use_container_width=True)
+
 
 # ─── MAIN ─────────────────────────────────────────────────────────────────────
+VIEWS = {
+    "overview":     "📊 Tổng quan",
+    "explorer":     "🔍 Khám phá Hội thoại",
+    "intelligence": "🧠 Customer Intelligence",
+    "system":       "💡 Về Hệ thống",
+}
+
+
+def _select_view() -> str:
+    """Thanh chọn view, đồng bộ với ``?view=`` để deep-link được."""
+    keys = list(VIEWS)
+    current = st.query_params.get("view", keys[0])
+    view = st.radio(
+        "View",
+        keys,
+        index=keys.index(current) if current in VIEWS else 0,
+        format_func=VIEWS.get,
+        horizontal=True,
+        key="view",
+        label_visibility="collapsed",
+    )
+    if st.query_params.get("view") != view:
+        st.query_params["view"] = view
+    return view
+
+
+def _session_id() -> Optional[str]:
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else None
+
+
+def _debug_flags() -> set[str]:
+    """Các panel debug bật bằng ``?debug=perf,mem``."""
+    return {f.strip() for f in st.query_params.get("debug", "").split(",") if f.strip()}
+
+
+def _mb(n: Optional[int]) -> str:
+    return f"{n / 2**20:,.1f} MB" if n is not None else "?"
+
+
+def _render_memory_panel(df: pd.DataFrame):
+    """Panel debug ở sidebar: bộ nhớ theo cột của load_data, resource, entry memo, RSS."""
+    used, limit = memory.cgroup_memory()
+    memos = {"memo": get_memo(), "memo html": get_html_memo()}
+    with st.sidebar.expander(f"🧮 Bộ nhớ — RSS {_mb(memory.rss_bytes())}", expanded=True):
+        st.caption(f"Container: {_mb(used)} / {_mb(limit)} · "
+                   f"Ngân sách ({memory.BUDGET_VAR}): {_mb(get_memo().budget.limit)}")
+
+        st.markdown("**load_data — theo cột**")
+        cols = memory.frame_report(df)
+        cols["MB"] = (cols.pop("bytes") / 2**20).round(2)
+        st.dataframe(cols, hide_index=True, use_container_width=True)
+
+        st.markdown("**st.cache_resource**")
+        res = memory.resources_report()
+        res["MB"] = (res.pop("bytes") / 2**20).round(2)
+        st.dataframe(res, hide_index=True, use_container_width=True)
+
+        for name, m in memos.items():
+            st.markdown(f"**{name}** — {len(m)} entry, {_mb(m.nbytes)} / {_mb(m.max_bytes)} "
+                        f"(sàn {_mb(m.min_bytes)}) · "
+                        f"hit {m.hits} · miss {m.misses} · bỏ {m.evictions} · không lưu {m.refused}")
+            entries = sorted(m.entries(), key=lambda e: -e[1])[:50]
+            st.dataframe(pd.DataFrame({"key": [repr(k)[:80] for k, _ in entries],
+                                       "KB":  [round(b / 1024, 1) for _, b in entries]}),
+                         hide_index=True, use_container_width=True)
+
+
+def _render_perf_panel(rec: Optional[perf.Recorder]):
+    """Panel debug ở sidebar: thời gian từng phase của rerun vừa rồi (xem perf.py)."""
+    if rec is None:
+        return
+    hidden = ("name", "depth", "start_ms", "ms")
+    table = pd.DataFrame({
+        "phase": ["· " * s["depth"] + s["name"] for s in rec.spans],
+        "ms":    [s.get("ms") for s in rec.spans],
+        "info":  [", ".join(f"{k}={v}" for k, v in s.items() if k not in hidden) for s in rec.spans],
+    })
+    with st.sidebar.expander(f"⏱️ Perf — {rec.total_ms:,.0f} ms / rerun", expanded=True):
+        st.dataframe(table, hide_index=True, use_container_width=True)
+        st.caption(f"Log JSONL: `{os.environ.get(perf.LOG_VAR, perf.LOG_FILE)}`")
+
+
 def main():
-    df       = load_data()
-    filtered = render_sidebar(df)
+    debug = _debug_flags()
+    rec = perf.start(perf.env_enabled() or "perf" in debug, session=_session_id())
+    with perf.span("load_data", cache="hit"):
+        df = load_data()
+    version = df.attrs.get("data_version")
+    with perf.span("render_sidebar"):
+        flt = render_sidebar(df, load_index(version))
+    fp = _filter_fp(df, flt)
 
     # Hero header
     st.markdown(
@@ -1075,17 +1460,26 @@ def main():
         unsafe_allow_html=True,
     )
 
-    tab1, tab2, tab3, tab4 = st.tabs([
-        "📊 Tổng quan",
-        "🔍 Khám phá Hội thoại",
-        "🧠 Customer Intelligence",
-        "💡 Về Hệ thống",
-    ])
+    # Chỉ view đang chọn được render — các view khác không tính, không gửi chart
+    view = _select_view()
+    if rec is not None:
+        rec.meta["view"] = view
+    if view in ("overview", "intelligence"):
+        with perf.span("cube.slice", memo="hit"):
+            cube = _memoized((fp, "cube"), cb.slice_cube, load_cube(version), *flt)
+        render = render_overview if view == "overview" else render_intelligence
+        with perf.span(render.__name__):
+            render(cube, fp)
+    elif view == "explorer":
+        with perf.span("render_explorer"):
+            render_explorer(df, fp, load_index(version).positions(*flt))
+    else:
+        with perf.span("render_system"):
+            render_system()
 
-    with tab1: render_overview(filtered)
-    with tab2: render_explorer(filtered)
-    with tab3: render_intelligence(filtered)
-    with tab4: render_system()
+    _render_perf_panel(perf.finish())
+    if "mem" in debug:
+        _render_memory_panel(df)
 
 
 if __name__ == "__main__":
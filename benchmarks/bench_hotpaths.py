@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+bench_hotpaths.py — Thời gian các hot path của dashboard và export theo cỡ dữ liệu
+==================================================================================
+Sinh dữ liệu tổng hợp (data_core.generate_synthetic_data) ở từng cỡ, rồi đo đúng
+các hàm mà app.py / generate_data.py dùng — không qua Streamlit, không cần browser:
+
+    export.clean / export.write / export.cube   generate_data._clean, _write_output, cube.build_cube
+    load_data / load_index                      read_export + sort theo ngày, DateStoreIndex
+    sidebar.filter                              DateStoreIndex.count (30 ngày cuối, 1 cửa hàng)
+    overview.aggs                               cube.slice_cube + app._overview_aggs
+    intelligence.aggs                           app._intelligence_aggs
+    explorer.facets / .segment / .list          BitmapIndex, app._segment, sort + nhãn 1 trang
+
+Mỗi phép đo lấy thời gian nhỏ nhất sau ``--repeat`` lần. Kết quả ghi ra JSON;
+có ``--baseline`` thì so sánh và exit 1 nếu có phép đo chậm hơn ``--tolerance``.
+
+Cách dùng:
+    python benchmarks/bench_hotpaths.py                              # 10k, 1m, 10m
+    python benchmarks/bench_hotpaths.py --scales 10k,1m --out now.json
+    python benchmarks/bench_hotpaths.py --scales 10k,1m --baseline base.json
+    python benchmarks/bench_hotpaths.py --out base.json               # lưu làm baseline
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import numpy as np   # noqa: E402
+import pandas as pd  # noqa: E402
+
+import app                                                # noqa: E402
+import cube as cb                                         # noqa: E402
+from data_core import generate_synthetic_data, read_export  # noqa: E402
+from generate_data import _clean, _write_output           # noqa: E402
+from indexes import BitmapIndex, DateStoreIndex           # noqa: E402
+
+_UNITS = {"k": 1_000, "m": 1_000_000}
+_SELECTION = {"intent_primary": ["hoi_gia", "mua_hang"], "sentiment_overall": ["negative"]}
+
+
+def _parse_scale(s: str) -> int:
+    s = s.strip().lower()
+    return int(float(s[:-1]) * _UNITS[s[-1]]) if s[-1] in _UNITS else int(s)
+
+
+def _time(fn, repeat: int):
+    """(giá trị của lần chạy cuối, thời gian nhỏ nhất tính bằng giây)."""
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            t0 = time.perf_counter()
+            out = fn()
+            best = min(best, time.perf_counter() - t0)
+    return out, best
+
+
+def bench_scale(n: int, repeat: int, tmp: Path) -> dict:
+    """Thời gian (giây) của từng hot path trên ``n`` rows tổng hợp."""
+    t = {}
+    raw, t["generate"] = _time(lambda: generate_synthetic_data(n), 1)
+
+    # ── Export (generate_data) ──
+    clean, t["export.clean"] = _time(lambda: _clean(raw), repeat)
+    path = tmp / "conversations.parquet"
+    _, t["export.write"] = _time(lambda: _write_output(clean, path), repeat)
+    cube, t["export.cube"] = _time(lambda: cb.build_cube(clean), repeat)
+    del raw, clean
+
+    # ── Load (như data_core.read_data) ──
+    def _load():
+        df = read_export(path)
+        if not df["conversation_date"].is_monotonic_increasing:
+            df = df.sort_values("conversation_date", kind="stable", ignore_index=True)
+        return df
+    df, t["load_data"] = _time(_load, repeat)
+    index, t["load_index"] = _time(lambda: DateStoreIndex(df), repeat)
+
+    # ── Sidebar: 30 ngày cuối của 1 cửa hàng ──
+    _, d1 = index.date_bounds
+    flt = (d1 - pd.Timedelta(days=29), d1, index.pages[0])
+    _, t["sidebar.filter"] = _time(lambda: index.count(*flt), repeat)
+
+    # ── Overview / Intelligence (từ cube, cả khoảng ngày) ──
+    _, t["overview.aggs"] = _time(lambda: app._overview_aggs(cb.slice_cube(cube)), repeat)
+    _, t["intelligence.aggs"] = _time(lambda: app._intelligence_aggs(cb.slice_cube(cube)), repeat)
+
+    # ── Explorer ──
+    facets, t["explorer.facets"] = _time(
+        lambda: BitmapIndex(df, [d[0] for d in app.EXPLORER_DIMS], frozenset(app._SKIP)), 1)
+    base = facets.mask(index.positions())
+    (rows, _), t["explorer.segment"] = _time(lambda: app._segment(df, facets, _SELECTION, base), repeat)
+
+    def _list():
+        ordered = app._sorted_rows(df, rows, "conversion_probability", False)
+        return app._conv_labels(df.take(ordered[:app._PAGE_SIZE]))
+    _, t["explorer.list"] = _time(_list, repeat)
+    return {k: round(v, 6) for k, v in t.items()}
+
+
+def compare(current: dict, baseline: dict, tolerance: float, min_abs: float) -> list:
+    """In bảng so sánh; trả về các (scale, phép đo, base, now) chậm hơn ngưỡng."""
+    regressions = []
+    print(f"\n{'scale':<7}{'hot path':<20}{'base s':>10}{'now s':>10}{'ratio':>8}")
+    for scale, res in current["results"].items():
+        base = baseline.get("results", {}).get(scale, {}).get("timings", {})
+        for name, now in res["timings"].items():
+            if name not in base:
+                continue
+            ratio = now / base[name] if base[name] else float("inf")
+            slow = ratio > 1 + tolerance and now - base[name] > min_abs
+            flag = "  ⚠ chậm hơn" if slow else ""
+            print(f"{scale:<7}{name:<20}{base[name]:>10.4f}{now:>10.4f}{ratio:>7.2f}x{flag}")
+            if slow:
+                regressions.append((scale, name, base[name], now))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hot path dashboard / export theo cỡ dữ liệu")
+    parser.add_argument("--scales", default="10k,1m,10m", help="Danh sách cỡ dữ liệu (default: 10k,1m,10m)")
+    parser.add_argument("--repeat", type=int, default=3, help="Số lần đo mỗi hot path (default: 3)")
+    parser.add_argument("--out", default="hotpaths.json", help="File JSON kết quả (default: hotpaths.json)")
+    parser.add_argument("--baseline", help="File JSON kết quả lần trước để so sánh")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Chậm hơn baseline quá tỷ lệ này là regression (default: 0.2)")
+    parser.add_argument("--min-abs-ms", type=float, default=1.0,
+                        help="Bỏ qua chênh lệch nhỏ hơn chừng này ms (default: 1)")
+    args = parser.parse_args()
+
+    current = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python":    platform.python_version(),
+            "numpy":     np.__version__,
+            "pandas":    pd.__version__,
+            "cpus":      os.cpu_count(),
+            "repeat":    args.repeat,
+        },
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scales.split(","):
+            n = _parse_scale(scale)
+            print(f"🎲 {scale.strip()}: {n:,} rows...", flush=True)
+            timings = bench_scale(n, args.repeat, Path(tmp))
+            current["results"][scale.strip()] = {"rows": n, "timings": timings}
+            for name, sec in timings.items():
+                print(f"   {name:<20}{sec:>10.4f}s")
+
+    Path(args.out).write_text(json.dumps(current, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"\n💾 Đã ghi {args.out}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare(current, baseline, args.tolerance, args.min_abs_ms / 1000)
+        if regressions:
+            print(f"\n❌ {len(regressions)} hot path chậm hơn baseline quá {args.tolerance:.0%}")
+            sys.exit(1)
+        print("\n✅ Không có regression so với baseline")
+
+
+if __name__ == "__main__":
+    main()
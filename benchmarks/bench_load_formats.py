@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+bench_load_formats.py — So sánh thời gian load CSV / Parquet / Arrow IPC
+=========================================================================
+Tạo dữ liệu tổng hợp, ghi ra cả 3 định dạng bằng đúng hàm export của
+generate_data.py, rồi đo thời gian đọc lại bằng đúng hàm data_core.read_export()
+mà load_data() dùng.
+
+Cách dùng:
+    python benchmarks/bench_load_formats.py                 # 200k rows
+    python benchmarks/bench_load_formats.py --n 2000000 --repeat 5
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from data_core import generate_synthetic_data, read_export  # noqa: E402
+from generate_data import FORMATS, _write_output             # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark load time theo định dạng export")
+    parser.add_argument("--n", type=int, default=200_000, help="Số rows (default: 200000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Số lần đọc mỗi định dạng (default: 3)")
+    args = parser.parse_args()
+
+    print(f"🎲 Tạo {args.n:,} rows tổng hợp...")
+    df = generate_synthetic_data(n=args.n)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt, ext in FORMATS.items():
+            path = Path(tmp) / f"conversations{ext}"
+            t0 = time.perf_counter()
+            _write_output(df, path)
+            t_write = time.perf_counter() - t0
+
+            times = []
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                out = read_export(path)
+                times.append(time.perf_counter() - t0)
+            mem_mb = out.memory_usage(deep=True).sum() / 1e6
+            results.append((fmt, path.stat().st_size / 1e6, t_write, min(times), mem_mb))
+
+    base = next(r for r in results if r[0] == "csv")[3]
+    print(f"\n{'format':<9}{'file MB':>10}{'write s':>10}{'read s':>10}{'speedup':>10}{'RAM MB':>10}")
+    for fmt, size, t_write, t_read, mem in results:
+        print(f"{fmt:<9}{size:>10.1f}{t_write:>10.2f}{t_read:>10.3f}{base / t_read:>9.1f}x{mem:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+bench_startup.py — Thời gian khởi động (cold start) của CLI export và dashboard
+================================================================================
+Mỗi phép đo chạy trong 1 process Python mới (không có module nào đã import sẵn),
+lấy thời gian nhỏ nhất sau ``--repeat`` lần:
+
+    cli --help        python generate_data.py --help
+    import data_core  phần generate_data cần để sinh dữ liệu tổng hợp / snippets
+    import app        cái giá CLI phải trả khi còn ``from app import ...``
+    app view=system   lần chạy đầu của dashboard, view không có chart
+    app view=overview lần chạy đầu của dashboard, view có chart (import plotly.express)
+
+Cột ``plotly.express`` cho biết module đó có bị import trong lần chạy hay không.
+
+Cách dùng:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --repeat 5
+"""
+import argparse
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+_PROBE = "import sys; {code}; print('plotly.express' in sys.modules)"
+_APPTEST = (
+    "from streamlit.testing.v1 import AppTest; "
+    "at = AppTest.from_file({app!r}, default_timeout=300); "
+    "at.query_params['view'] = {view!r}; at.run()"
+)
+
+CASES = [
+    ("cli --help",        None),
+    ("import data_core",  "import data_core"),
+    ("import app",        "import app"),
+    ("app view=system",   _APPTEST.format(app=str(ROOT / "app.py"), view="system")),
+    ("app view=overview", _APPTEST.format(app=str(ROOT / "app.py"), view="overview")),
+]
+
+
+def _run(code) -> tuple[float, str]:
+    if code is None:
+        cmd = [sys.executable, str(ROOT / "generate_data.py"), "--help"]
+    else:
+        cmd = [sys.executable, "-c", _PROBE.format(code=code)]
+    t0 = time.perf_counter()
+    out = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True, check=True)
+    elapsed = time.perf_counter() - t0
+    lines = out.stdout.strip().splitlines()
+    return elapsed, (lines[-1] if code is not None and lines else "-")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark thời gian khởi động CLI / dashboard")
+    parser.add_argument("--repeat", type=int, default=3, help="Số lần chạy mỗi phép đo (default: 3)")
+    args = parser.parse_args()
+
+    print(f"{'case':<20}{'cold s':>10}{'plotly.express':>16}")
+    for name, code in CASES:
+        runs = [_run(code) for _ in range(args.repeat)]
+        best = min(t for t, _ in runs)
+        print(f"{name:<20}{best:>10.2f}{runs[-1][1]:>16}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+cube.py — Cube tổng hợp sẵn cho các chart Overview / Intelligence
+==================================================================
+Thay vì groupby / value_counts trên từng row mỗi lần Streamlit rerun, mọi chart
+được trả lời từ một bảng tổng hợp nhỏ, tính 1 lần lúc export (hoặc lúc load):
+
+    grouping | day | page_name | <dim>... | n | conv_sum | conv_n | sent_sum | ...
+
+Mỗi ``grouping`` là một tổ hợp chiều (GROUPING SETS) ở grain ngày × cửa hàng:
+"" (chỉ tổng), từng chiều trong GROUPINGS, và cặp intent × sentiment cho heatmap.
+Các chiều không thuộc grouping của row để NaN. Cube cộng được (additive), nên
+có thể dựng theo từng chunk rồi gộp bằng combine().
+"""
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+DIMS = [
+    "intent_primary", "sentiment_overall", "purchase_stage",
+    "disc_primary", "urgency_level", "funnel_type",
+    "generation_cohort", "trust_level", "price_sensitivity",
+]
+
+# grouping name → các chiều (ngoài day × page_name)
+GROUPINGS = {"": []}
+GROUPINGS.update({d: [d] for d in DIMS})
+GROUPINGS["intent_primary×sentiment_overall"] = ["intent_primary", "sentiment_overall"]
+
+MEASURES = ["n", "conv_sum", "conv_n", "sent_sum", "sent_n", "agent_sum", "agent_n"]
+
+# Cột cần đọc từ export để dựng cube
+SOURCE_COLS = ["conversation_date", "page_name", "funnel_is_successful",
+               "sentiment_score", "agent_overall_score"] + DIMS
+
+_KEYS = ["grouping", "day", "page_name"] + DIMS
+
+
+def _num(df: pd.DataFrame, col: str) -> pd.Series:
+    if col not in df.columns:
+        return pd.Series(np.nan, index=df.index)
+    return pd.to_numeric(df[col], errors="coerce")
+
+
+def build_cube(df: pd.DataFrame) -> pd.DataFrame:
+    """Tổng hợp các row trong ``df`` thành cube (xem docstring module)."""
+    frame = pd.DataFrame({
+        "day":       pd.to_datetime(df["conversation_date"], errors="coerce").dt.normalize(),
+        "page_name": df["page_name"] if "page_name" in df.columns else np.nan,
+        "_conv":     _num(df, "funnel_is_successful"),
+        "_sent":     _num(df, "sentiment_score"),
+        "_agent":    _num(df, "agent_overall_score"),
+    })
+    for d in DIMS:
+        if d in df.columns:
+            frame[d] = df[d]
+
+    parts = []
+    for name, dims in GROUPINGS.items():
+        if any(d not in frame.columns for d in dims):
+            continue
+        agg = frame.groupby(["day", "page_name"] + dims, observed=True, dropna=False, sort=False).agg(
+            n=("day", "size"),
+            conv_sum=("_conv", "sum"),   conv_n=("_conv", "count"),
+            sent_sum=("_sent", "sum"),   sent_n=("_sent", "count"),
+            agent_sum=("_agent", "sum"), agent_n=("_agent", "count"),
+        ).reset_index()
+        agg.insert(0, "grouping", name)
+        parts.append(agg)
+    return _finish(pd.concat(parts, ignore_index=True))
+
+
+def combine(parts: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """Gộp các cube con (dựng theo chunk) thành 1 cube."""
+    cube = pd.concat([_finish(p) for p in parts], ignore_index=True)
+    cube = cube.groupby(_KEYS, observed=True, dropna=False, sort=False)[MEASURES].sum().reset_index()
+    return _finish(cube)
+
+
+def _finish(cube: pd.DataFrame) -> pd.DataFrame:
+    """Schema cố định: đủ cột, chiều dạng category, measure dạng số."""
+    cube = cube.reindex(columns=_KEYS + MEASURES)
+    for col in ["grouping", "page_name"] + DIMS:
+        cube[col] = cube[col].astype(object).astype("category")
+    cube["day"] = pd.to_datetime(cube["day"])
+    cube[MEASURES] = cube[MEASURES].fillna(0)
+    return cube
+
+
+def slice_cube(cube: pd.DataFrame, d0: Optional[pd.Timestamp] = None,
+               d1: Optional[pd.Timestamp] = None, page: Optional[str] = None) -> pd.DataFrame:
+    """Lọc cube theo khoảng ngày [d0, d1] (tính cả ngày d1) và cửa hàng."""
+    mask = np.ones(len(cube), dtype=bool)
+    if d0 is not None:
+        mask &= (cube["day"] >= d0).to_numpy()
+    if d1 is not None:
+        mask &= (cube["day"] <= d1).to_numpy()
+    if page is not None:
+        mask &= (cube["page_name"] == page).to_numpy()
+    return cube[mask]
+
+
+def rollup(cube: pd.DataFrame, dims: list[str]) -> pd.DataFrame:
+    """Tổng các measure theo ``dims`` (bỏ giá trị NaN, như value_counts/groupby)."""
+    sub = cube[cube["grouping"] == "×".join(dims)]
+    if not dims:
+        return sub[MEASURES].sum().to_frame().T
+    return sub.groupby(dims, observed=True)[MEASURES].sum()
+
+
+def totals(cube: pd.DataFrame) -> pd.Series:
+    return rollup(cube, []).iloc[0]
+
+
+def daily(cube: pd.DataFrame) -> pd.Series:
+    """Số conversations theo ngày (index = day)."""
+    sub = cube[cube["grouping"] == ""]
+    return sub.groupby("day")["n"].sum().sort_index()
+
+
+# Độ phân giải trend theo độ dài khoảng ngày trong cube: (tối đa số ngày, freq)
+TREND_FREQS = [(180, "D"), (3 * 365, "W"), (None, "MS")]
+
+
+def trend(cube: pd.DataFrame) -> tuple[pd.Series, str]:
+    """(số conversations theo ngày / tuần / tháng, freq) — freq chọn theo khoảng ngày."""
+    d = daily(cube)
+    if d.empty:
+        return d, "D"
+    span = (d.index[-1] - d.index[0]).days + 1
+    freq = next(f for max_days, f in TREND_FREQS if max_days is None or span <= max_days)
+    return d.resample(freq).sum(), freq
@@ -0,0 +1,455 @@
+# -*- coding: utf-8 -*-
+"""
+data_core.py — Lớp dữ liệu dùng chung cho app.py và generate_data.py
+====================================================================
+Từ điển nhãn, đoạn hội thoại mẫu, bộ sinh dữ liệu tổng hợp và hàm đọc export.
+Không import streamlit / plotly: CLI export và benchmark import module này mà
+không phải dựng UI (app.py chỉ bọc read_data() bằng st.cache_resource).
+"""
+import copy
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# ─── VOCABULARIES ─────────────────────────────────────────────────────────────
+INTENT_VN = {
+    "hoi_gia":               "Hỏi giá",
+    "tu_van_do_mat":         "Tư vấn đo mắt",
+    "dat_lich_do":           "Đặt lịch khám",
+    "hoi_san_pham":          "Hỏi sản phẩm",
+    "mua_hang":              "Mua hàng",
+    "khieu_nai":             "Khiếu nại",
+    "hoi_bao_hanh":          "Hỏi bảo hành",
+    "tu_van_kinh_ap_trong":  "Tư vấn áp tròng",
+}
+STAGE_VN = {
+    "awareness": "Nhận thức", "consideration": "Cân nhắc",
+    "intent": "Có ý định", "evaluation": "Đánh giá",
+    "purchase": "Mua hàng", "loyalty": "Trung thành",
+}
+DISC_VN   = {"D": "Quyết đoán (D)", "I": "Ảnh hưởng (I)", "S": "Ổn định (S)", "C": "Cẩn thận (C)"}
+LEVEL_VN  = {"high": "Cao", "medium": "Trung bình", "low": "Thấp"}
+FUNNEL_VN = {
+    "warm_lead": "Warm Lead", "cold_lead": "Cold Lead",
+    "hot_lead": "Hot Lead", "existing_customer": "KH cũ",
+}
+
+# ─── CONVERSATION SNIPPETS ────────────────────────────────────────────────────
+SNIPPETS = {
+"hoi_gia": """\
+[CUSTOMER] Chào shop! Gọng kính titanium bên mình giá khoảng bao nhiêu ạ?
+[ADMIN] Dạ chào bạn! Gọng titanium nhẹ và siêu bền, từ 850k-2tr tùy dòng ạ. Bạn đang tìm gọng dáng nào?
+[CUSTOMER] Mình hay đeo kiểu rimless, có không ạ?
+[ADMIN] Dạ có! Rimless titanium đang hot lắm ạ, nhẹ như không đeo. Giá từ 1.1tr, kết hợp tròng Zeiss sẽ rất tốt.
+[CUSTOMER] Tròng thêm bao nhiêu nữa?
+[ADMIN] Tròng đơn focal cơ bản 350k, anti-blue light thêm 150k, loại Zeiss premium từ 850k ạ.
+[CUSTOMER] Ok tổng khoảng 1.5tr cho bộ rimless + tròng Zeiss cơ bản?
+[ADMIN] Đúng rồi ạ! Kèm thêm case cứng và dây đeo miễn phí. Bạn có muốn ghé thử mẫu không?
+[CUSTOMER] Thứ 7 mình ghé được không?
+[ADMIN] Dạ được! Shop mở 8h-21h. Hẹn gặp bạn thứ 7 nhé!""",
+
+"tu_van_do_mat": """\
+[CUSTOMER] Em muốn hỏi về dịch vụ đo mắt bên mình ạ, có chính xác không?
+[ADMIN] Dạ chào em! Bên mình dùng máy đo tự động kết hợp bác sĩ nhãn khoa kiểm tra thủ công. Độ chính xác rất cao ạ.
+[CUSTOMER] Em bị cận khá nặng, 7 độ, đo được không?
+[ADMIN] Dạ đo được hoàn toàn! Máy của mình xử lý tới -20.00. Cận 7 độ bình thường ạ.
+[CUSTOMER] Ngoài đo cận có check thêm gì không?
+[ADMIN] Có ạ! Đo thêm loạn thị, lão thị, áp lực nhãn cầu (phòng ngừa glaucoma), và field of vision ạ. Phí tổng cộng 150k.
+[CUSTOMER] Oke, vậy có cần đặt lịch trước không ạ?
+[ADMIN] Nên đặt trước để không chờ ạ. Em inbox số điện thoại mình book lịch cho nhé!
+[CUSTOMER] Ok để em nhắn SĐT sau. Cảm ơn!""",
+
+"dat_lich_do": """\
+[CUSTOMER] Mình muốn đặt lịch khám mắt cho bé nhà mình, 9 tuổi
+[ADMIN] Dạ chào bạn! Bé có hay nheo mắt hay ngồi gần tivi/điện thoại không ạ?
+[CUSTOMER] Hay nheo mắt và hay phàn nàn nhìn bảng lớp không rõ
+[ADMIN] Dấu hiệu cận thị rồi ạ! Cần khám sớm. Bên mình có bác sĩ chuyên trẻ em vào thứ 3, 5, 7 ạ.
+[CUSTOMER] Thứ 7 tuần này còn lịch không?
+[ADMIN] Thứ 7 còn 9h00 và 14h30 ạ. Bạn chọn giờ nào?
+[CUSTOMER] 9h nhé. Tên bé là Bảo Nam
+[ADMIN] Đã đặt 9h thứ 7 cho bé Bảo Nam! Nhớ cho bé tránh đọc sách 30' trước khi khám nhé ạ.
+[CUSTOMER] Ok, cảm ơn nhiều!
+[ADMIN] Dạ hẹn gặp bé Bảo Nam thứ 7 nhé!""",
+
+"hoi_san_pham": """\
+[CUSTOMER] Bên mình có kính áp tròng màu không? Mình bị cận 3.5 độ
+[ADMIN] Dạ có ạ! Lens màu có độ từ 0 đến -8.00, cận 3.5 dùng được hoàn toàn.
+[CUSTOMER] Có màu grey tự nhiên không? Không muốn quá lòe loẹt
+[ADMIN] Dạ có! Freshlook Dimensions Grey và Acuvue Define Fresh Gray trông rất tự nhiên ạ, hợp với người Á Đông.
+[CUSTOMER] Lens dùng được bao lâu? Và giá?
+[ADMIN] Loại tháng dùng 30 ngày, từ 280k/hộp 2 đôi. Loại ngày dùng 1 lần, 350k/hộp 10 đôi ạ.
+[CUSTOMER] Mình hay dùng máy tính 8h/ngày, loại nào phù hợp?
+[ADMIN] Bạn nên dùng loại ngày (daily) ạ — thoáng khí hơn, không lo nguy cơ nhiễm khuẩn do dùng nhiều ngày.
+[CUSTOMER] Vậy cho mình order 2 hộp Freshlook Grey ngày nhé!""",
+
+"mua_hang": """\
+[CUSTOMER] Shop có Ray-Ban Clubmaster không? Muốn mua làm quà
+[ADMIN] Dạ có ạ! RB3016 Clubmaster đang có đủ màu: gold/tortoise, black/gold, all-black ạ.
+[CUSTOMER] Giá bao nhiêu vậy?
+[ADMIN] Chính hãng từ Mỹ: 3.2tr, kèm case da và certificate ạ. Đang có free gift wrap dịp này.
+[CUSTOMER] Tặng cho bố, bố mình 55 tuổi, màu nào phù hợp?
+[ADMIN] Gold/Tortoise rất classic và phù hợp bậc trung niên ạ! Vừa lịch sự vừa có điểm nhấn.
+[CUSTOMER] Ok mình đặt 1 cái gold/tortoise. Ship được không?
+[ADMIN] Dạ ship toàn quốc, COD hoặc banking. 2-3 ngày ạ. Bạn để lại địa chỉ nhé!
+[CUSTOMER] Địa chỉ: 45 Nguyễn Trãi, Q.1, HCM
+[ADMIN] Đã nhận! Xác nhận đơn Ray-Ban RB3016 Gold/Tortoise, giao 45 Nguyễn Trãi Q.1. Cảm ơn bạn!""",
+
+"khieu_nai": """\
+[CUSTOMER] Tôi mua kính 3 tuần trước, tròng bị bong coating rồi, không dùng sai cách gì cả!
+[ADMIN] Dạ rất xin lỗi bạn! Tình trạng này không nên xảy ra với tròng mới. Bạn có thể cho mình xem ảnh được không ạ?
+[CUSTOMER] [Ảnh tròng bị bong ở chính giữa]
+[ADMIN] Dạ đây là lỗi kỹ thuật ạ, hoàn toàn thuộc bảo hành. Bên mình sẽ thay tròng mới 100% miễn phí.
+[CUSTOMER] Mất bao lâu? Tôi đang cần dùng
+[ADMIN] 3-4 ngày làm việc ạ. Trong thời gian chờ bên mình có tròng tạm cho bạn mượn nếu bạn ghé cửa hàng.
+[CUSTOMER] Ok tôi sẽ ghé ngày mai
+[ADMIN] Dạ! Nhớ mang hóa đơn hoặc ảnh bill. Mình sẽ ưu tiên xử lý ngay cho bạn ạ. Xin lỗi vì sự bất tiện!""",
+
+"hoi_bao_hanh": """\
+[CUSTOMER] Kính mua ở đây được bảo hành bao lâu ạ?
+[ADMIN] Dạ! Gọng: 12 tháng lỗi kỹ thuật. Tròng: 6 tháng bong tráng phủ. Tất cả tính từ ngày mua ạ.
+[CUSTOMER] Nếu gọng bị cong do dùng lâu thì có được bảo hành không?
+[ADMIN] Cong vênh tự nhiên do vật liệu thì được ạ. Nhưng do va chạm hay để nơi nóng (xe hơi dưới nắng) thì ngoài bảo hành.
+[CUSTOMER] Mình muốn hỏi về trường hợp của mình: gọng bị lỏng chốt bản lề sau 8 tháng
+[ADMIN] 8 tháng, lỏng chốt tự nhiên thì trong bảo hành ạ! Bạn mang vào mình siết/thay chốt miễn phí.
+[CUSTOMER] Không cần có hóa đơn không?
+[ADMIN] Nếu còn trong 12 tháng và có thể xác định ngày mua qua SĐT là được ạ. Không cần hóa đơn cứng.
+[CUSTOMER] Tốt quá! Mình sẽ ghé cuối tuần nhé""",
+
+"tu_van_kinh_ap_trong": """\
+[CUSTOMER] Mình mới dùng lens lần đầu, có sợ không ạ?
+[ADMIN] Dạ ban đầu hơi lạ nhưng sẽ quen rất nhanh ạ! Bên mình hướng dẫn đeo/tháo trực tiếp, miễn phí.
+[CUSTOMER] Mắt mình hay bị khô, có dùng được không?
+[ADMIN] Được ạ nhưng cần chọn đúng loại. Dailies Total 1 hoặc Acuvue Oasys — thiết kế cho mắt khô, có thể đeo 12-14h thoải mái.
+[CUSTOMER] 2 loại đó giá bao nhiêu?
+[ADMIN] Dailies Total 1: 580k/hộp 30 đôi (1 tháng). Acuvue Oasys 2-tuần: 280k/hộp 6 đôi ạ.
+[CUSTOMER] Daily tiện hơn nhỉ? Không cần rửa hay ngâm
+[ADMIN] Đúng! Daily là đơn giản và vệ sinh nhất, đặc biệt cho người mới. Mình recommend luôn ạ.
+[CUSTOMER] Ok mình thử Dailies Total 1 nhé. Cận 3.25 đặt được không?
+[ADMIN] Được ạ! 3.25 có sẵn. Lần đầu nên ghé để đo độ curve giác mạc cho vừa nhé. Sau đó order online thoải mái!""",
+}
+
+# ─── SYNTHETIC DATA ───────────────────────────────────────────────────────────
+def _cat(idx: np.ndarray, values: list) -> pd.Categorical:
+    """Chỉ số đã sample → Categorical (None trong ``values`` thành NaN)."""
+    cats  = list(dict.fromkeys(v for v in values if v is not None))
+    codes = np.array([cats.index(v) if v is not None else -1 for v in values], dtype=np.int8)
+    return pd.Categorical.from_codes(codes[idx], categories=cats)
+
+
+def generate_synthetic_data(n: int = 350, seed=42, id_offset: int = 0) -> pd.DataFrame:
+    """Sinh ``n`` conversations tổng hợp, hoàn toàn bằng phép toán mảng.
+
+    ``seed`` là int hoặc ``np.random.SeedSequence``; ``id_offset`` dịch số thứ tự
+    trong conversation_id để các chunk/shard không trùng ID.
+    """
+    rng = np.random.default_rng(seed)
+
+    PAGES   = ["Kính mắt Hoàng Anh - HN", "Kính mắt Minh Trí - HCM",
+               "Quang Đức Optical - ĐN",  "Hùng Optics - CT"]
+    P_PAGES = [0.35, 0.40, 0.15, 0.10]
+
+    INTENTS  = list(INTENT_VN.keys())
+    P_INT    = [0.28, 0.22, 0.18, 0.12, 0.08, 0.05, 0.04, 0.03]
+
+    STAGES   = list(STAGE_VN.keys())
+    P_STAGE  = [0.18, 0.25, 0.20, 0.15, 0.14, 0.08]
+
+    FUNNELS  = list(FUNNEL_VN.keys())
+    P_FUN    = [0.35, 0.25, 0.20, 0.20]
+
+    SENTS    = ["positive", "neutral", "negative"]
+    P_SENT   = [0.50, 0.30, 0.20]
+
+    DISCS    = list(DISC_VN.keys())
+    P_DISC   = [0.35, 0.30, 0.22, 0.13]
+
+    GENS     = ["Millennial", "Gen Z", "Gen X", "Boomer"]
+    P_GEN    = [0.40, 0.28, 0.22, 0.10]
+
+    LIFESTYLES = ["Nhân viên văn phòng", "Học sinh/Sinh viên", "Phụ huynh",
+                  "Chuyên gia", "Người trung niên"]
+    P_LIFE   = [0.34, 0.26, 0.20, 0.12, 0.08]
+
+    LEVELS   = ["high", "medium", "low"]
+
+    PRODUCTS = ["Kính cận", "Kính lão", "Kính áp tròng", "Kính râm",
+                "Gọng kính", "Tròng kính cao cấp", "Kính trẻ em"]
+
+    COMP     = [None]*6 + ["Specsavers", "Grand Vision", "Local store", "Online shop"]
+    CHURN    = [None]*7 + ["gia_cao", "khong_co_mau", "mua_cho_roi", "can_sua_lai"]
+
+    # Dates — weighted toward recent months
+    dates      = pd.date_range("2025-07-01", "2026-01-31", freq="D")
+    w_dates    = np.exp(np.linspace(-2.0, 0, len(dates))); w_dates /= w_dates.sum()
+    date_idx   = rng.choice(len(dates), n, p=w_dates)
+
+    # Sample chỉ số thay vì giá trị — cùng luồng random với rng.choice(values, ...)
+    pages   = rng.choice(len(PAGES),      n, p=P_PAGES)
+    intents = rng.choice(len(INTENTS),    n, p=P_INT)
+    stages  = rng.choice(len(STAGES),     n, p=P_STAGE)
+    funnels = rng.choice(len(FUNNELS),    n, p=P_FUN)
+    sents   = rng.choice(len(SENTS),      n, p=P_SENT)
+    discs   = rng.choice(len(DISCS),      n, p=P_DISC)
+    gens    = rng.choice(len(GENS),       n, p=P_GEN)
+    lives   = rng.choice(len(LIFESTYLES), n, p=P_LIFE)
+    urgs    = rng.choice(len(LEVELS),     n, p=[0.20, 0.50, 0.30])
+    trusts  = rng.choice(len(LEVELS),     n, p=[0.40, 0.40, 0.20])
+    prices  = rng.choice(len(LEVELS),     n, p=[0.35, 0.40, 0.25])
+    comps   = rng.choice(len(COMP),       n)
+    prods   = rng.choice(len(PRODUCTS),   n)
+    churns  = rng.choice(len(CHURN),      n)
+
+    # Chỉ số theo SENTS: 0 = positive, 1 = neutral, 2 = negative
+    def _scores(mu_hi=7.6, mu_lo=4.4, sigma=1.1):
+        mu = np.array([mu_hi, 6.0, mu_lo])[sents]
+        return np.clip(rng.normal(mu, sigma), 1, 10).round(1)
+
+    agent_scores   = _scores()
+    empathy_scores = _scores(7.8, 4.2)
+    closing_skills = _scores(7.0, 4.8)
+
+    # Conversion probability — intent + sentiment + stage aware
+    intent_adj = np.array([{"mua_hang": 0.25, "dat_lich_do": 0.25, "khieu_nai": -0.20}.get(i, 0.0)
+                           for i in INTENTS])
+    stage_adj  = np.array([{"purchase": 0.20, "evaluation": 0.20, "awareness": -0.12}.get(s, 0.0)
+                           for s in STAGES])
+    sent_adj   = np.array([0.15, 0.0, -0.15])
+    base_p      = 0.35 + intent_adj[intents] + sent_adj[sents] + stage_adj[stages]
+    conv_probs  = np.clip(base_p, 0.02, 0.98)
+    conversions = (rng.random(n) < conv_probs).astype(float)
+
+    sent_scores = rng.uniform(np.array([6, 4, 1])[sents], np.array([9.5, 7, 4.5])[sents]).round(2)
+    csats       = rng.uniform(np.array([3.8, 2.5, 1.5])[sents], np.array([5, 4, 2.8])[sents]).round(2)
+
+    msg_counts = rng.integers(4, 26, n)
+    # conversation_id = "YYYYMMDD_0042" — ghép chuỗi bằng Arrow compute (C), không loop Python
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    day_str  = pa.array(list(dates.strftime("%Y%m%d"))).take(pa.array(date_idx))
+    seq_str  = pc.utf8_lpad(pc.cast(pa.array(np.arange(id_offset, id_offset + n)), pa.string()), 4, "0")
+    conv_ids = pc.binary_join_element_wise(day_str, seq_str, "_").to_pandas()
+    snippets   = [SNIPPETS.get(i, SNIPPETS["hoi_gia"]) for i in INTENTS]
+
+    df = pd.DataFrame({
+        "conversation_id":       conv_ids,
+        "conversation_date":     dates[date_idx],
+        "page_name":             _cat(pages, PAGES),
+        "message_count":         msg_counts,
+        "intent_primary":        _cat(intents, INTENTS),
+        "purchase_stage":        _cat(stages, STAGES),
+        "funnel_type":           _cat(funnels, FUNNELS),
+        "funnel_is_successful":  conversions,
+        "sentiment_overall":     _cat(sents, SENTS),
+        "sentiment_score":       sent_scores,
+        "disc_primary":          _cat(discs, DISCS),
+        "generation_cohort":     _cat(gens, GENS),
+        "lifestyle_segment":     _cat(lives, LIFESTYLES),
+        "urgency_level":         _cat(urgs, LEVELS),
+        "trust_level":           _cat(trusts, LEVELS),
+        "price_sensitivity":     _cat(prices, LEVELS),
+        "agent_overall_score":   agent_scores,
+        "empathy_score":         empathy_scores,
+        "agent_closing_skill":   closing_skills,
+        "predicted_csat":        csats,
+        "conversion_probability": conv_probs.round(3),
+        "competitor_brand":      _cat(comps, COMP),
+        "product_interest":      _cat(prods, PRODUCTS),
+        "churn_reason":          _cat(churns, CHURN),
+        "conversation_snippet":  _cat(intents, snippets),
+    })
+    order = np.argsort(date_idx, kind="stable")
+    return df.take(order).reset_index(drop=True)
+
+
+def synthetic_chunk(i: int, n: int, seed: int = 42, chunk_size: int = 1_000_000) -> pd.DataFrame:
+    """Chunk thứ ``i`` của bộ ``n`` rows chia thành các chunk ``chunk_size`` rows.
+
+    Chunk ``i`` luôn dùng ``SeedSequence(seed, spawn_key=(i,))`` và ID bắt đầu từ
+    ``i * chunk_size``, nên kết quả chỉ phụ thuộc (i, n, seed, chunk_size) — không
+    phụ thuộc chunk nào được sinh trước hay ở process nào.
+    """
+    start = i * chunk_size
+    ss = np.random.SeedSequence(seed, spawn_key=(i,))
+    return generate_synthetic_data(min(chunk_size, n - start), seed=ss, id_offset=start)
+
+
+def synthetic_chunks(n: int, seed: int = 42, chunk_size: int = 1_000_000):
+    """Sinh ``n`` rows theo từng chunk (xem synthetic_chunk)."""
+    for i in range(-(-n // chunk_size)):
+        yield synthetic_chunk(i, n, seed, chunk_size)
+
+
+# ─── DATA LOADER ──────────────────────────────────────────────────────────────
+DATA_DIR = Path(__file__).parent / "data"
+TEXT_STORE = DATA_DIR / "conversations.text"
+CUBE_FILE  = DATA_DIR / "conversations.cube.parquet"
+SEARCH_FILE = DATA_DIR / "conversations.search.npz"
+SIMILAR_FILE = DATA_DIR / "conversations.similar.npz"
+
+# Thứ tự ưu tiên khi tìm export: dataset chia shard, rồi columnar, CSV chỉ cho export cũ
+EXPORT_FILES = ["conversations", "conversations.parquet", "conversations.arrow", "conversations.csv"]
+
+# Chỉ đọc những cột dashboard thực sự dùng (column projection).
+# conversation_snippet không nằm ở đây: nội dung chat được lấy từ TextStore khi cần.
+LOAD_COLS = [
+    "conversation_id", "conversation_date", "page_name",
+    "message_count",
+    "intent_primary", "purchase_stage", "funnel_type",
+    "funnel_is_successful",
+    "sentiment_overall", "sentiment_score",
+    "disc_primary", "generation_cohort",
+    "urgency_level", "trust_level", "price_sensitivity",
+    "agent_overall_score", "empathy_score", "agent_closing_skill",
+    "predicted_csat", "conversion_probability",
+    "competitor_brand",
+    "churn_reason",
+]
+
+
+def find_export() -> Optional[Path]:
+    for name in EXPORT_FILES:
+        p = DATA_DIR / name
+        if p.exists():
+            return p
+    return None
+
+
+def read_export(path: Path, columns: Optional[list] = None) -> pd.DataFrame:
+    """Đọc export Parquet / Arrow IPC / CSV, chỉ lấy các cột trong ``columns``.
+
+    ``path`` có thể là thư mục dataset (``part-*.parquet`` …) do ``--shards`` tạo ra.
+    """
+    columns = columns or LOAD_COLS
+    if path.is_dir():
+        parts = sorted(path.glob("part-*"))
+        if not parts:
+            return pd.DataFrame(columns=columns)
+        if parts[0].suffix == ".csv":
+            return pd.concat([read_export(p, columns) for p in parts], ignore_index=True)
+        import pyarrow.dataset as ds
+        dataset = ds.dataset(parts, format="ipc" if parts[0].suffix == ".arrow" else "parquet")
+        names = dataset.schema.names
+        return dataset.to_table(columns=[c for c in columns if c in names]).to_pandas()
+    if path.suffix == ".parquet":
+        import pyarrow.parquet as pq
+        names = pq.read_schema(path).names
+        return pd.read_parquet(path, columns=[c for c in columns if c in names])
+    if path.suffix == ".arrow":
+        from pyarrow import feather
+        table = feather.read_table(path, memory_map=True)
+        return table.select([c for c in columns if c in table.column_names]).to_pandas()
+    parse = [c for c in ("conversation_date",) if c in columns]
+    return pd.read_csv(path, usecols=lambda c: c in columns, parse_dates=parse)
+
+
+def data_version(path: Optional[Path]) -> str:
+    """Phiên bản dữ liệu cho key của memo: tên + mtime + size của export."""
+    if path is None:
+        return "synthetic"
+    files = sorted(path.glob("part-*")) if path.is_dir() else [path]
+    stats = [f.stat() for f in files]
+    return f"{path.name}:{max((s.st_mtime_ns for s in stats), default=0)}:{sum(s.st_size for s in stats)}"
+
+
+# ─── SHARED READ-ONLY DATASET ─────────────────────────────────────────────────
+_READ_ONLY_MSG = "Dataset dùng chung chỉ đọc — sửa trên bản .copy() hoặc slice riêng của session"
+
+
+class _ReadOnlyIndexer:
+    """Bọc .loc / .iloc / .at / .iat: đọc như thường, gán → TypeError."""
+
+    __slots__ = ("_inner",)
+
+    def __init__(self, inner):
+        self._inner = inner
+
+    def __call__(self, *args, **kwargs):
+        return _ReadOnlyIndexer(self._inner(*args, **kwargs))
+
+    def __getitem__(self, key):
+        return self._inner[key]
+
+    def __setitem__(self, key, value):
+        raise TypeError(_READ_ONLY_MSG)
+
+
+class _FrozenAttrs(dict):
+    """``attrs`` của FrozenFrame (chứa data_version cho key của memo): không sửa được.
+
+    deepcopy (pandas dùng khi truyền attrs sang kết quả) trả về dict thường.
+    """
+
+    def _frozen(self, *args, **kwargs):
+        raise TypeError(_READ_ONLY_MSG)
+
+    __setitem__ = __delitem__ = __ior__ = update = pop = popitem = setdefault = clear = _frozen
+
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(dict(self), memo)
+
+    def __reduce__(self):
+        return dict, (dict(self),)
+
+
+class FrozenFrame(pd.DataFrame):
+    """DataFrame dùng chung cho mọi session (1 bản / process), không sửa được tại chỗ.
+
+    Gán giá trị (``df[c] = …``, ``.loc/.iloc/.at/.iat[…] = …``), thêm / xoá cột, gán
+    thuộc tính (``df.col = …``, ``columns`` / ``index`` / ``attrs``) và thao tác
+    ``inplace=True`` → TypeError. ``df[c].iloc[i] = …`` / ``to_numpy()[i] = …`` chỉ
+    an toàn khi bật Copy-on-Write (mặc định từ pandas 3; app.py bật cho pandas 2).
+    Slice, take, groupby… trả về DataFrame thường — view, không copy — nên code
+    theo session vẫn tự do sửa kết quả của mình.
+    """
+
+    @property
+    def _constructor(self):
+        return pd.DataFrame
+
+    def _frozen(self, *args, **kwargs):
+        raise TypeError(_READ_ONLY_MSG)
+
+    __setitem__ = __delitem__ = insert = pop = _update_inplace = _frozen
+
+    def __setattr__(self, name, value):
+        if not name.startswith("_"):                 # thuộc tính nội bộ của pandas: _mgr, _item_cache…
+            raise TypeError(_READ_ONLY_MSG)
+        super().__setattr__(name, value)
+
+    loc = property(lambda self: _ReadOnlyIndexer(pd.DataFrame.loc.fget(self)))
+    iloc = property(lambda self: _ReadOnlyIndexer(pd.DataFrame.iloc.fget(self)))
+    at = property(lambda self: _ReadOnlyIndexer(pd.DataFrame.at.fget(self)))
+    iat = property(lambda self: _ReadOnlyIndexer(pd.DataFrame.iat.fget(self)))
+    columns = property(lambda self: pd.DataFrame.columns.__get__(self), _frozen)
+    index = property(lambda self: pd.DataFrame.index.__get__(self), _frozen)
+    attrs = property(lambda self: self._attrs, _frozen)
+
+
+def freeze(df: pd.DataFrame) -> FrozenFrame:
+    """``df`` dưới dạng FrozenFrame — dùng chung dữ liệu, không copy."""
+    frozen = FrozenFrame(df, copy=False)
+    object.__setattr__(frozen, "_attrs", _FrozenAttrs(df.attrs))
+    return frozen
+
+
+def read_data() -> pd.DataFrame:
+    """DataFrame phân tích (FrozenFrame): export nếu có, không thì dữ liệu tổng hợp — sort theo ngày.
+
+    ``attrs["data_source"]`` là mô tả nguồn cho sidebar, ``attrs["data_version"]``
+    là phiên bản cho key của memo.
+    """
+    path = find_export()
+    if path is not None:
+        df = read_export(path)
+        source = f"📂 Gold export ({len(df):,} records)"
+    else:
+        df = generate_synthetic_data().drop(columns=["conversation_snippet"])
+        source = f"🎲 Dữ liệu demo tổng hợp ({len(df):,} records)"
+    # Giữ thứ tự theo ngày để DateStoreIndex lọc bằng binary search
+    if not df["conversation_date"].is_monotonic_increasing:
+        df = df.sort_values("conversation_date", kind="stable", ignore_index=True)
+    df.attrs["data_source"] = source
+    df.attrs["data_version"] = data_version(path)
+    return freeze(df)
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+"""
+downsample.py — Largest-Triangle-Three-Buckets (LTTB) cho chart chuỗi thời gian
+================================================================================
+Giữ lại ``n_out`` điểm nhưng vẫn giữ hình dạng đường (đỉnh, đáy): điểm đầu và
+cuối luôn được giữ, phần giữa chia thành n_out - 2 bucket, mỗi bucket chọn điểm
+tạo tam giác lớn nhất với điểm vừa chọn và trung bình của bucket kế tiếp.
+"""
+import numpy as np
+
+
+def lttb(x, y, n_out: int) -> np.ndarray:
+    """Chỉ số các điểm giữ lại (tăng dần). ``x`` tăng dần (số hoặc datetime64)."""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x).astype(np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)   # n_out - 2 bucket trong [1, n-1)
+    edges = np.append(edges, n)                                 # bucket "kế tiếp" cuối = điểm cuối
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        cx = x[hi:edges[i + 2]].mean()
+        cy = y[hi:edges[i + 2]].mean()
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
@@ -1,30 +1,58 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 """
-generate_data.py — Export Gold table → data/conversations.csv
-==============================================================
+generate_data.py — Export Gold table → data/conversations.parquet
+==================================================================
 Chạy 1 lần để export dữ liệu thực (đã anonymize) cho Streamlit Cloud demo.
 
 Cách dùng:
     python generate_data.py                          # tự detect lakehouse path
     python generate_data.py --lakehouse /opt/lakehouse
     python generate_data.py --synthetic              # tạo dữ liệu tổng hợp
-
-Sau khi chạy xong:  data/conversations.csv  sẽ được tạo.
+    python generate_data.py --synthetic --n 100000000 --shards 100 --workers 16
+                                                     # dataset data/conversations/part-*.parquet
+    python generate_data.py --format arrow           # Arrow IPC thay vì Parquet
+    python generate_data.py --format csv             # CSV (định dạng cũ)
+    python generate_data.py --incremental            # chỉ đọc file Gold mới/đổi
+    python generate_data.py --mem-budget-mb 2048     # dedup out-of-core khi Gold > RAM
+    python generate_data.py --version 42             # time travel: Delta version 42
+    python generate_data.py --as-of "2026-01-31 23:59"
+
+Sau khi chạy xong:  data/conversations.parquet  sẽ được tạo.
+Cột phân loại được lưu dạng dictionary-encoded, ngày tháng lưu dạng timestamp,
+nên app.load_data() đọc nhanh hơn CSV nhiều lần và chỉ đọc các cột cần dùng.
 Commit file này lên GitHub → deploy Streamlit Cloud.
 """
 import argparse
 import glob
+import json
+import math
 import os
+import re
+import shutil
 import sys
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import chain, islice
 from pathlib import Path
+from urllib.parse import unquote, urlparse
 
 import numpy as np
 import pandas as pd
 
 # ── Config ─────────────────────────────────────────────────────────────────────
 GOLD_SUBPATH = "gold/ai_unified_v6"
-OUTPUT       = Path(__file__).parent / "data" / "conversations.csv"
+OUTPUT_DIR   = Path(__file__).parent / "data"
+OUTPUT_STEM  = "conversations"
+
+# Định dạng output → đuôi file. Parquet là mặc định; CSV chỉ để tương thích ngược.
+FORMATS = {
+    "parquet": ".parquet",
+    "arrow":   ".arrow",
+    "csv":     ".csv",
+}
 
 # Cột loại bỏ (PII hoặc quá nặng)
 DROP_COLS = [
@@ -50,6 +78,25 @@ DEMO_COLS = [
     "processed_at",
 ]
 
+# Số thread đọc Gold song song (I/O-bound nên nhiều hơn số core)
+DEFAULT_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+
+# Out-of-core dedup: RAM pandas ≈ 3× bytes Arrow (sort + drop_duplicates tạo bản sao)
+_MEM_FACTOR  = 3
+_MAX_BUCKETS = 512
+
+# Cột phân loại ít giá trị → lưu dạng dictionary (category) trong Parquet/Arrow
+CATEGORY_COLS = [
+    "page_name",
+    "intent_primary", "purchase_stage", "funnel_type",
+    "sentiment_overall",
+    "disc_primary", "generation_cohort", "lifestyle_segment",
+    "urgency_level", "trust_level", "price_sensitivity",
+    "competitor_brand", "product_interest",
+    "churn_reason",
+    "conversation_snippet",  # snippet được gán từ templates theo intent
+]
+
 # Cái paths có thể tìm lakehouse
 POSSIBLE_PATHS = [
     Path(__file__).parent.parent / "chat-analytics-lakehouse" / "lakehouse",
@@ -58,11 +105,101 @@ POSSIBLE_PATHS = [
 ]
 
 
-# ── Helpers ────────────────────────────────────────────────────────────────────
-def _find_parquet_files(lakehouse_path: Path) -> list[Path]:
+# ── Delta log ──────────────────────────────────────────────────────────────────
+_CHECKPOINT_RE = re.compile(r"^(\d{20})\.checkpoint(?:\.\d{10}\.\d{10})?\.parquet$")
+
+
+def _delta_commit_ts(path: Path) -> pd.Timestamp:
+    """Thời điểm commit: commitInfo.timestamp nếu có, không thì mtime của file log."""
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            if '"commitInfo"' in line:
+                ts = json.loads(line)["commitInfo"].get("timestamp")
+                if ts is not None:
+                    return pd.Timestamp(ts, unit="ms")
+    return pd.Timestamp(path.stat().st_mtime_ns, unit="ns")
+
+
+def _delta_resolve(table_path: Path, rel: str) -> Path:
+    uri = urlparse(rel)
+    if uri.scheme == "file":
+        return Path(unquote(uri.path))
+    if uri.scheme:
+        raise ValueError(f"Không hỗ trợ đường dẫn ngoài local: {rel}")
+    return table_path / unquote(rel)
+
+
+def _delta_snapshot(table_path: Path, version: int | None = None,
+                    as_of: str | None = None) -> tuple[int, list[Path]] | None:
+    """Replay _delta_log (checkpoint + JSON commits) → (version, các file đang active).
+
+    Trả về None nếu ``table_path`` không phải Delta table.
+    """
+    log = table_path / "_delta_log"
+    if not log.is_dir():
+        return None
+    commits = {int(p.stem): p for p in log.glob("*.json") if p.stem.isdigit()}
+    checkpoints: dict[int, list[Path]] = {}
+    for p in log.glob("*.checkpoint*.parquet"):
+        m = _CHECKPOINT_RE.match(p.name)
+        if m:
+            checkpoints.setdefault(int(m.group(1)), []).append(p)
+    available = sorted(set(commits) | set(checkpoints))
+    if not available:
+        return None
+
+    if as_of is not None:
+        cutoff = pd.Timestamp(as_of)
+        if cutoff.tzinfo is not None:
+            # Thời điểm commit là UTC naive (commitInfo.timestamp / mtime)
+            cutoff = cutoff.tz_convert("UTC").tz_localize(None)
+        eligible = [v for v in sorted(commits) if _delta_commit_ts(commits[v]) <= cutoff]
+        if not eligible:
+            raise ValueError(f"Không có Delta version nào trước {cutoff}")
+        version = eligible[-1] if version is None else min(version, eligible[-1])
+    if version is None:
+        version = available[-1]
+    if version < 0:
+        raise ValueError(f"Delta version phải ≥ 0 (nhận {version})")
+    if version > available[-1]:
+        raise ValueError(f"Delta version {version} chưa tồn tại (mới nhất: {available[-1]})")
+
+    active: dict[str, None] = {}
+    start = -1
+    cps = [v for v in checkpoints if v <= version]
+    if cps:
+        import pyarrow.parquet as pq
+        start = max(cps)
+        for part in checkpoints[start]:
+            adds = pq.read_table(part, columns=["add"]).column("add").combine_chunks()
+            for path in adds.field("path").to_pylist():
+                if path is not None:
+                    active[path] = None
+    for v in range(start + 1, version + 1):
+        if v not in commits:
+            raise ValueError(f"Thiếu Delta commit {v:020d}.json (đã bị dọn log?)")
+        with open(commits[v], encoding="utf-8") as fh:
+            for line in fh:
+                action = json.loads(line)
+                if "add" in action:
+                    active[action["add"]["path"]] = None
+                elif "remove" in action:
+                    active.pop(action["remove"]["path"], None)
+    return version, [_delta_resolve(table_path, p) for p in active]
+
+
+def _find_parquet_files(lakehouse_path: Path, version: int | None = None,
+                        as_of: str | None = None) -> list[Path]:
     gold_path = lakehouse_path / GOLD_SUBPATH
     if not gold_path.exists():
         return []
+    snapshot = _delta_snapshot(gold_path, version, as_of)
+    if snapshot is not None:
+        snap_version, files = snapshot
+        print(f"  → Delta log: version {snap_version}, {len(files)} file active")
+        return files
+    if version is not None or as_of is not None:
+        print("  ⚠ Không có _delta_log → bỏ qua --version/--as-of, đọc mọi file Parquet")
     pattern = str(gold_path / "**" / "*.parquet")
     return [
         Path(f) for f in glob.glob(pattern, recursive=True)
@@ -70,28 +207,88 @@ def _find_parquet_files(lakehouse_path: Path) -> list[Path]:
     ]
 
 
-def _read_gold(lakehouse_path: Path) -> pd.DataFrame | None:
-    files = _find_parquet_files(lakehouse_path)
+def _read_gold_file(path: Path, columns: list[str]):
+    """Đọc 1 file Parquet, chỉ các cột trong ``columns`` có mặt trong file.
+
+    Trả về (pyarrow.Table, số bytes nén của các cột đã đọc).
+    """
+    import pyarrow.parquet as pq
+    pf = pq.ParquetFile(path)
+    names = pf.schema_arrow.names
+    cols = [c for c in columns if c in names]
+    idx = [i for i, name in enumerate(pf.metadata.schema.names) if name in cols]
+    nbytes = sum(
+        pf.metadata.row_group(rg).column(i).total_compressed_size
+        for rg in range(pf.metadata.num_row_groups) for i in idx
+    )
+    return pf.read(columns=cols), nbytes
+
+
+def _try_read_gold_file(path: Path):
+    try:
+        return _read_gold_file(path, DEMO_COLS)
+    except Exception as e:
+        print(f"  ⚠ Skip {path.name}: {e}")
+        return None
+
+
+def _iter_gold_tables(files: list[Path], workers: int = DEFAULT_WORKERS):
+    """Đọc song song nhưng chỉ giữ tối đa 2×workers file đang chờ trong RAM.
+
+    Yield (pyarrow.Table, nbytes) theo đúng thứ tự ``files``.
+    """
+    workers = max(1, workers)
+    it = iter(files)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque(pool.submit(_try_read_gold_file, f) for f in islice(it, 2 * workers))
+        while pending:
+            result = pending.popleft().result()
+            nxt = next(it, None)
+            if nxt is not None:
+                pending.append(pool.submit(_try_read_gold_file, nxt))
+            if result is not None:
+                yield result
+
+
+def _read_gold(lakehouse_path: Path, workers: int = DEFAULT_WORKERS,
+               files: list[Path] | None = None) -> pd.DataFrame | None:
+    if files is None:
+        files = _find_parquet_files(lakehouse_path)
     if not files:
         return None
     print(f"  → {len(files)} parquet files tại {lakehouse_path / GOLD_SUBPATH}")
 
-    dfs = []
-    for f in files:
-        try:
-            dfs.append(pd.read_parquet(f))
-        except Exception as e:
-            print(f"  ⚠ Skip {f.name}: {e}")
-    if not dfs:
+    import pyarrow as pa
+
+    # Chỉ đọc DEMO_COLS (đã gồm conversation_id + processed_at để dedup),
+    # bỏ qua full_conversation và các cột nặng khác ngay từ I/O.
+    t0 = time.perf_counter()
+    results = list(_iter_gold_tables(files, workers))
+    elapsed = max(time.perf_counter() - t0, 1e-9)
+    if not results:
         return None
-    return pd.concat(dfs, ignore_index=True)
 
+    mb = sum(nb for _, nb in results) / 1e6
+    print(f"  → Đọc {len(results)} files trong {elapsed:.2f}s "
+          f"({len(results) / elapsed:,.0f} files/s, {mb / elapsed:,.1f} MB/s, {workers} threads)")
 
-def _clean(df: pd.DataFrame) -> pd.DataFrame:
-    # Dedup by conversation_id
+    # Ghép ở tầng Arrow rồi chuyển sang pandas một lần, giải phóng buffer Arrow khi chuyển
+    table = pa.concat_tables([t for t, _ in results], promote_options="permissive")
+    del results
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def _dedup_latest(df: pd.DataFrame) -> pd.DataFrame:
+    """Giữ bản ghi mới nhất (theo processed_at) cho mỗi conversation_id."""
     if "conversation_id" in df.columns:
         df = df.sort_values("processed_at", ascending=False) if "processed_at" in df.columns else df
         df = df.drop_duplicates(subset=["conversation_id"], keep="first")
+    return df
+
+
+def _clean(df: pd.DataFrame) -> pd.DataFrame:
+    # Dedup by conversation_id
+    df = _dedup_latest(df)
 
     # Drop PII
     for col in DROP_COLS:
@@ -114,49 +311,532 @@ def _clean(df: pd.DataFrame) -> pd.DataFrame:
     return df.reset_index(drop=True)
 
 
-def _add_snippets(df: pd.DataFrame) -> pd.DataFrame:
+def _add_snippets(df: pd.DataFrame, verbose: bool = True) -> pd.DataFrame:
     """Gán conversation_snippet từ templates (không có PII)."""
-    # Import from app.py nếu cần
     try:
         sys.path.insert(0, str(Path(__file__).parent))
-        from app import _SNIPPETS
+        from data_core import SNIPPETS
         df["conversation_snippet"] = df["intent_primary"].map(
-            lambda x: _SNIPPETS.get(str(x), _SNIPPETS.get("hoi_gia", ""))
+            lambda x: SNIPPETS.get(str(x), SNIPPETS.get("hoi_gia", ""))
         )
-        print("  ✓ Đã gán conversation_snippet từ templates")
+        if verbose:
+            print("  ✓ Đã gán conversation_snippet từ templates")
     except ImportError:
-        print("  ⚠ Không import được app.py, bỏ qua conversation_snippet")
+        print("  ⚠ Không import được data_core.py, bỏ qua conversation_snippet")
+    return df
+
+
+def _output_path(fmt: str) -> Path:
+    return OUTPUT_DIR / f"{OUTPUT_STEM}{FORMATS[fmt]}"
+
+
+def _read_output(path: Path) -> pd.DataFrame:
+    """Đọc lại export hiện có (mọi cột) để merge incremental."""
+    if path.suffix == ".csv":
+        return pd.read_csv(path, parse_dates=["conversation_date", "processed_at"])
+    if path.suffix == ".arrow":
+        from pyarrow import feather
+        return feather.read_feather(path)
+    return pd.read_parquet(path)
+
+
+def _to_columnar(df: pd.DataFrame) -> pd.DataFrame:
+    """Ép kiểu trước khi ghi Parquet/Arrow: category cho cột phân loại, timestamp cho ngày."""
+    df = df.copy()
+    for col in CATEGORY_COLS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+    for col in ("conversation_date", "processed_at"):
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], errors="coerce")
     return df
 
 
-def generate_synthetic() -> pd.DataFrame:
+def _write_output(df: pd.DataFrame, path: Path) -> None:
+    if path.suffix == ".csv":
+        df.to_csv(path, index=False)
+    elif path.suffix == ".arrow":
+        from pyarrow import feather
+        feather.write_feather(_to_columnar(df), path, compression="zstd")
+    else:
+        _to_columnar(df).to_parquet(path, engine="pyarrow", compression="zstd", index=False)
+
+
+def _arrow_chunk(df: pd.DataFrame, schema=None):
+    """DataFrame → pyarrow.Table với schema cố định giữa các chunk.
+
+    Chunk đầu tiên quyết định schema; cột category luôn là dictionary<int32, string>
+    để các chunk sau (ít/nhiều category hơn) vẫn ghi được cùng một file.
+    """
+    import pyarrow as pa
+    table = pa.Table.from_pandas(_to_columnar(df), preserve_index=False)
+    if schema is None:
+        fields = []
+        for f in table.schema:
+            t = f.type
+            if pa.types.is_dictionary(t) or (pa.types.is_null(t) and f.name in CATEGORY_COLS):
+                t = pa.dictionary(pa.int32(), pa.string())
+            elif pa.types.is_null(t):
+                t = pa.string()
+            fields.append(pa.field(f.name, t))
+        schema = pa.schema(fields, metadata=table.schema.metadata)
+    return table.select(schema.names).cast(schema), schema
+
+
+def _write_output_chunks(chunks, path: Path) -> int:
+    """Ghi lần lượt từng DataFrame vào 1 file output mà không ghép trong RAM.
+
+    Ghi ra file tạm rồi rename, để export cũ vẫn nguyên nếu bị ngắt giữa chừng.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    tmp = path.with_name(path.name + ".tmp")
+    writer, schema, n = None, None, 0
+    try:
+        for df in chunks:
+            if path.suffix == ".csv":
+                df.to_csv(tmp, index=False, mode="w" if n == 0 else "a", header=n == 0)
+            else:
+                table, schema = _arrow_chunk(df, schema)
+                if writer is None:
+                    writer = (pa.ipc.new_file(str(tmp), schema,
+                                              options=pa.ipc.IpcWriteOptions(compression="zstd"))
+                              if path.suffix == ".arrow"
+                              else pq.ParquetWriter(tmp, schema, compression="zstd"))
+                writer.write_table(table)
+            n += len(df)
+    finally:
+        if writer is not None:
+            writer.close()
+    if n:
+        tmp.replace(path)
+    return n
+
+
+def _remove_stale_outputs(keep: Path) -> None:
+    """Xoá export cũ ở định dạng khác để app.load_data() không đọc nhầm."""
+    for ext in FORMATS.values():
+        p = OUTPUT_DIR / f"{OUTPUT_STEM}{ext}"
+        if p != keep and p.exists():
+            p.unlink()
+            print(f"  ℹ Đã xoá export cũ: {p.name}")
+    dataset_dir = OUTPUT_DIR / OUTPUT_STEM
+    if dataset_dir != keep and dataset_dir.is_dir():
+        shutil.rmtree(dataset_dir)
+        print(f"  ℹ Đã xoá dataset cũ: {dataset_dir.name}/")
+
+
+def _output_size(path: Path) -> int:
+    if path.is_dir():
+        return sum(p.stat().st_size for p in path.glob("part-*"))
+    return path.stat().st_size
+
+
+# ── Incremental watermark ──────────────────────────────────────────────────────
+def _file_stats(files: list[Path], root: Path) -> dict[str, list[int]]:
+    """{đường dẫn tương đối: [size, mtime_ns]} — dùng để phát hiện file mới/đổi."""
+    stats = {}
+    for f in files:
+        st_ = f.stat()
+        key = str(f.relative_to(root)) if f.is_relative_to(root) else str(f)
+        stats[key] = [st_.st_size, st_.st_mtime_ns]
+    return stats
+
+
+def _load_watermark(path: Path) -> dict | None:
+    if not path.exists():
+        return None
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        print(f"  ⚠ Watermark hỏng, bỏ qua ({e})")
+        return None
+
+
+def _max_processed_at(df: pd.DataFrame) -> pd.Timestamp | None:
+    if "processed_at" not in df.columns or df.empty:
+        return None
+    ts = pd.to_datetime(df["processed_at"], errors="coerce").max()
+    return ts if pd.notna(ts) else None
+
+
+def _save_watermark(path: Path, max_ts: pd.Timestamp | None, gold_path: Path,
+                    stats: dict[str, list[int]], output: Path) -> None:
+    wm = {
+        "gold_path":    str(gold_path),
+        "output":       output.name,
+        "processed_at": max_ts.isoformat() if max_ts is not None else None,
+        "files":        stats,
+    }
+    path.write_text(json.dumps(wm, ensure_ascii=False, indent=1), encoding="utf-8")
+
+
+def _changed_files(wm: dict | None, gold_path: Path, output: Path,
+                   stats: dict[str, list[int]]) -> list[str] | None:
+    """Danh sách file cần đọc lại, hoặc None nếu phải export toàn bộ."""
+    if wm is None or not output.exists():
+        return None
+    if wm.get("gold_path") != str(gold_path) or wm.get("output") != output.name:
+        print("  ℹ Watermark thuộc export khác → export toàn bộ")
+        return None
+    seen = wm.get("files", {})
+    gone = [f for f in seen if f not in stats]
+    if gone:
+        # File bị xoá (vacuum/overwrite) → không biết rows nào cần gỡ khỏi export
+        print(f"  ℹ {len(gone)} file Gold đã bị xoá → export toàn bộ")
+        return None
+    return [f for f, st_ in stats.items() if seen.get(f) != st_]
+
+
+def _merge_incremental(existing: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+    """Ghép rows của file mới/đổi vào export cũ, giữ bản mới nhất cho mỗi conversation_id.
+
+    Không lọc theo processed_at: file mới có thể chứa rows cũ hơn watermark
+    (backfill, đến muộn); rows bị file compaction ghi lại thì dedup tự gộp.
+    """
+    if new.empty:
+        return existing
+    merged = pd.concat([existing, new], ignore_index=True)
+    return _dedup_latest(merged).reset_index(drop=True)
+
+
+# ── Out-of-core dedup ──────────────────────────────────────────────────────────
+def _estimate_bytes(files: list[Path]) -> int:
+    """Bytes (chưa nén) của DEMO_COLS trong các file Parquet, theo metadata footer."""
+    import pyarrow.parquet as pq
+    total = 0
+    for f in files:
+        if f.suffix != ".parquet":
+            total += f.stat().st_size * 5
+            continue
+        md = pq.ParquetFile(f).metadata
+        idx = [i for i, name in enumerate(md.schema.names) if name in DEMO_COLS]
+        total += sum(md.row_group(rg).column(i).total_uncompressed_size
+                     for rg in range(md.num_row_groups) for i in idx)
+    return total
+
+
+def _n_buckets(est_bytes: int, budget_mb: float) -> int:
+    return min(_MAX_BUCKETS, max(1, math.ceil(est_bytes * _MEM_FACTOR / (budget_mb * 1e6))))
+
+
+def _spill_schema(files: list[Path]):
+    """Schema chung (DEMO_COLS) của mọi file Gold — để mọi bucket ghi cùng schema."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    schemas = []
+    for f in files:
+        sch = pq.read_schema(f)
+        schemas.append(pa.schema([sch.field(c) for c in DEMO_COLS if c in sch.names]))
+    return pa.unify_schemas(schemas, promote_options="permissive")
+
+
+def _conform(table, schema):
+    """Ép table về ``schema``: thêm cột thiếu (null), bỏ cột thừa, cast kiểu."""
+    import pyarrow as pa
+    cols = [
+        table.column(f.name).cast(f.type) if f.name in table.column_names
+        else pa.nulls(len(table), f.type)
+        for f in schema
+    ]
+    return pa.Table.from_arrays(cols, schema=schema)
+
+
+def _spill_buckets(tables, schema, n_buckets: int, spill_dir: Path) -> list[Path]:
+    """Hash-partition rows theo conversation_id vào ``n_buckets`` file Parquet trên đĩa.
+
+    Mọi bản ghi của cùng một conversation_id rơi vào cùng một bucket, nên dedup
+    từng bucket riêng lẻ cho kết quả giống dedup trên toàn bộ bảng.
+    """
+    import pyarrow.parquet as pq
+    writers = {}
+    try:
+        for table in tables:
+            table = _conform(table, schema)
+            cid = table.column("conversation_id").to_numpy(zero_copy_only=False)
+            bucket = pd.util.hash_array(np.asarray(cid, dtype=object)) % n_buckets
+            order = np.argsort(bucket, kind="stable")
+            counts = np.bincount(bucket, minlength=n_buckets)
+            table = table.take(order)
+            offset = 0
+            for b in np.flatnonzero(counts):
+                if b not in writers:
+                    writers[b] = pq.ParquetWriter(spill_dir / f"bucket-{b:04d}.parquet", schema)
+                writers[b].write_table(table.slice(offset, counts[b]))
+                offset += counts[b]
+    finally:
+        for w in writers.values():
+            w.close()
+    return sorted(spill_dir.glob("bucket-*.parquet"))
+
+
+def _iter_output_tables(path: Path, batch_rows: int = 250_000, columns: list[str] | None = None):
+    """Đọc export hiện có theo từng lô (để đưa vào spill khi incremental, hoặc dựng text store)."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    if path.is_dir():
+        for part in sorted(path.glob("part-*")):
+            yield from _iter_output_tables(part, batch_rows, columns)
+    elif path.suffix == ".parquet":
+        pf = pq.ParquetFile(path)
+        cols = None if columns is None else [c for c in columns if c in pf.schema_arrow.names]
+        for batch in pf.iter_batches(batch_size=batch_rows, columns=cols):
+            yield pa.Table.from_batches([batch])
+    elif path.suffix == ".arrow":
+        with pa.memory_map(str(path)) as src:
+            reader = pa.ipc.open_file(src)
+            cols = None if columns is None else [c for c in columns if c in reader.schema.names]
+            for i in range(reader.num_record_batches):
+                table = pa.Table.from_batches([reader.get_batch(i)])
+                yield table if cols is None else table.select(cols)
+    else:
+        usecols = None if columns is None else (lambda c: c in columns)
+        parse = [c for c in ("conversation_date", "processed_at") if columns is None or c in columns]
+        for chunk in pd.read_csv(path, chunksize=batch_rows, usecols=usecols, parse_dates=parse):
+            yield pa.Table.from_pandas(chunk, preserve_index=False)
+
+
+def _export_out_of_core(tables, schema, n_buckets: int, output: Path,
+                        spill_dir: Path | None = None) -> tuple[int, pd.Timestamp | None]:
+    """Dedup + clean + ghi output với RAM giới hạn ở cỡ một bucket.
+
+    Trả về (số rows đã ghi, processed_at lớn nhất).
+    """
+    import pyarrow.parquet as pq
+    max_ts = None
+    with tempfile.TemporaryDirectory(prefix="gold-spill-", dir=spill_dir) as tmp:
+        t0 = time.perf_counter()
+        buckets = _spill_buckets(tables, schema, n_buckets, Path(tmp))
+        print(f"  → Spill {len(buckets)} buckets trong {time.perf_counter() - t0:.1f}s")
+
+        def _chunks():
+            nonlocal max_ts
+            for path in buckets:
+                df = pq.read_table(path).to_pandas(self_destruct=True)
+                path.unlink()
+                df = _add_snippets(_clean(df), verbose=False)
+                ts = _max_processed_at(df)
+                if ts is not None and (max_ts is None or ts > max_ts):
+                    max_ts = ts
+                yield df
+
+        n = _write_output_chunks(_chunks(), output)
+    return n, max_ts
+
+
+def generate_synthetic(n: int = 350, seed: int = 42) -> pd.DataFrame:
     """Fallback: tạo dữ liệu tổng hợp."""
     sys.path.insert(0, str(Path(__file__).parent))
-    from app import _generate_synthetic_data
-    df = _generate_synthetic_data(n=350)
-    print(f"  ✓ Đã tạo {len(df)} rows dữ liệu tổng hợp")
+    from data_core import generate_synthetic_data
+    df = generate_synthetic_data(n=n, seed=seed)
+    print(f"  ✓ Đã tạo {len(df):,} rows dữ liệu tổng hợp")
     return df
 
 
+def generate_synthetic_chunks(n: int, seed: int, chunk_size: int):
+    """Như generate_synthetic() nhưng yield từng chunk để ghi thẳng ra đĩa."""
+    sys.path.insert(0, str(Path(__file__).parent))
+    from data_core import synthetic_chunks
+    t0 = time.perf_counter()
+    done = 0
+    for df in synthetic_chunks(n, seed=seed, chunk_size=chunk_size):
+        done += len(df)
+        print(f"  … {done:,}/{n:,} rows ({done / (time.perf_counter() - t0):,.0f} rows/s)")
+        yield df
+
+
+def _write_text_store(output: Path) -> None:
+    """Tách conversation_snippet của export ra TextStore (blob nén + index, xem textstore.py)."""
+    sys.path.insert(0, str(Path(__file__).parent))
+    from textstore import TextStore, store_paths
+
+    cols = ["conversation_id", "conversation_snippet"]
+    first = next(_iter_output_tables(output, batch_rows=1, columns=cols), None)
+    if first is None or "conversation_snippet" not in first.column_names:
+        print("  ℹ Export không có conversation_snippet → bỏ qua text store")
+        return
+
+    def _batches():
+        for table in _iter_output_tables(output, columns=cols):
+            df = table.to_pandas()
+            yield df["conversation_id"], df["conversation_snippet"]
+
+    stem = OUTPUT_DIR / f"{OUTPUT_STEM}.text"
+    tmp = stem.with_name(stem.name + ".tmp")
+    store = TextStore.build(_batches(), tmp)
+    for src, dst in zip(store_paths(tmp), store_paths(stem)):
+        src.replace(dst)
+    size_kb = sum(p.stat().st_size for p in store_paths(stem)) / 1024
+    print(f"  ✓ Text store: {store.n_blobs:,} đoạn text duy nhất / {len(store):,} conversations "
+          f"({size_kb:.0f} KB)")
+
+
+def _write_search_index(output: Path) -> None:
+    """Inverted index (search.py) trên các blob của text store vừa ghi."""
+    sys.path.insert(0, str(Path(__file__).parent))
+    from search import SearchIndex
+    from textstore import TextStore
+
+    stem = OUTPUT_DIR / f"{OUTPUT_STEM}.text"
+    path = OUTPUT_DIR / f"{OUTPUT_STEM}.search.npz"
+    if not TextStore.exists(stem):
+        path.unlink(missing_ok=True)
+        return
+    t0 = time.perf_counter()
+    index = SearchIndex.from_store(TextStore.open(stem))
+    tmp = path.with_name(f"{OUTPUT_STEM}.search.tmp.npz")
+    index.save(tmp)
+    tmp.replace(path)
+    print(f"  ✓ Search index: {index.n_terms:,} terms / {len(index):,} đoạn text "
+          f"({path.stat().st_size / 1024:.0f} KB, {time.perf_counter() - t0:.1f}s)")
+
+
+def _write_similar_index(workers: int) -> None:
+    """Vector index "hội thoại tương tự" (similar.py) trên các blob của text store.
+
+    Index lần trước được dùng làm cache: text không đổi giữ nguyên vector.
+    """
+    sys.path.insert(0, str(Path(__file__).parent))
+    from similar import VectorIndex
+    from textstore import TextStore
+
+    stem = OUTPUT_DIR / f"{OUTPUT_STEM}.text"
+    path = OUTPUT_DIR / f"{OUTPUT_STEM}.similar.npz"
+    if not TextStore.exists(stem):
+        path.unlink(missing_ok=True)
+        return
+    t0 = time.perf_counter()
+    cache = None
+    if path.exists():
+        try:
+            cache = VectorIndex.load(path)
+        except Exception as e:
+            print(f"  ⚠ Không đọc được similar index cũ ({e}) → dựng lại toàn bộ")
+    index = VectorIndex.from_store(TextStore.open(stem), workers=workers, cache=cache)
+    reused = 0
+    if cache is not None and index.idf is cache.idf:      # không fit lại IDF
+        reused = int(np.isin(index.hashes, cache.hashes).sum())
+    tmp = path.with_name(f"{OUTPUT_STEM}.similar.tmp.npz")
+    index.save(tmp)
+    tmp.replace(path)
+    print(f"  ✓ Similar index: {len(index):,} vectors ({reused:,} dùng lại), "
+          f"{path.stat().st_size / 1024:.0f} KB, {time.perf_counter() - t0:.1f}s")
+
+
+def _write_cube(output: Path) -> None:
+    """Dựng cube tổng hợp (cube.py) từ export, theo từng lô để không giữ cả bảng trong RAM."""
+    sys.path.insert(0, str(Path(__file__).parent))
+    import cube as cb
+
+    t0 = time.perf_counter()
+    parts = [cb.build_cube(t.to_pandas()) for t in _iter_output_tables(output, columns=cb.SOURCE_COLS)]
+    if not parts:
+        return
+    cube = cb.combine(parts)
+    path = OUTPUT_DIR / f"{OUTPUT_STEM}.cube.parquet"
+    cube.to_parquet(path, engine="pyarrow", compression="zstd", index=False)
+    print(f"  ✓ Cube: {len(cube):,} rows tổng hợp ({path.stat().st_size / 1024:.0f} KB, "
+          f"{time.perf_counter() - t0:.1f}s)")
+
+
+def _write_synthetic_shard(job: tuple) -> int:
+    """Chạy trong process con: sinh shard ``i`` và ghi ``part-{i:05d}``."""
+    i, n, seed, shard_size, out_dir, ext = job
+    sys.path.insert(0, str(Path(__file__).parent))
+    from data_core import synthetic_chunk
+    df = synthetic_chunk(i, n, seed, shard_size)
+    _write_output(df, out_dir / f"part-{i:05d}{ext}")
+    return len(df)
+
+
+def generate_synthetic_sharded(n: int, seed: int, shards: int, workers: int,
+                               output_dir: Path, ext: str) -> int:
+    """Sinh ``n`` rows thành ``shards`` file trong ``output_dir``, song song nhiều process.
+
+    Shard i = _synthetic_chunk(i, n, seed, ceil(n / shards)): nội dung mỗi file chỉ
+    phụ thuộc (n, seed, shards), không phụ thuộc số workers.
+    """
+    shard_size = -(-n // max(1, shards))
+    n_shards = -(-n // shard_size)
+    workers = max(1, min(workers, n_shards, os.cpu_count() or 1))
+    tmp = output_dir.with_name(output_dir.name + ".tmp")
+    if tmp.exists():
+        shutil.rmtree(tmp)
+    tmp.mkdir(parents=True)
+
+    jobs = [(i, n, seed, shard_size, tmp, ext) for i in range(n_shards)]
+    t0, done = time.perf_counter(), 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for rows in pool.map(_write_synthetic_shard, jobs):
+            done += rows
+            print(f"  … {done:,}/{n:,} rows ({done / (time.perf_counter() - t0):,.0f} rows/s, "
+                  f"{workers} processes)")
+
+    if output_dir.exists():
+        shutil.rmtree(output_dir)
+    tmp.rename(output_dir)
+    return done
+
+
 # ── Main ───────────────────────────────────────────────────────────────────────
 def main():
     parser = argparse.ArgumentParser(description="Export Gold table cho Streamlit Demo")
     parser.add_argument("--lakehouse", type=str, help="Đường dẫn tới lakehouse root")
     parser.add_argument("--synthetic", action="store_true", help="Dùng dữ liệu tổng hợp thay vì Gold table")
     parser.add_argument("--n", type=int, default=350, help="Số rows nếu dùng synthetic (default: 350)")
+    parser.add_argument("--seed", type=int, default=42, help="Seed cho synthetic (default: 42)")
+    parser.add_argument("--chunk-size", type=int, default=None,
+                        help="Synthetic: sinh và ghi từng chunk N rows thay vì giữ cả DataFrame")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"Số thread đọc Gold / số process sinh synthetic shard (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--shards", type=int, default=None,
+                        help="Synthetic: chia thành N shard, ghi dataset data/conversations/part-*")
+    parser.add_argument("--format", choices=list(FORMATS), default="parquet",
+                        help="Định dạng output (default: parquet)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Chỉ đọc file Gold mới/đổi kể từ lần export trước (theo watermark)")
+    parser.add_argument("--mem-budget-mb", type=float, default=None,
+                        help="Giới hạn RAM cho dedup; Gold lớn hơn sẽ được dedup out-of-core")
+    parser.add_argument("--version", type=int, default=None,
+                        help="Delta time travel: export đúng snapshot ở version này")
+    parser.add_argument("--as-of", type=str, default=None,
+                        help="Delta time travel: snapshot mới nhất tại thời điểm này "
+                             "(vd. 2026-01-31, 2026-01-31T07:00+07:00; không ghi múi giờ = UTC)")
+    parser.add_argument("--spill-dir", type=str, default=None,
+                        help="Thư mục chứa spill buckets (default: thư mục tạm của hệ thống)")
     args = parser.parse_args()
+    if args.as_of is not None:
+        try:
+            pd.Timestamp(args.as_of)
+        except ValueError:
+            parser.error(f"--as-of không phải thời điểm hợp lệ: {args.as_of!r}")
+    if args.version is not None and args.version < 0:
+        parser.error(f"--version phải ≥ 0 (nhận {args.version})")
 
     print("=" * 55)
     print("  Chat Analytics — Data Export for Streamlit Demo")
     print("=" * 55)
 
-    OUTPUT.parent.mkdir(parents=True, exist_ok=True)
+    output = (OUTPUT_DIR / OUTPUT_STEM) if args.synthetic and args.shards else _output_path(args.format)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    wm_path = OUTPUT_DIR / f"{OUTPUT_STEM}.watermark.json"
 
     df = None
+    gold_path = None
+    gold_stats = None
+    n_rows = None   # set khi output đã được ghi theo kiểu streaming (out-of-core)
+    max_ts = None
 
     if args.synthetic:
         print("ℹ Chế độ synthetic được chọn.")
-        df = generate_synthetic()
+        if args.shards:
+            n_rows = generate_synthetic_sharded(args.n, args.seed, args.shards, args.workers,
+                                                output, FORMATS[args.format])
+        elif args.chunk_size:
+            n_rows = _write_output_chunks(
+                generate_synthetic_chunks(args.n, args.seed, args.chunk_size), output)
+        else:
+            df = generate_synthetic(args.n, args.seed)
 
     else:
         # Try explicit path first
@@ -165,32 +845,92 @@ def main():
         else:
             paths_to_try = POSSIBLE_PATHS
 
+        wm = _load_watermark(wm_path) if args.incremental else None
+        changed = None
         for p in paths_to_try:
             if str(p) == "__NONE__" or not p.exists():
                 continue
             print(f"🔍 Thử đọc Gold table tại: {p}")
-            df = _read_gold(p)
+            try:
+                files = _find_parquet_files(p, args.version, args.as_of)
+            except ValueError as e:
+                # Version / thời điểm ngoài phạm vi của Delta log: dừng, không export nhầm snapshot
+                sys.exit(f"❌ {e}")
+            if not files:
+                print(f"  ✗ Không tìm thấy dữ liệu")
+                continue
+            stats = _file_stats(files, p / GOLD_SUBPATH)
+            if args.incremental:
+                changed = _changed_files(wm, p / GOLD_SUBPATH, output, stats)
+                if changed is not None:
+                    print(f"  → Incremental: {len(changed)}/{len(files)} file mới hoặc đã đổi")
+                    if not changed:
+                        print("\n✅ Không có gì mới — giữ nguyên export hiện tại.")
+                        return
+                    files = [(p / GOLD_SUBPATH).joinpath(f) for f in changed]
+            if args.mem_budget_mb:
+                est = _estimate_bytes(files + ([output] if changed is not None else []))
+                n_buckets = _n_buckets(est, args.mem_budget_mb)
+                if n_buckets > 1:
+                    print(f"  → Out-of-core: ~{est / 1e6:,.0f} MB Arrow, budget "
+                          f"{args.mem_budget_mb:,.0f} MB → {n_buckets} spill buckets")
+                    tables = (t for t, _ in _iter_gold_tables(files, args.workers))
+                    if changed is not None:
+                        tables = chain(_iter_output_tables(output), tables)
+                    n_rows, max_ts = _export_out_of_core(
+                        tables, _spill_schema(files), n_buckets, output,
+                        Path(args.spill_dir) if args.spill_dir else None,
+                    )
+                    if n_rows:
+                        gold_path, gold_stats = p / GOLD_SUBPATH, stats
+                        break
+                    print(f"  ✗ Không tìm thấy dữ liệu")
+                    n_rows = None
+                    continue
+            df = _read_gold(p, workers=args.workers, files=files)
             if df is not None and len(df) > 0:
                 print(f"  ✓ Đọc được {len(df)} rows")
+                gold_path, gold_stats = p / GOLD_SUBPATH, stats
                 break
             else:
                 print(f"  ✗ Không tìm thấy dữ liệu")
 
-        if df is None or len(df) == 0:
+        if n_rows:
+            print(f"  ✓ Sau khi dedup out-of-core: {n_rows:,} rows")
+        elif df is None or len(df) == 0:
+            if args.version is not None or args.as_of is not None:
+                sys.exit("❌ Snapshot đã chọn (--version/--as-of) không có dữ liệu Gold — "
+                         "giữ nguyên export hiện tại.")
             print("\n⚠ Không tìm thấy Gold table. Dùng dữ liệu tổng hợp...")
-            df = generate_synthetic()
+            df = generate_synthetic(args.n, args.seed)
         else:
             print("\n🧹 Đang làm sạch và anonymize...")
             df = _clean(df)
             df = _add_snippets(df)
             print(f"  ✓ Sau khi clean: {len(df)} rows, {len(df.columns)} cột")
+            if changed is not None:
+                existing = _read_output(output)
+                n_before = len(existing)
+                df = _merge_incremental(existing, df)
+                print(f"  ✓ Merge vào export cũ: {n_before:,} → {len(df):,} rows")
 
     # Save
-    df.to_csv(OUTPUT, index=False)
-    size_kb = OUTPUT.stat().st_size / 1024
-    print(f"\n✅ Đã lưu → {OUTPUT}  ({size_kb:.0f} KB, {len(df):,} rows)")
+    if n_rows is None:
+        _write_output(df, output)
+        n_rows, max_ts = len(df), _max_processed_at(df)
+    _remove_stale_outputs(keep=output)
+    _write_text_store(output)
+    _write_search_index(output)
+    _write_similar_index(args.workers)
+    _write_cube(output)
+    if gold_path is not None:
+        _save_watermark(wm_path, max_ts, gold_path, gold_stats, output)
+    elif wm_path.exists():
+        wm_path.unlink()  # export không còn đến từ Gold
+    size_kb = _output_size(output) / 1024
+    print(f"\n✅ Đã lưu → {output}  ({size_kb:.0f} KB, {n_rows:,} rows)")
     print("\nBước tiếp theo:")
-    print("  1. git add data/conversations.csv")
+    print(f"  1. git add data/{output.name}")
     print("  2. git commit -m 'Add demo data'")
     print("  3. Deploy lên Streamlit Cloud:")
     print("     App file  :  streamlit_demo/app.py")
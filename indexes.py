@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+indexes.py — Index dựng 1 lần lúc load để lọc không phải quét cả bảng
+=====================================================================
+DateStoreIndex: DataFrame đã sort theo conversation_date, kèm vị trí row của
+từng cửa hàng (cũng theo thứ tự ngày). Khoảng ngày = 2 lần binary search:
+
+    tất cả cửa hàng → slice(l, r)   (vị trí liên tục, không dựng mảng)
+    1 cửa hàng      → pos[l:r]      (tra dict + binary search trên pos)
+
+BitmapIndex: mỗi giá trị của mỗi chiều Explorer là 1 bitmap (1 bit / row). Lọc
+nhiều chiều = AND/OR các bitmap, đếm facet = popcount, không so sánh chuỗi.
+"""
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+
+_ONE_DAY = np.timedelta64(1, "D")
+
+
+class DateStoreIndex:
+    """Index ngày × cửa hàng cho DataFrame đã sort tăng dần theo conversation_date."""
+
+    def __init__(self, df: pd.DataFrame):
+        dates = df["conversation_date"].to_numpy(dtype="datetime64[ns]")
+        if len(dates) > 1 and not (dates[1:] >= dates[:-1])[~np.isnat(dates[1:])].all():
+            raise ValueError("DateStoreIndex cần DataFrame đã sort theo conversation_date")
+        self._dates = dates
+        self._n_valid = int((~np.isnat(dates)).sum())   # NaT nằm cuối sau khi sort
+
+        codes, uniques = pd.factorize(df["page_name"], sort=True)
+        itype = np.int32 if len(df) < 2**31 else np.int64
+        order = np.argsort(codes, kind="stable").astype(itype)   # theo cửa hàng, trong đó theo ngày
+        bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+        self._pos = {
+            str(p): order[bounds[i]:bounds[i + 1]] for i, p in enumerate(uniques)
+        }
+        self._page_dates = {p: dates[pos] for p, pos in self._pos.items()}
+
+    def __len__(self) -> int:
+        return len(self._dates)
+
+    @property
+    def pages(self) -> list[str]:
+        return list(self._pos)
+
+    @property
+    def date_bounds(self) -> tuple[Optional[pd.Timestamp], Optional[pd.Timestamp]]:
+        if not self._n_valid:
+            return None, None
+        return pd.Timestamp(self._dates[0]), pd.Timestamp(self._dates[self._n_valid - 1])
+
+    @property
+    def nbytes(self) -> int:
+        return (sum(p.nbytes for p in self._pos.values())
+                + sum(d.nbytes for d in self._page_dates.values()))
+
+    def positions(self, d0: Optional[pd.Timestamp] = None, d1: Optional[pd.Timestamp] = None,
+                  page: Optional[str] = None) -> Union[slice, np.ndarray]:
+        """Vị trí row thoả [d0, d1] (tính trọn ngày d1) và cửa hàng ``page``.
+
+        Không lọc cửa hàng → ``slice``; có cửa hàng → mảng vị trí (tăng dần).
+        """
+        dates = self._dates if page is None else self._page_dates.get(page)
+        if dates is None:
+            return np.empty(0, dtype=np.int64)
+        n = self._n_valid if page is None else len(dates)
+        lo, hi = 0, n
+        if d0 is not None:
+            lo = int(np.searchsorted(dates[:n], np.datetime64(d0, "ns"), side="left"))
+        if d1 is not None:
+            hi = int(np.searchsorted(dates[:n], np.datetime64(d1, "ns") + _ONE_DAY, side="left"))
+        if page is None:
+            if d0 is None and d1 is None:
+                return slice(0, len(self._dates))
+            return slice(lo, hi)
+        return self._pos[page][lo:hi]
+
+    def count(self, d0: Optional[pd.Timestamp] = None, d1: Optional[pd.Timestamp] = None,
+              page: Optional[str] = None) -> int:
+        """Số row thoả bộ lọc — không cần dựng mảng vị trí hay DataFrame."""
+        pos = self.positions(d0, d1, page)
+        return pos.stop - pos.start if isinstance(pos, slice) else len(pos)
+
+
+# ─── Bitmap index cho Explorer nhiều chiều ────────────────────────────────────
+if hasattr(np, "bitwise_count"):                       # numpy >= 2.0
+    def _popcount(words: np.ndarray) -> int:
+        return int(np.bitwise_count(words).sum())
+else:
+    _POP8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def _popcount(words: np.ndarray) -> int:
+        return int(_POP8[words.view(np.uint8)].sum(dtype=np.int64))
+
+
+def _pack(mask: np.ndarray) -> np.ndarray:
+    """Mảng bool → bitmap uint64 (bit i = row i)."""
+    packed = np.packbits(mask, bitorder="little")
+    pad = -len(packed) % 8
+    if pad:
+        packed = np.concatenate([packed, np.zeros(pad, dtype=np.uint8)])
+    return packed.view(np.uint64)
+
+
+class BitmapIndex:
+    """Bitmap theo từng giá trị của mỗi chiều — lọc AND/OR và đếm facet bằng popcount.
+
+    Giá trị được so sánh dạng chuỗi (như ``astype(str)``); NaN và các giá trị trong
+    ``skip`` / dài từ 50 ký tự không có bitmap. Bitmap tốn ~n/8 bytes mỗi giá trị.
+    """
+
+    def __init__(self, df: pd.DataFrame, dims: list[str], skip: frozenset = frozenset()):
+        self.n = len(df)
+        self._bits: dict[str, dict[str, np.ndarray]] = {}
+        for dim in dims:
+            if dim not in df.columns:
+                continue
+            codes, uniques = pd.factorize(df[dim])
+            labels = pd.Index(uniques).astype(str)
+            lab_codes, names = pd.factorize(labels)           # gộp các giá trị trùng chuỗi
+            codes = np.where(codes >= 0, lab_codes[np.maximum(codes, 0)], -1)
+            counts = np.bincount(codes[codes >= 0], minlength=len(names))
+            bits = {}
+            for k in np.argsort(-counts, kind="stable"):       # giảm dần như value_counts
+                name = str(names[k])
+                if counts[k] and name not in skip and len(name) < 50:
+                    bits[name] = _pack(codes == k)
+            if bits:
+                self._bits[dim] = bits
+
+    @property
+    def dims(self) -> list[str]:
+        return list(self._bits)
+
+    def values(self, dim: str) -> list[str]:
+        return list(self._bits.get(dim, {}))
+
+    @property
+    def nbytes(self) -> int:
+        return sum(b.nbytes for bits in self._bits.values() for b in bits.values())
+
+    def mask(self, positions: Union[slice, np.ndarray]) -> np.ndarray:
+        """Bitmap của các row ở ``positions`` (kết quả DateStoreIndex.positions)."""
+        m = np.zeros(self.n, dtype=bool)
+        m[positions] = True
+        return _pack(m)
+
+    def _any(self, dim: str, values) -> np.ndarray:
+        bits = self._bits[dim]
+        out = np.zeros_like(next(iter(bits.values())))
+        for v in values:
+            if v in bits:
+                out |= bits[v]
+        return out
+
+    def match(self, selection: dict, base: np.ndarray) -> np.ndarray:
+        """Bitmap row thuộc ``base`` và khớp mọi chiều trong ``selection`` (OR trong 1 chiều)."""
+        out = base.copy()
+        for dim, values in selection.items():
+            if values and dim in self._bits:
+                out &= self._any(dim, values)
+        return out
+
+    def facet_counts(self, selection: dict, base: np.ndarray) -> dict[str, dict[str, int]]:
+        """Số row cho từng giá trị của mỗi chiều, với bộ lọc của các chiều *khác*."""
+        sel = {d: self._any(d, v) for d, v in selection.items() if v and d in self._bits}
+        out = {}
+        for dim, bits in self._bits.items():
+            ctx = base.copy()
+            for d, b in sel.items():
+                if d != dim:
+                    ctx &= b
+            out[dim] = {v: _popcount(ctx & b) for v, b in bits.items()}
+        return out
+
+    def count(self, words: np.ndarray) -> int:
+        return _popcount(words)
+
+    def rows(self, words: np.ndarray) -> np.ndarray:
+        """Vị trí các row có bit bật (tăng dần)."""
+        return np.flatnonzero(np.unpackbits(words.view(np.uint8), count=self.n, bitorder="little"))
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+memo.py — Memo LRU cho view đã lọc và aggregate của từng tab
+=============================================================
+Mỗi lần tương tác widget Streamlit chạy lại cả script. Bộ lọc sidebar (khoảng
+ngày + cửa hàng) hiếm khi đổi, nên view đã lọc và aggregate của mỗi tab được
+giữ lại theo key:
+
+    (fingerprint(data version, d0, d1, page), tên, tham số phụ...)
+
+Bộ nhớ có giới hạn (``CHAT_MEMO_MB``, mặc định 256 MB), tính trên bytes của
+chính các entry: vượt quá thì bỏ entry dùng lâu nhất. Có ``budget``
+(memory.Budget) thì RSS của process là tín hiệu phụ: khi RSS + entry mới vượt
+ngân sách, giới hạn tạm hạ xuống bằng phần vượt nhưng không dưới ``min_bytes``
+(mặc định 1/8 giới hạn). Không hạ về 0 vì bỏ entry không chắc làm RSS giảm
+tương ứng (allocator giữ lại arena, mmap…), và dataset một mình đã vượt ngân
+sách thì memo vẫn cache được trong phần sàn đó.
+Một Memo được dùng chung cho mọi session (st.cache_resource), nên các thao tác
+trên dict đều nằm trong lock.
+"""
+import hashlib
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_MAX_MB = 256
+
+
+def fingerprint(*parts) -> str:
+    """Chuỗi hash ngắn, ổn định cho (data version, d0, d1, page…)."""
+    return hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def sizeof(obj: Any) -> int:
+    """Ước lượng bytes của 1 giá trị trong memo (không tính sâu string trong object column)."""
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=False).sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(index=True, deep=False))
+    if isinstance(obj, pd.Index):
+        return int(obj.memory_usage(deep=False))
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(sizeof(v) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sys.getsizeof(obj) + sum(sizeof(v) for v in obj)
+    return sys.getsizeof(obj)
+
+
+class Memo:
+    """Dict LRU giới hạn theo bytes, an toàn khi nhiều session dùng chung."""
+
+    def __init__(self, max_bytes: int, budget=None, min_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes
+        self.min_bytes = max_bytes // 8 if min_bytes is None else min(min_bytes, max_bytes)
+        self.budget = budget
+        self._items: "OrderedDict[Hashable, tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.refused = 0
+
+    @classmethod
+    def from_env(cls, var: str = "CHAT_MEMO_MB", default_mb: float = DEFAULT_MAX_MB,
+                 budget=None) -> "Memo":
+        """Memo với giới hạn đọc từ biến môi trường ``var`` (MB)."""
+        return cls(int(float(os.environ.get(var, default_mb)) * 2**20), budget)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def get(self, key: Hashable, compute: Callable[[], Any],
+            sizer: Optional[Callable[[Any], int]] = None) -> Any:
+        """Giá trị của ``key``; chưa có thì gọi ``compute()`` (ngoài lock) rồi lưu lại.
+
+        ``sizer(value)`` thay cho sizeof với giá trị sizeof không ước lượng được (vd. figure).
+        """
+        with self._lock:
+            hit = self._items.get(key)
+            if hit is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return hit[0]
+            self.misses += 1
+        value = compute()
+        self.put(key, value, sizer(value) if sizer else None)
+        return value
+
+    def put(self, key: Hashable, value: Any, size: Optional[int] = None):
+        if size is None:
+            size = sizeof(value)
+        excess = self.budget.excess(size) if self.budget is not None else 0
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            cap = self.max_bytes
+            if excess:
+                # RSS sắp vượt ngân sách: hạ giới hạn, nhưng giữ sàn min_bytes (xem docstring module)
+                cap = max(self.min_bytes, min(cap, self._bytes + size - excess))
+            if size > cap:
+                if excess:
+                    self.refused += 1
+                return                      # lớn hơn giới hạn hiện tại: không giữ
+            self._items[key] = (value, size)
+            self._bytes += size
+            self._evict(self._bytes - cap)
+
+    def _evict(self, n_bytes: int) -> int:
+        """Bỏ entry dùng lâu nhất cho tới khi giải phóng ≥ ``n_bytes`` (gọi trong lock)."""
+        freed = 0
+        while freed < n_bytes and self._items:
+            _, (_, s) = self._items.popitem(last=False)
+            self._bytes -= s
+            freed += s
+            self.evictions += 1
+        return freed
+
+    def entries(self) -> list[tuple[Hashable, int]]:
+        """(key, bytes) của mọi entry, từ dùng lâu nhất tới mới nhất."""
+        with self._lock:
+            return [(k, s) for k, (_, s) in self._items.items()]
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+memory.py — Đo bộ nhớ của process / container và ngân sách bộ nhớ cho cache
+===========================================================================
+Nhiều session chạy chung 1 container: dữ liệu + index (st.cache_resource) được
+dùng chung, còn memo (memo.py) lớn dần theo số bộ lọc / chart / conversation đã
+xem. Module này cho biết bộ nhớ đang đi đâu và đặt trần cho phần lớn dần:
+
+    RSS process       /proc/self/status (VmRSS)
+    container         cgroup v2 memory.current / memory.max (v1: memory.usage_in_bytes / limit_in_bytes)
+    ngân sách         CHAT_MEM_BUDGET_MB; không đặt thì 85% giới hạn container (nếu có)
+
+Memo gắn Budget hạ giới hạn của nó (bỏ entry cũ nhất) khi RSS + entry mới vượt
+ngân sách, nhưng không dưới 1 mức sàn — xem docstring memo.py.
+"""
+import os
+import weakref
+from pathlib import Path
+from typing import Any, Optional
+
+import pandas as pd
+
+BUDGET_VAR      = "CHAT_MEM_BUDGET_MB"
+BUDGET_FRACTION = 0.85
+
+_CGROUP_FILES = [
+    ("/sys/fs/cgroup/memory.current", "/sys/fs/cgroup/memory.max"),
+    ("/sys/fs/cgroup/memory/memory.usage_in_bytes", "/sys/fs/cgroup/memory/memory.limit_in_bytes"),
+]
+_NO_LIMIT = 1 << 60                    # cgroup v1 ghi số rất lớn khi không giới hạn
+
+
+def _read_int(path: str) -> Optional[int]:
+    try:
+        text = Path(path).read_text().strip()
+    except OSError:
+        return None
+    return int(text) if text.isdigit() else None     # "max" = không giới hạn
+
+
+def rss_bytes() -> Optional[int]:
+    """RSS hiện tại của process (bytes), None nếu không đọc được."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource                                   # không có /proc: dùng đỉnh RSS
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except (ImportError, OSError):
+        return None
+
+
+def cgroup_memory() -> tuple[Optional[int], Optional[int]]:
+    """(đang dùng, giới hạn) của container theo cgroup; None nếu không có / không giới hạn."""
+    for cur, lim in _CGROUP_FILES:
+        usage, limit = _read_int(cur), _read_int(lim)
+        if usage is not None or limit is not None:
+            return usage, limit if limit is not None and limit < _NO_LIMIT else None
+    return None, None
+
+
+def budget_bytes() -> Optional[int]:
+    """Ngân sách bộ nhớ: CHAT_MEM_BUDGET_MB, không thì 85% giới hạn container, không thì None."""
+    mb = os.environ.get(BUDGET_VAR)
+    if mb:
+        return int(float(mb) * 2**20)
+    _, limit = cgroup_memory()
+    return int(limit * BUDGET_FRACTION) if limit else None
+
+
+class Budget:
+    """Trần RSS cho phần cache lớn dần (xem docstring module)."""
+
+    def __init__(self, limit: Optional[int]):
+        self.limit = limit
+
+    @classmethod
+    def from_env(cls) -> "Budget":
+        return cls(budget_bytes())
+
+    def excess(self, extra: int = 0) -> int:
+        """Số bytes vượt ngân sách nếu thêm ``extra`` bytes (0 nếu còn chỗ / không đặt trần)."""
+        if not self.limit:
+            return 0
+        rss = rss_bytes()
+        return max(0, rss + extra - self.limit) if rss is not None else 0
+
+
+# ─── Báo cáo ──────────────────────────────────────────────────────────────────
+def frame_report(df: pd.DataFrame) -> pd.DataFrame:
+    """Bytes của từng cột (tính cả string trong cột object), giảm dần."""
+    usage = df.memory_usage(index=True, deep=True)
+    dtypes = df.dtypes.astype(str).reindex(usage.index).fillna("index")
+    out = pd.DataFrame({"column": usage.index, "dtype": dtypes.to_numpy(), "bytes": usage.to_numpy()})
+    return out.sort_values("bytes", ascending=False, ignore_index=True)
+
+
+_TRACKED: "weakref.WeakValueDictionary[str, Any]" = weakref.WeakValueDictionary()
+
+
+def track(name: str, obj: Any) -> Any:
+    """Ghi nhận 1 resource đã load để báo cáo (weakref: hết cache thì tự rơi khỏi báo cáo)."""
+    if isinstance(obj, tuple):
+        for i, part in enumerate(obj):
+            track(f"{name}[{i}]", part)
+        return obj
+    try:
+        _TRACKED[name] = obj
+    except TypeError:                                     # int, str… không weakref được
+        pass
+    return obj
+
+
+def nbytes_of(obj: Any) -> int:
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=True).sum())
+    return int(getattr(obj, "nbytes", 0))
+
+
+def resources_report() -> pd.DataFrame:
+    """Bytes của các resource đã track (chỉ những cái đang được giữ trong cache)."""
+    items = sorted(((name, nbytes_of(obj)) for name, obj in list(_TRACKED.items())),
+                   key=lambda x: -x[1])
+    return pd.DataFrame(items, columns=["resource", "bytes"])
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+perf.py — Đo thời gian từng phase của 1 lần rerun (bật bằng ?debug=perf hoặc CHAT_PERF=1)
+=========================================================================================
+Mỗi rerun có 1 Recorder gắn vào thread đang chạy script (mỗi session Streamlit
+chạy script trong thread riêng). Code đo bằng:
+
+    with perf.span("render_overview"):
+        ...
+    perf.annotate(cache="miss")          # gắn thêm thông tin vào span đang mở
+
+Khi tắt, span() trả về 1 context rỗng dùng chung — chỉ tốn 1 lần tra thread-local.
+Cuối rerun, finish() ghi 1 dòng JSON vào CHAT_PERF_LOG (mặc định perf.jsonl cạnh
+app.py) để phân tích offline.
+"""
+import contextlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+ENV_VAR  = "CHAT_PERF"
+LOG_VAR  = "CHAT_PERF_LOG"
+LOG_FILE = Path(__file__).parent / "perf.jsonl"
+
+_NULL = contextlib.nullcontext()
+_local = threading.local()
+_log_lock = threading.Lock()
+
+
+def env_enabled() -> bool:
+    return os.environ.get(ENV_VAR, "").lower() in ("1", "true", "yes", "on")
+
+
+class Recorder:
+    """Các span (tên, bắt đầu, thời lượng, thông tin thêm) của 1 lần rerun."""
+
+    def __init__(self, **meta):
+        self.meta = meta
+        self.spans: list[dict] = []
+        self._open: list[dict] = []
+        self._t0 = time.perf_counter()
+        self.total_ms: Optional[float] = None
+
+    def _ms(self, t: float) -> float:
+        return round((t - self._t0) * 1000, 3)
+
+
+class _Span:
+    __slots__ = ("rec", "entry", "t0")
+
+    def __init__(self, rec: Recorder, name: str, meta: dict):
+        self.rec = rec
+        self.entry = {"name": name, "depth": len(rec._open), **meta}
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        self.entry["start_ms"] = self.rec._ms(self.t0)
+        self.rec._open.append(self.entry)
+        self.rec.spans.append(self.entry)
+        return self.entry
+
+    def __exit__(self, *exc):
+        self.entry["ms"] = round((time.perf_counter() - self.t0) * 1000, 3)
+        self.rec._open.pop()
+        return False
+
+
+def start(enabled: bool, **meta) -> Optional[Recorder]:
+    """Bắt đầu đo rerun hiện tại (``enabled`` False: tắt đo cho thread này)."""
+    _local.rec = Recorder(**meta) if enabled else None
+    return _local.rec
+
+
+def current() -> Optional[Recorder]:
+    return getattr(_local, "rec", None)
+
+
+def span(name: str, **meta):
+    """Context manager đo 1 phase; không làm gì khi đang tắt."""
+    rec = getattr(_local, "rec", None)
+    if rec is None:
+        return _NULL
+    return _Span(rec, name, meta)
+
+
+def annotate(**meta):
+    """Gắn thông tin vào span trong cùng đang mở (vd. cache hit/miss)."""
+    rec = getattr(_local, "rec", None)
+    if rec is not None and rec._open:
+        rec._open[-1].update(meta)
+
+
+def finish(log: bool = True) -> Optional[Recorder]:
+    """Kết thúc rerun: tính tổng thời gian, ghi 1 dòng JSONL. Trả về Recorder (hoặc None)."""
+    rec = getattr(_local, "rec", None)
+    _local.rec = None                             # fragment rerun sau đó không ghi vào rec cũ
+    if rec is None:
+        return None
+    rec.total_ms = rec._ms(time.perf_counter())
+    if log:
+        line = json.dumps({"ts": time.strftime("%Y-%m-%dT%H:%M:%S"), **rec.meta,
+                           "total_ms": rec.total_ms, "spans": rec.spans},
+                          ensure_ascii=False, default=str)
+        path = Path(os.environ.get(LOG_VAR, LOG_FILE))
+        try:
+            with _log_lock, open(path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except OSError:
+            pass                                  # thư mục chỉ đọc: vẫn hiện panel
+    return rec
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+search.py — Inverted index + BM25 trên nội dung hội thoại
+==========================================================
+Index theo blob của TextStore (mỗi đoạn text duy nhất 1 lần), không theo row:
+
+    terms     — token đã sort (bỏ dấu tiếng Việt, chữ thường)
+    offsets   — posting list của term i là postings[offsets[i]:offsets[i+1]]
+    postings  — blob id (int32, tăng dần trong mỗi term)
+    tfs       — số lần term xuất hiện trong blob (uint16)
+    doc_len   — số token của mỗi blob (cho BM25)
+
+Query = các token đều phải có (AND), xếp hạng BM25. Không quét cột text khi
+tìm: chỉ giao các posting list rồi tính điểm trên các blob còn lại.
+"""
+import re
+import unicodedata
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_MARKS_RE = re.compile("[\u0300-\u036f]")
+_K1, _B = 1.2, 0.75
+
+
+def fold(text: str) -> str:
+    """Chữ thường, bỏ dấu tiếng Việt: "Bảo hành Đổi" → "bao hanh doi"."""
+    text = unicodedata.normalize("NFD", text.lower())
+    return _MARKS_RE.sub("", text).replace("đ", "d")
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN_RE.findall(fold(text))
+
+
+class SearchIndex:
+    """Inverted index blob-level với xếp hạng BM25 (xem docstring module)."""
+
+    def __init__(self, terms: np.ndarray, offsets: np.ndarray, postings: np.ndarray,
+                 tfs: np.ndarray, doc_len: np.ndarray):
+        self._terms    = terms
+        self._offsets  = offsets
+        self._postings = postings
+        self._tfs      = tfs
+        self._doc_len  = doc_len
+        self._avgdl    = float(doc_len.mean()) if len(doc_len) else 0.0
+        self._vocab    = {t: i for i, t in enumerate(terms.tolist())}
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    @property
+    def n_terms(self) -> int:
+        return len(self._terms)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self._terms, self._offsets, self._postings,
+                                      self._tfs, self._doc_len))
+
+    # ── Build / save / load ───────────────────────────────────────────────────
+    @classmethod
+    def build(cls, texts: Iterable[str]) -> "SearchIndex":
+        """Dựng index từ các text theo thứ tự blob id (0, 1, 2, ...)."""
+        vocab: dict[str, int] = {}
+        term_ids, blob_ids, tfs = array("i"), array("i"), array("H")
+        doc_len = array("I")
+        for blob, text in enumerate(texts):
+            toks = tokenize(text or "")
+            doc_len.append(len(toks))
+            for tok, tf in Counter(toks).items():
+                term_ids.append(vocab.setdefault(tok, len(vocab)))
+                blob_ids.append(blob)
+                tfs.append(min(tf, 65535))
+
+        term_ids = np.frombuffer(term_ids, dtype=np.int32)
+        blob_ids = np.frombuffer(blob_ids, dtype=np.int32)
+        tfs = np.frombuffer(tfs, dtype=np.uint16)
+        terms = np.array(list(vocab), dtype=str)
+        rank = np.empty(len(terms), dtype=np.int32)            # term id → vị trí sau khi sort
+        rank[np.argsort(terms, kind="stable")] = np.arange(len(terms), dtype=np.int32)
+        term_ids = rank[term_ids] if len(term_ids) else term_ids
+        order = np.lexsort((blob_ids, term_ids))
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids, minlength=len(terms)), out=offsets[1:])
+        return cls(np.sort(terms), offsets, blob_ids[order].copy(), tfs[order].copy(),
+                   np.frombuffer(doc_len, dtype=np.uint32).copy())
+
+    @classmethod
+    def from_store(cls, store) -> "SearchIndex":
+        """Index trên mọi blob của một TextStore."""
+        return cls.build(store.text(b) for b in range(store.n_blobs))
+
+    def save(self, path: Path):
+        np.savez(path, terms=self._terms, offsets=self._offsets, postings=self._postings,
+                 tfs=self._tfs, doc_len=self._doc_len)
+
+    @classmethod
+    def load(cls, path: Path) -> "SearchIndex":
+        with np.load(path) as z:
+            return cls(z["terms"], z["offsets"], z["postings"], z["tfs"], z["doc_len"])
+
+    # ── Query ─────────────────────────────────────────────────────────────────
+    def search(self, query: str) -> tuple[np.ndarray, np.ndarray]:
+        """(blob ids, điểm BM25) của các blob chứa mọi token trong ``query``, điểm giảm dần."""
+        empty = np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float64)
+        toks = list(dict.fromkeys(tokenize(query)))
+        if not toks or not len(self):
+            return empty
+        ids = [self._vocab.get(t) for t in toks]
+        if any(i is None for i in ids):
+            return empty
+
+        # Giao posting list từ ngắn đến dài
+        ids.sort(key=lambda i: self._offsets[i + 1] - self._offsets[i])
+        blobs = self._postings[self._offsets[ids[0]]:self._offsets[ids[0] + 1]]
+        for i in ids[1:]:
+            blobs = np.intersect1d(blobs, self._postings[self._offsets[i]:self._offsets[i + 1]],
+                                   assume_unique=True)
+            if not len(blobs):
+                return empty
+
+        n_docs = len(self)
+        norm = _K1 * (1 - _B + _B * self._doc_len[blobs] / (self._avgdl or 1.0))
+        scores = np.zeros(len(blobs))
+        for i in ids:
+            plist = self._postings[self._offsets[i]:self._offsets[i + 1]]
+            tf = self._tfs[self._offsets[i]:self._offsets[i + 1]][np.searchsorted(plist, blobs)]
+            idf = np.log(1 + (n_docs - len(plist) + 0.5) / (len(plist) + 0.5))
+            scores += idf * tf * (_K1 + 1) / (tf + norm)
+        order = np.argsort(-scores, kind="stable")
+        return blobs[order], scores[order]
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+similar.py — Vector index cho "hội thoại tương tự" (char n-gram TF-IDF + LSH)
+=============================================================================
+Mỗi blob của TextStore (đoạn text duy nhất) thành 1 vector dense:
+
+    text → bỏ dấu, chữ thường (search.tokenize) → char 3-gram + 4-gram (số nguyên,
+    không hash chuỗi trong Python) → TF-IDF (1 + log tf) · idf → signed feature
+    hashing xuống DIM chiều → chuẩn hoá L2 → float16
+
+Tìm gần đúng bằng random-hyperplane LSH: N_TABLES bảng, mỗi bảng N_BITS bit dấu;
+ứng viên = các blob cùng bucket ở ít nhất 1 bảng, rồi xếp hạng lại bằng cosine.
+
+Build tăng dần: bảng IDF được fit 1 lần và lưu cùng index. Lần export sau,
+text đã có (so theo hash nội dung) giữ nguyên vector, text mới được transform
+bằng IDF đã lưu; chỉ fit lại toàn bộ khi phần text mới vượt REFIT_RATIO.
+Tách n-gram + projection chạy song song nhiều process theo chunk.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from search import tokenize
+
+DIM         = 256
+N_TABLES    = 8
+N_BITS      = 12
+SEED        = 20240601
+REFIT_RATIO = 0.5
+_CHUNK      = 20_000
+_DOC_SHIFT  = np.uint64(34)                # key = doc << 34 | gram (gram < 2^33)
+_GRAM_MASK  = np.uint64((1 << 34) - 1)
+_TAG4       = np.uint64(1 << 32)           # phân biệt 4-gram với 3-gram
+_GOLDEN     = np.uint64(0x9E3779B97F4A7C15)
+
+
+def content_hashes(texts) -> np.ndarray:
+    """Hash uint64 của nội dung từng text (khoá để nhận ra text đã có vector)."""
+    return pd.util.hash_array(np.asarray(texts, dtype=object))
+
+
+# ─── N-gram + TF-IDF (chạy trong process con) ────────────────────────────────
+def _ngram_chunk(texts: list) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(doc, gram, count) cho 1 chunk text — doc là vị trí trong chunk."""
+    docs = [" " + " ".join(tokenize(t or "")) + " " for t in texts]
+    buf = np.frombuffer("\n".join(docs).encode("ascii"), dtype=np.uint8).astype(np.uint64)
+    lens = np.fromiter((len(d) + 1 for d in docs), dtype=np.int64, count=len(docs))
+    doc_of = np.repeat(np.arange(len(docs), dtype=np.uint64), lens)[:len(buf)]
+    sep = buf == ord("\n")
+
+    keys = []
+    for n, tag in ((3, np.uint64(0)), (4, _TAG4)):
+        if len(buf) < n:
+            continue
+        m = len(buf) - n + 1
+        gram = np.zeros(m, dtype=np.uint64)
+        bad = np.zeros(m, dtype=bool)
+        for j in range(n):
+            gram = (gram << np.uint64(8)) | buf[j:j + m]
+            bad |= sep[j:j + m]
+        keys.append((doc_of[:m][~bad] << _DOC_SHIFT) | gram[~bad] | tag)
+    if not keys:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.uint32)
+    uniq, counts = np.unique(np.concatenate(keys), return_counts=True)
+    return (uniq >> _DOC_SHIFT).astype(np.int64), uniq & _GRAM_MASK, counts.astype(np.uint32)
+
+
+def _doc_freq(texts: list) -> tuple[np.ndarray, np.ndarray]:
+    """(gram, số text chứa gram) trong 1 chunk."""
+    _, gram, _ = _ngram_chunk(texts)
+    return np.unique(gram, return_counts=True)
+
+
+_IDF: tuple = ()
+
+
+def _init_idf(grams: np.ndarray, idf: np.ndarray, default: float):
+    global _IDF
+    _IDF = (grams, idf, default)
+
+
+def _transform_chunk(texts: list) -> np.ndarray:
+    """Vector float16 (len(texts), DIM) theo bảng IDF của process (_init_idf)."""
+    grams, idf, default = _IDF
+    doc, gram, cnt = _ngram_chunk(texts)
+    out = np.zeros(len(texts) * DIM, dtype=np.float64)
+    if len(gram):
+        pos = np.minimum(np.searchsorted(grams, gram), max(len(grams) - 1, 0))
+        w = np.full(len(gram), default)
+        if len(grams):
+            hit = grams[pos] == gram
+            w[hit] = idf[pos[hit]]
+        h = gram * _GOLDEN                                  # nhân modulo 2^64
+        bucket = (h >> np.uint64(64 - int(np.log2(DIM)))).astype(np.int64)
+        sign = np.where((h >> np.uint64(7)) & np.uint64(1), 1.0, -1.0)
+        out = np.bincount(doc * DIM + bucket, weights=(1 + np.log(cnt)) * w * sign,
+                          minlength=len(texts) * DIM)
+    out = out.reshape(len(texts), DIM)
+    norm = np.linalg.norm(out, axis=1, keepdims=True)
+    np.divide(out, norm, out=out, where=norm > 0)
+    return out.astype(np.float16)
+
+
+def _pmap(fn, texts: list, workers: int, initargs: tuple = ()) -> list:
+    """fn trên từng chunk _CHUNK text, song song ``workers`` process (1 = chạy tại chỗ)."""
+    chunks = [texts[i:i + _CHUNK] for i in range(0, len(texts), _CHUNK)]
+    if workers <= 1 or len(chunks) <= 1:
+        if initargs:
+            _init_idf(*initargs)
+        return [fn(c) for c in chunks]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_idf if initargs else None,
+                             initargs=initargs) as pool:
+        return list(pool.map(fn, chunks))
+
+
+def fit_idf(texts: list, workers: int = 1) -> tuple[np.ndarray, np.ndarray, float]:
+    """Bảng IDF (gram đã sort, idf, idf mặc định). Gram chỉ có trong 1 text không cần lưu:
+    idf của nó bằng đúng idf mặc định cho gram chưa gặp."""
+    parts = _pmap(_doc_freq, texts, workers)
+    n = len(texts)
+    default = float(np.log((1 + n) / 2) + 1)
+    if not parts:
+        return np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.float32), default
+    grams, inv = np.unique(np.concatenate([g for g, _ in parts]), return_inverse=True)
+    df = np.bincount(inv, weights=np.concatenate([c for _, c in parts]))
+    keep = df >= 2
+    return grams[keep], (np.log((1 + n) / (1 + df[keep])) + 1).astype(np.float32), default
+
+
+def transform(texts: list, idf: tuple, workers: int = 1) -> np.ndarray:
+    parts = _pmap(_transform_chunk, texts, workers, initargs=idf)
+    return np.concatenate(parts) if parts else np.empty((0, DIM), dtype=np.float16)
+
+
+# ─── Index ────────────────────────────────────────────────────────────────────
+class VectorIndex:
+    """Vector TF-IDF của từng blob + LSH để tìm blob gần nhất (xem docstring module)."""
+
+    def __init__(self, vectors: np.ndarray, hashes: np.ndarray, idf: tuple):
+        self.vectors = vectors               # float16 (n_blobs, DIM), chuẩn hoá L2
+        self.hashes = hashes                 # hash nội dung theo blob id
+        self.idf = idf                       # (gram, idf, idf mặc định)
+        rng = np.random.default_rng(SEED)
+        self._planes = rng.standard_normal((DIM, N_TABLES * N_BITS)).astype(np.float32)
+        self._weights = (1 << np.arange(N_BITS)).astype(np.int64)
+        codes = np.empty((N_TABLES, len(vectors)), dtype=np.int64)
+        for lo in range(0, len(vectors), 65_536):
+            codes[:, lo:lo + 65_536] = self._codes(vectors[lo:lo + 65_536]).T
+        self._order = np.argsort(codes, axis=1, kind="stable")
+        self._sorted = np.take_along_axis(codes, self._order, axis=1)
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    @property
+    def nbytes(self) -> int:
+        return self.vectors.nbytes + self._order.nbytes + self._sorted.nbytes + self.idf[0].nbytes
+
+    def _codes(self, vectors: np.ndarray) -> np.ndarray:
+        bits = (vectors.astype(np.float32) @ self._planes > 0).reshape(len(vectors), N_TABLES, N_BITS)
+        return bits @ self._weights
+
+    # ── Build / save / load ───────────────────────────────────────────────────
+    @classmethod
+    def build(cls, texts: list, workers: int = 1, cache: Optional["VectorIndex"] = None) -> "VectorIndex":
+        """Index cho ``texts`` (theo blob id). Có ``cache`` (index lần trước) thì chỉ
+        transform text mới, trừ khi phần mới vượt REFIT_RATIO (fit lại IDF)."""
+        hashes = content_hashes(texts)
+        known = np.zeros(len(texts), dtype=bool)
+        src = np.zeros(len(texts), dtype=np.int64)
+        if cache is not None and len(cache):
+            order = np.argsort(cache.hashes)
+            pos = np.minimum(np.searchsorted(cache.hashes, hashes, sorter=order), len(order) - 1)
+            known = cache.hashes[order[pos]] == hashes
+            src = order[pos]
+
+        if cache is None or not len(texts) or (~known).mean() > REFIT_RATIO:
+            idf = fit_idf(texts, workers)
+            return cls(transform(texts, idf, workers), hashes, idf)
+
+        vectors = np.empty((len(texts), DIM), dtype=np.float16)
+        vectors[known] = cache.vectors[src[known]]
+        new = np.flatnonzero(~known)
+        if len(new):
+            vectors[new] = transform([texts[i] for i in new], cache.idf, workers)
+        return cls(vectors, hashes, cache.idf)
+
+    @classmethod
+    def from_store(cls, store, workers: int = 1, cache: Optional["VectorIndex"] = None) -> "VectorIndex":
+        return cls.build([store.text(b) for b in range(store.n_blobs)], workers, cache)
+
+    def save(self, path: Path):
+        grams, idf, default = self.idf
+        np.savez(path, vectors=self.vectors, hashes=self.hashes,
+                 idf_grams=grams, idf=idf, idf_default=np.float64(default))
+
+    @classmethod
+    def load(cls, path: Path) -> "VectorIndex":
+        with np.load(path) as z:
+            return cls(z["vectors"], z["hashes"], (z["idf_grams"], z["idf"], float(z["idf_default"])))
+
+    # ── Query ─────────────────────────────────────────────────────────────────
+    def query(self, blob_id: int, k: int = 10) -> tuple[np.ndarray, np.ndarray]:
+        """(blob ids, cosine) của ``k`` blob gần ``blob_id`` nhất (gồm cả chính nó), giảm dần."""
+        if blob_id < 0 or blob_id >= len(self):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        code = self._codes(self.vectors[blob_id:blob_id + 1])[0]
+        cand = []
+        for t in range(N_TABLES):
+            lo, hi = np.searchsorted(self._sorted[t], [code[t], code[t] + 1])
+            cand.append(self._order[t, lo:hi])
+        cand = np.unique(np.concatenate(cand))
+        if len(cand) <= k:                                    # bucket quá thưa: quét hết
+            cand = np.arange(len(self))
+        sims = self.vectors[cand].astype(np.float32) @ self.vectors[blob_id].astype(np.float32)
+        if len(cand) > k:
+            top = np.argpartition(-sims, k)[:k]
+        else:
+            top = np.arange(len(cand))
+        top = top[np.argsort(-sims[top], kind="stable")]
+        return cand[top], sims[top]
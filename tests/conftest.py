@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Fixture dùng chung cho test của generate_data.py: thư mục output tạm, Gold table
+dạng Delta (file Parquet + _delta_log) và chạy main() với tham số dòng lệnh.
+
+    python -m pytest tests
+"""
+import json
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import generate_data as gd                        # noqa: E402
+from data_core import generate_synthetic_data     # noqa: E402
+
+
+def gold_rows(n: int, prefix: str, processed_at: str, seed: int = 0) -> pd.DataFrame:
+    """``n`` rows Gold tổng hợp, conversation_id = ``prefix`` + số thứ tự."""
+    df = generate_synthetic_data(n, seed=seed)
+    df["conversation_id"] = [f"{prefix}{i:05d}" for i in range(n)]
+    df["processed_at"] = pd.Timestamp(processed_at)
+    return df
+
+
+class DeltaTable:
+    """Gold table tối giản trong lakehouse tạm: mỗi commit = 1 file JSON trong _delta_log."""
+
+    def __init__(self, lakehouse: Path):
+        self.lakehouse = lakehouse
+        self.path = lakehouse / gd.GOLD_SUBPATH
+        (self.path / "_delta_log").mkdir(parents=True)
+        self.version = -1
+
+    def commit(self, add: dict = None, remove: tuple = (), ts: str = "2026-01-01") -> int:
+        """Ghi các file trong ``add`` ({tên: DataFrame}), gỡ các file ``remove``."""
+        self.version += 1
+        lines = [{"commitInfo": {"timestamp": int(pd.Timestamp(ts).value // 10**6)}}]
+        for name, df in (add or {}).items():
+            df.to_parquet(self.path / name, index=False)
+            lines.append({"add": {"path": name}})
+        lines += [{"remove": {"path": name}} for name in remove]
+        log = self.path / "_delta_log" / f"{self.version:020d}.json"
+        log.write_text("\n".join(json.dumps(x) for x in lines) + "\n", encoding="utf-8")
+        return self.version
+
+
+@pytest.fixture
+def out_dir(tmp_path, monkeypatch) -> Path:
+    """OUTPUT_DIR của generate_data trỏ vào thư mục tạm, không tìm lakehouse mặc định."""
+    out = tmp_path / "data"
+    out.mkdir()
+    monkeypatch.setattr(gd, "OUTPUT_DIR", out)
+    monkeypatch.setattr(gd, "POSSIBLE_PATHS", [])
+    return out
+
+
+@pytest.fixture
+def delta(tmp_path) -> DeltaTable:
+    return DeltaTable(tmp_path / "lakehouse")
+
+
+@pytest.fixture
+def run_export(out_dir, monkeypatch):
+    """Chạy generate_data.main() với ``args``; trả về export đã đọc lại (theo conversation_id)."""
+    def _run(*args) -> pd.DataFrame:
+        monkeypatch.setattr(sys, "argv", ["generate_data.py", "--workers", "1", *map(str, args)])
+        gd.main()
+        output = gd._output_path("parquet")
+        return (gd._read_output(output).sort_values("conversation_id", ignore_index=True)
+                if output.exists() else None)
+    return _run
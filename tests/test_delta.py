@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""Delta time travel: chọn snapshot theo --version / --as-of và báo lỗi khi ngoài phạm vi."""
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+import generate_data as gd
+from conftest import gold_rows
+
+
+def _names(snapshot):
+    version, files = snapshot
+    return version, sorted(f.name for f in files)
+
+
+@pytest.fixture
+def history(delta):
+    """v0 thêm A · v1 thêm B · v2 gỡ A, thêm C — mỗi commit cách nhau 1 ngày (UTC)."""
+    rows = gold_rows(10, "a", "2026-01-01")
+    delta.commit({"A.parquet": rows}, ts="2026-01-01")
+    delta.commit({"B.parquet": rows}, ts="2026-01-02")
+    delta.commit({"C.parquet": rows}, remove=("A.parquet",), ts="2026-01-03")
+    return delta
+
+
+def test_version_selection(history):
+    assert _names(gd._delta_snapshot(history.path)) == (2, ["B.parquet", "C.parquet"])
+    assert _names(gd._delta_snapshot(history.path, version=0)) == (0, ["A.parquet"])
+    assert _names(gd._delta_snapshot(history.path, version=1)) == (1, ["A.parquet", "B.parquet"])
+
+
+def test_as_of_selection(history):
+    assert gd._delta_snapshot(history.path, as_of="2026-01-02 12:00")[0] == 1
+    assert gd._delta_snapshot(history.path, as_of="2026-01-02")[0] == 1       # đúng thời điểm commit
+    assert gd._delta_snapshot(history.path, as_of="2030-01-01")[0] == 2
+    # Có múi giờ: đổi về UTC trước khi so với thời điểm commit
+    assert gd._delta_snapshot(history.path, as_of="2026-01-02T06:59+07:00")[0] == 0
+    assert gd._delta_snapshot(history.path, as_of="2026-01-02T07:00+07:00")[0] == 1
+    assert gd._delta_snapshot(history.path, as_of="2026-01-02T00:00Z")[0] == 1
+    # --version và --as-of cùng lúc: lấy version nhỏ hơn
+    assert gd._delta_snapshot(history.path, version=2, as_of="2026-01-01 12:00")[0] == 0
+
+
+def test_checkpoint_then_commits(history):
+    # Checkpoint ở v1 (A, B), xoá JSON v0–v1: replay phải bắt đầu từ checkpoint
+    adds = pa.array([{"path": "A.parquet"}, {"path": "B.parquet"}, None],
+                    type=pa.struct([("path", pa.string())]))
+    pq.write_table(pa.table({"add": adds}), history.path / "_delta_log" / f"{1:020d}.checkpoint.parquet")
+    for v in (0, 1):
+        (history.path / "_delta_log" / f"{v:020d}.json").unlink()
+    assert _names(gd._delta_snapshot(history.path)) == (2, ["B.parquet", "C.parquet"])
+    assert _names(gd._delta_snapshot(history.path, version=1)) == (1, ["A.parquet", "B.parquet"])
+    with pytest.raises(ValueError, match="Thiếu Delta commit"):
+        gd._delta_snapshot(history.path, version=0)
+
+
+def test_not_a_delta_table(tmp_path):
+    assert gd._delta_snapshot(tmp_path) is None
+
+
+@pytest.mark.parametrize("kwargs, match", [
+    ({"version": 9}, "chưa tồn tại"),
+    ({"version": -1}, "≥ 0"),
+    ({"as_of": "2025-12-31"}, "Không có Delta version nào"),
+])
+def test_out_of_range_raises(history, kwargs, match):
+    with pytest.raises(ValueError, match=match):
+        gd._delta_snapshot(history.path, **kwargs)
+
+
+@pytest.mark.parametrize("args, code", [
+    (["--version", "-1"], 2),                    # argparse
+    (["--as-of", "không-phải-ngày"], 2),
+    (["--version", "9"], "chưa tồn tại"),
+    (["--as-of", "2025-12-31"], "Không có Delta version nào"),
+])
+def test_cli_rejects_without_writing(history, run_export, args, code):
+    with pytest.raises(SystemExit) as exc:
+        run_export("--lakehouse", history.lakehouse, *args)
+    if isinstance(code, int):
+        assert exc.value.code == code
+    else:
+        assert code in str(exc.value.code)
+    assert not gd._output_path("parquet").exists()
+
+
+def test_empty_snapshot_does_not_fall_back_to_synthetic(delta, run_export):
+    delta.commit({"A.parquet": gold_rows(10, "a", "2026-01-01")})
+    delta.commit(remove=("A.parquet",))
+    with pytest.raises(SystemExit, match="không có dữ liệu Gold"):
+        run_export("--lakehouse", delta.lakehouse, "--version", "1")
+    assert not gd._output_path("parquet").exists()
+
+
+def test_cli_exports_selected_version(history, run_export):
+    assert len(run_export("--lakehouse", history.lakehouse, "--version", "0")) == 10
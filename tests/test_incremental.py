@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""--incremental: merge file mới/đổi vào export cũ phải ra đúng như export toàn bộ."""
+import shutil
+
+import pandas as pd
+import pandas.testing as tm
+
+import generate_data as gd
+from conftest import gold_rows
+
+
+def test_upserts_match_full_export(delta, run_export, out_dir):
+    delta.commit({"part-0.parquet": gold_rows(200, "a", "2026-02-01")})
+    first = run_export("--lakehouse", delta.lakehouse, "--incremental")
+    assert len(first) == 200
+
+    # Lần 2: bản mới hơn của 50 id cũ, 30 id mới, và 20 id đến muộn (processed_at < watermark)
+    updated = gold_rows(50, "a", "2026-02-10", seed=1)
+    new = gold_rows(30, "b", "2026-02-10", seed=2)
+    late = gold_rows(20, "c", "2026-01-15", seed=3)
+    delta.commit({"part-1.parquet": pd.concat([updated, new, late], ignore_index=True)})
+    merged = run_export("--lakehouse", delta.lakehouse, "--incremental")
+
+    assert len(merged) == 250
+    assert set(merged.loc[merged["conversation_id"].str.startswith("c"), "conversation_id"]) \
+        == set(late["conversation_id"])
+    latest = merged.set_index("conversation_id").loc[updated["conversation_id"], "processed_at"]
+    assert (latest == pd.Timestamp("2026-02-10")).all()
+
+    shutil.rmtree(out_dir)                               # export toàn bộ từ đầu để so
+    out_dir.mkdir()
+    full = run_export("--lakehouse", delta.lakehouse)
+    tm.assert_frame_equal(merged, full, check_categorical=False)
+
+
+def test_removed_file_triggers_full_export(delta, run_export):
+    delta.commit({"part-0.parquet": gold_rows(100, "a", "2026-02-01"),
+                  "part-1.parquet": gold_rows(40, "b", "2026-02-01")})
+    assert len(run_export("--lakehouse", delta.lakehouse, "--incremental")) == 140
+
+    # Delta remove: incremental không biết rows nào cần gỡ → export lại toàn bộ
+    delta.commit(remove=("part-1.parquet",))
+    after = run_export("--lakehouse", delta.lakehouse, "--incremental")
+    assert len(after) == 100
+    assert not after["conversation_id"].str.startswith("b").any()
+
+
+def test_nothing_changed_keeps_export(delta, run_export):
+    delta.commit({"part-0.parquet": gold_rows(50, "a", "2026-02-01")})
+    run_export("--lakehouse", delta.lakehouse, "--incremental")
+    output = gd._output_path("parquet")
+    mtime = output.stat().st_mtime_ns
+    run_export("--lakehouse", delta.lakehouse, "--incremental")
+    assert output.stat().st_mtime_ns == mtime
+
+
+def test_watermark_round_trip(delta, out_dir):
+    delta.commit({"part-0.parquet": gold_rows(10, "a", "2026-02-01")})
+    files = sorted(delta.path.glob("*.parquet"))
+    stats = gd._file_stats(files, delta.path)
+    output = gd._output_path("parquet")
+    output.write_bytes(b"")
+    wm_path = out_dir / "wm.json"
+
+    gd._save_watermark(wm_path, pd.Timestamp("2026-02-01 10:00"), delta.path, stats, output)
+    wm = gd._load_watermark(wm_path)
+    assert wm["processed_at"] == "2026-02-01T10:00:00"
+    assert wm["files"] == stats
+    assert gd._changed_files(wm, delta.path, output, stats) == []
+
+    changed = dict(stats, **{"part-9.parquet": [1, 1]})
+    assert gd._changed_files(wm, delta.path, output, changed) == ["part-9.parquet"]
+    assert gd._changed_files(wm, delta.path, output, {}) is None              # file bị xoá
+    assert gd._changed_files(wm, delta.path / "other", output, stats) is None  # Gold khác
+    output.unlink()
+    assert gd._changed_files(wm, delta.path, output, stats) is None            # chưa có export
+
+    wm_path.write_text("{hỏng", encoding="utf-8")
+    assert gd._load_watermark(wm_path) is None
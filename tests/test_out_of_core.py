@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""--mem-budget-mb: dedup out-of-core (spill buckets) phải ra đúng như export trong RAM."""
+import shutil
+
+import pandas as pd
+import pandas.testing as tm
+
+from conftest import gold_rows
+
+_TINY_BUDGET = 0.05          # MB — đủ nhỏ để luôn chia nhiều spill bucket
+
+
+def _gold(delta):
+    # 2 file có id trùng nhau: bản processed_at mới hơn phải thắng ở cả hai cách
+    old = gold_rows(300, "a", "2026-02-01")
+    newer = gold_rows(120, "a", "2026-02-05", seed=1)
+    extra = gold_rows(80, "b", "2026-02-03", seed=2)
+    delta.commit({"part-0.parquet": old,
+                  "part-1.parquet": pd.concat([newer, extra], ignore_index=True)})
+
+
+def _fresh(out_dir):
+    shutil.rmtree(out_dir)
+    out_dir.mkdir()
+
+
+def test_matches_in_memory_export(delta, run_export, out_dir, capsys):
+    _gold(delta)
+    in_memory = run_export("--lakehouse", delta.lakehouse)
+    _fresh(out_dir)
+    out_of_core = run_export("--lakehouse", delta.lakehouse, "--mem-budget-mb", _TINY_BUDGET)
+
+    assert "spill buckets" in capsys.readouterr().out
+    assert len(out_of_core) == 380
+    tm.assert_frame_equal(out_of_core, in_memory, check_categorical=False)
+
+
+def test_incremental_matches_in_memory(delta, run_export, out_dir, capsys):
+    delta.commit({"part-0.parquet": gold_rows(300, "a", "2026-02-01")})
+    run_export("--lakehouse", delta.lakehouse, "--incremental")
+    delta.commit({"part-1.parquet": pd.concat([gold_rows(120, "a", "2026-02-05", seed=1),
+                                               gold_rows(80, "b", "2026-01-20", seed=2)],
+                                              ignore_index=True)})
+    snapshot = out_dir.with_name("snapshot")
+    shutil.copytree(out_dir, snapshot)
+
+    in_memory = run_export("--lakehouse", delta.lakehouse, "--incremental")
+    shutil.rmtree(out_dir)
+    shutil.copytree(snapshot, out_dir)                   # cùng export + watermark của lần 1
+    out_of_core = run_export("--lakehouse", delta.lakehouse, "--incremental",
+                             "--mem-budget-mb", _TINY_BUDGET)
+
+    assert "spill buckets" in capsys.readouterr().out
+    assert len(out_of_core) == 380
+    tm.assert_frame_equal(out_of_core, in_memory, check_categorical=False)
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""--shards: nội dung từng part chỉ phụ thuộc (n, seed, shards), không phụ thuộc số workers."""
+import os
+
+import pandas as pd
+import pandas.testing as tm
+import pytest
+
+import generate_data as gd
+from data_core import synthetic_chunk
+
+N, SEED, SHARDS = 1_000, 7, 4
+
+
+def _parts(out_dir):
+    return {p.name: pd.read_parquet(p) for p in sorted(out_dir.glob("part-*"))}
+
+
+@pytest.fixture(autouse=True)
+def _many_cpus(monkeypatch):
+    # generate_synthetic_sharded giới hạn workers theo os.cpu_count(): ép > 1 để test có nghĩa
+    monkeypatch.setattr(os, "cpu_count", lambda: 8)
+
+
+def test_same_output_for_any_worker_count(tmp_path):
+    results = {}
+    for workers in (1, 3):
+        out = tmp_path / f"w{workers}"
+        assert gd.generate_synthetic_sharded(N, SEED, SHARDS, workers, out, ".parquet") == N
+        results[workers] = _parts(out)
+
+    assert list(results[1]) == [f"part-{i:05d}.parquet" for i in range(SHARDS)]
+    assert list(results[3]) == list(results[1])
+    for name, df in results[1].items():
+        tm.assert_frame_equal(results[3][name], df)
+
+
+def test_part_is_synthetic_chunk(tmp_path):
+    out = tmp_path / "conversations"
+    gd.generate_synthetic_sharded(N, SEED, SHARDS, 2, out, ".parquet")
+    shard_size = -(-N // SHARDS)
+    for i, df in enumerate(_parts(out).values()):
+        expected = gd._to_columnar(synthetic_chunk(i, N, SEED, shard_size))
+        tm.assert_frame_equal(df, expected, check_categorical=False, check_dtype=False)
+    assert not out.with_name(out.name + ".tmp").exists()
+
+
+def test_uneven_split(tmp_path):
+    out = tmp_path / "conversations"
+    assert gd.generate_synthetic_sharded(10, SEED, 4, 3, out, ".parquet") == 10
+    sizes = [len(df) for df in _parts(out).values()]
+    assert sizes == [3, 3, 3, 1]
+    ids = pd.concat(_parts(out).values())["conversation_id"]
+    assert ids.is_unique
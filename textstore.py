@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+textstore.py — Kho nội dung hội thoại nằm ngoài DataFrame
+==========================================================
+conversation_snippet chỉ được đọc khi xem chi tiết 1 conversation, nên không
+cần nằm trong DataFrame phân tích. TextStore giữ nó ở 2 file cạnh export:
+
+    conversations.text.bin       — các đoạn text duy nhất, nén zlib, nối tiếp (mmap)
+    conversations.text.idx.npz   — hash(conversation_id) đã sort → blob id,
+                                   offsets của từng blob trong file .bin
+
+Text trùng nhau (vd. template theo intent) chỉ lưu 1 lần. Index tốn ~12 bytes
+mỗi conversation; phần text nằm trong page cache của OS, không trong heap Python.
+"""
+import io
+import mmap
+import zlib
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+
+def store_paths(stem: Path) -> tuple[Path, Path]:
+    """(file blob, file index) cho ``stem`` dạng ``data/conversations.text``."""
+    return stem.with_name(stem.name + ".bin"), stem.with_name(stem.name + ".idx.npz")
+
+
+def _key(ids) -> np.ndarray:
+    """conversation_id → uint64 (hash ổn định giữa các process/phiên bản Python)."""
+    return pd.util.hash_array(np.asarray(ids, dtype=object))
+
+
+def _hash_texts(texts: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+    """(hash uint64 của mỗi text, mask text hợp lệ). Category chỉ hash các giá trị duy nhất."""
+    if isinstance(texts.dtype, pd.CategoricalDtype):
+        codes = texts.cat.codes.to_numpy()
+        cat_h = pd.util.hash_array(np.asarray(texts.cat.categories, dtype=object))
+        return cat_h[np.maximum(codes, 0)], codes >= 0
+    valid = texts.notna().to_numpy()
+    return pd.util.hash_array(texts.astype(object).to_numpy()), valid
+
+
+class TextStore:
+    """Tra cứu conversation_id → nội dung hội thoại, text dedup + nén theo blob."""
+
+    def __init__(self, keys: np.ndarray, blob_of: np.ndarray, offsets: np.ndarray, data):
+        self._keys    = keys       # uint64, đã sort
+        self._blob_of = blob_of    # int32, blob id cho từng key (-1 = không có text)
+        self._offsets = offsets    # uint64, n_blobs + 1
+        self._data    = data       # mmap hoặc bytes
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @property
+    def n_blobs(self) -> int:
+        return len(self._offsets) - 1
+
+    @property
+    def nbytes(self) -> int:
+        """Bộ nhớ heap của index (không tính file blob đã mmap)."""
+        return self._keys.nbytes + self._blob_of.nbytes + self._offsets.nbytes
+
+    # ── Build / open ──────────────────────────────────────────────────────────
+    @classmethod
+    def build(cls, batches: Iterable[tuple], stem: Optional[Path] = None) -> "TextStore":
+        """Dựng store từ các lô (ids, texts). Có ``stem`` thì ghi ra đĩa rồi mở mmap."""
+        bin_path, idx_path = store_paths(stem) if stem is not None else (None, None)
+        sink = open(bin_path, "wb") if bin_path else io.BytesIO()
+        seen: dict[int, int] = {}
+        offsets, pos = [0], 0
+        keys, blobs = [], []
+        try:
+            for ids, texts in batches:
+                texts = pd.Series(texts).reset_index(drop=True)
+                th, valid = _hash_texts(texts)
+                uniq, first = np.unique(th[valid], return_index=True)
+                rows = np.flatnonzero(valid)[first]
+                for h, r in zip(uniq.tolist(), rows.tolist()):
+                    if h not in seen:
+                        blob = zlib.compress(str(texts.iat[r]).encode("utf-8"))
+                        sink.write(blob)
+                        pos += len(blob)
+                        seen[h] = len(offsets) - 1
+                        offsets.append(pos)
+                blob_of = np.full(len(texts), -1, dtype=np.int32)
+                if len(uniq):
+                    lookup = np.array([seen[h] for h in uniq.tolist()], dtype=np.int32)
+                    blob_of[valid] = lookup[np.searchsorted(uniq, th[valid])]
+                keys.append(_key(ids))
+                blobs.append(blob_of)
+        finally:
+            if bin_path:
+                sink.close()
+
+        keys = np.concatenate(keys) if keys else np.empty(0, dtype=np.uint64)
+        blob_of = np.concatenate(blobs) if blobs else np.empty(0, dtype=np.int32)
+        order = np.argsort(keys, kind="stable")
+        keys, blob_of = keys[order], blob_of[order]
+        offsets = np.asarray(offsets, dtype=np.uint64)
+        if idx_path is None:
+            return cls(keys, blob_of, offsets, sink.getvalue())
+        np.savez(idx_path, keys=keys, blob_of=blob_of, offsets=offsets)
+        return cls.open(stem)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, col: str = "conversation_snippet") -> "TextStore":
+        """Store trong RAM từ DataFrame có sẵn cột text (export cũ, dữ liệu tổng hợp)."""
+        return cls.build([(df["conversation_id"], df[col])])
+
+    @classmethod
+    def open(cls, stem: Path) -> "TextStore":
+        bin_path, idx_path = store_paths(stem)
+        with np.load(idx_path) as idx:
+            keys, blob_of, offsets = idx["keys"], idx["blob_of"], idx["offsets"]
+        data = b""
+        if bin_path.stat().st_size:
+            with open(bin_path, "rb") as fh:
+                data = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(keys, blob_of, offsets, data)
+
+    @staticmethod
+    def exists(stem: Path) -> bool:
+        return all(p.exists() for p in store_paths(stem))
+
+    # ── Lookup ────────────────────────────────────────────────────────────────
+    def blob_ids(self, ids) -> np.ndarray:
+        """Blob id cho từng conversation_id (-1 nếu không có text)."""
+        k = _key(ids)
+        i = np.minimum(np.searchsorted(self._keys, k), max(len(self._keys) - 1, 0))
+        if not len(self._keys):
+            return np.full(len(k), -1, dtype=np.int32)
+        return np.where(self._keys[i] == k, self._blob_of[i], -1).astype(np.int32)
+
+    def text(self, blob_id: int) -> str:
+        if blob_id < 0 or blob_id >= self.n_blobs:
+            return ""
+        lo, hi = int(self._offsets[blob_id]), int(self._offsets[blob_id + 1])
+        return zlib.decompress(self._data[lo:hi]).decode("utf-8")
+
+    def get(self, conversation_id) -> str:
+        """Nội dung hội thoại của 1 conversation ("" nếu không có)."""
+        return self.text(int(self.blob_ids([conversation_id])[0]))